@@ -0,0 +1,577 @@
+import asyncio
+import os
+import tempfile
+import random
+import time
+from datetime import datetime, timedelta
+from models.time_interval import TimeInterval
+from models.temporal_task import TemporalTask
+from models.calendar import Calendar
+from models.csp import CSP
+from models.solver_options import SolverOptions, default_portfolio
+from models.solver_trace import SolverTrace, summarize_trace
+from models.view_cache import ViewCache
+from models.async_calendar import AsyncCalendar
+from models.calendar_host import CalendarHost
+from models.free_busy import free_slots
+
+BENCHMARK_DAY = datetime(2025, 10, 2)
+
+def generate_day(num_events: int, seed: int = 0, day: datetime = BENCHMARK_DAY, first_hour: int = 3, last_hour: int = 21, max_slack_hours: int = 3, max_extra_windows: int = 1, calendar: Calendar = None, prefix: str = "Event"):
+    # Builds a calendar with num_events flexible events on one day, each with
+    # a main slot, a window of slack around it and sometimes a second window
+    rng = random.Random(seed)
+    if calendar is None:
+        calendar = Calendar()
+    day_start = datetime(day.year, day.month, day.day)
+    day_end = datetime(day.year, day.month, day.day, 23, 59, 59)
+
+    for i in range(num_events):
+        duration = timedelta(minutes=rng.choice([5, 10, 15, 30]))
+        start = day_start + timedelta(seconds=rng.randrange(first_hour * 3600, last_hour * 3600))
+        slack = timedelta(seconds=rng.randrange(0, max_slack_hours * 3600))
+
+        intervals = [TimeInterval(max(day_start, start - slack), min(day_end, start + duration + slack))]
+        for _ in range(rng.randrange(0, max_extra_windows + 1)):
+            other_start = day_start + timedelta(seconds=rng.randrange(first_hour * 3600, last_hour * 3600))
+            intervals.append(TimeInterval(other_start, min(day_end, other_start + duration + slack)))
+
+        task = TemporalTask(f"{prefix} {i}", "Benchmark event", start, start + duration, None, None, intervals)
+        calendar.schedule_event(task, 20, 15, 10, 25)
+
+    return calendar
+
+def generate_packed_day(num_events: int, seed: int = 0, day: datetime = BENCHMARK_DAY, durations=(3, 5, 10), max_slack_minutes: int = 30):
+    # Lays num_events short events out one after another between 1:00 and 23:00 with random
+    # gaps, then gives each some slack, so the day is feasible but can be packed tightly
+    rng = random.Random(seed)
+    calendar = Calendar()
+    day_start = datetime(day.year, day.month, day.day)
+    day_end = datetime(day.year, day.month, day.day, 23, 59)
+
+    minutes = [rng.choice(durations) for _ in range(num_events)]
+    free_minutes = 22 * 60 - sum(minutes)
+    if free_minutes < 0:
+        raise ValueError(f"{num_events} events do not fit in one day")
+
+    current = 60
+    for i, duration in enumerate(minutes):
+        current += rng.randrange(0, 2 * free_minutes // num_events + 1)
+        start = day_start + timedelta(minutes=current)
+        end = start + timedelta(minutes=duration)
+        current += duration
+
+        slack = timedelta(minutes=rng.randrange(0, max_slack_minutes))
+        task = TemporalTask(f"Event {i}", "Benchmark event", start, end, None, None, [TimeInterval(max(day_start, start - slack), min(day_end, end + slack))])
+        calendar.schedule_event(task, 20, 15, 10, 25)
+
+    return calendar
+
+class NodeLimitReached(Exception):
+    pass
+
+class NodeLimitCSP(CSP):
+    # Gives up once the search tree grows past node_limit, so hopeless configurations don't stall the benchmark
+    node_limit = 20000
+
+    def _backtrack(self):
+        if self.nodes_expanded > self.node_limit:
+            raise NodeLimitReached()
+        return super()._backtrack()
+
+    def _backjump(self):
+        if self.nodes_expanded > self.node_limit:
+            raise NodeLimitReached()
+        return super()._backjump()
+
+    def _bitset_backtrack(self, model, assigned, remaining):
+        if self.nodes_expanded > self.node_limit:
+            raise NodeLimitReached()
+        return super()._bitset_backtrack(model, assigned, remaining)
+
+def build_csp(calendar: Calendar, day: datetime = BENCHMARK_DAY, csp_class = CSP):
+    day_interval = TimeInterval(datetime(day.year, day.month, day.day), datetime(day.year, day.month, day.day, 23, 59, 59))
+    arcs = calendar._time_tree.sweepline_overlap_search(day_interval)
+
+    domains = {}
+    for event, neighbor in arcs.keys():
+        if event not in domains:
+            domains[event] = event.schedule_intervals
+        if neighbor not in domains:
+            domains[neighbor] = neighbor.schedule_intervals
+
+    return csp_class(domains, arcs)
+
+def time_call(function):
+    start = time.perf_counter()
+    try:
+        function()
+    except (ValueError, KeyError) as error:
+        return None, error
+    return time.perf_counter() - start, None
+
+def benchmark_arc_consistency(sizes=(50, 100, 200, 500), seed=0):
+    print("Arc consistency: _AC3 vs _AC2001")
+    for size in sizes:
+        calendar = generate_day(size, seed)
+        ac3_csp = build_csp(calendar)
+        ac2001_csp = build_csp(calendar)
+
+        ac3_time, ac3_error = time_call(ac3_csp._AC3)
+        ac2001_time, _ = time_call(ac2001_csp._AC2001)
+
+        num_arcs = len(ac2001_csp.arcs)
+        values = sum(len(domain) for domain in ac2001_csp.domains.values())
+        ac3_result = f"{ac3_time:8.3f}s" if ac3_error is None else f"failed ({type(ac3_error).__name__})"
+        same = "-" if ac3_error is not None else ac3_csp.domains == ac2001_csp.domains
+        print(f"  {size:4d} events, {num_arcs:6d} arcs, {values:5d} values left: _AC3 {ac3_result}, _AC2001 {ac2001_time:8.3f}s, same domains: {same}")
+
+def benchmark_search_heuristics(sizes=(20, 40), seeds=(0, 2, 5, 6)):
+    print("Backtracking search: nodes expanded per configuration")
+    configurations = {
+        "static": SolverOptions("static", "static", False, backjumping=False),
+        "mrv": SolverOptions("mrv", "static", False, backjumping=False),
+        "forward checking": SolverOptions("static", "static", True, backjumping=False),
+        "mrv + lcv + forward checking": SolverOptions("mrv", "lcv", True, backjumping=False),
+        "+ backjumping": SolverOptions("mrv", "lcv", True, backjumping=True),
+    }
+
+    for size in sizes:
+        for seed in seeds:
+            results = []
+            for name, options in configurations.items():
+                csp = build_csp(generate_day(size, seed, first_hour=8, last_hour=14, max_slack_hours=1, max_extra_windows=4), csp_class=NodeLimitCSP)
+                csp.options = options
+                csp._AC2001()
+
+                start = time.perf_counter()
+                try:
+                    csp.solve()
+                    nodes = str(csp.nodes_expanded)
+                except NodeLimitReached:
+                    nodes = f">{NodeLimitCSP.node_limit}"
+                results.append(f"{name} {nodes} ({time.perf_counter() - start:.3f}s)")
+            print(f"  {size:3d} events, seed {seed}: " + ", ".join(results))
+
+def benchmark_decomposition(cluster_size=40, num_clusters=3, seed=3):
+    print("Component decomposition: whole day vs per-component")
+    configurations = {
+        "whole day": SolverOptions(decompose=False),
+        "components": SolverOptions(decompose=True),
+        # The second run borrows the processes the first one started
+        "components, 4 processes, cold pool": SolverOptions(decompose=True, max_workers=4),
+        "components, 4 processes, warm pool": SolverOptions(decompose=True, max_workers=4),
+    }
+
+    for name, options in configurations.items():
+        calendar = Calendar()
+        for cluster in range(num_clusters):
+            first_hour = 1 + cluster * 7
+            generate_day(cluster_size, seed + cluster, first_hour=first_hour, last_hour=first_hour + 5, max_slack_hours=1, max_extra_windows=4, calendar=calendar, prefix=f"Cluster {cluster} event")
+
+        csp = build_csp(calendar, csp_class=NodeLimitCSP)
+        csp.options = options
+        csp._AC2001()
+
+        start = time.perf_counter()
+        try:
+            solved = csp.solve().status
+            nodes = str(csp.nodes_expanded)
+        except NodeLimitReached:
+            solved, nodes = None, f">{NodeLimitCSP.node_limit}"
+        print(f"  {name}: {len(csp._get_components())} components, {solved}, {nodes} nodes ({time.perf_counter() - start:.3f}s)")
+
+def benchmark_portfolio(size=40, seeds=(2, 5, 6), portfolio_size=4):
+    print("Portfolio: default configuration vs first result of a portfolio")
+    for seed in seeds:
+        calendar = generate_day(size, seed, first_hour=8, last_hour=14, max_slack_hours=1, max_extra_windows=4)
+
+        single_csp = build_csp(calendar)
+        start = time.perf_counter()
+        single_csp.solve()
+        single_time = time.perf_counter() - start
+
+        portfolio_csp = build_csp(calendar)
+        start = time.perf_counter()
+        portfolio_csp.solve_portfolio(default_portfolio(portfolio_size))
+        portfolio_time = time.perf_counter() - start
+
+        print(f"  {size} events, seed {seed}: default {single_time:.3f}s, portfolio of {portfolio_size} {portfolio_time:.3f}s (won by {portfolio_csp.winning_options})")
+
+def benchmark_domain_models(seeds=(0, 2, 5), node_limit=2000):
+    print("Domain models: interval windows vs start time bitsets (status, nodes, time)")
+    configurations = {
+        "interval": SolverOptions(),
+        "bitset 1 min": SolverOptions(domain_model="bitset", granularity=timedelta(minutes=1)),
+        "bitset 5 min": SolverOptions(domain_model="bitset", granularity=timedelta(minutes=5)),
+        "bitset 15 min": SolverOptions(domain_model="bitset", granularity=timedelta(minutes=15)),
+    }
+    days = {
+        "40 spread events": dict(num_events=40, max_extra_windows=2),
+        "80 spread events": dict(num_events=80, max_extra_windows=2),
+        "40 dense events": dict(num_events=40, first_hour=8, last_hour=14, max_slack_hours=1, max_extra_windows=4),
+    }
+
+    for day_name, day_options in days.items():
+        for seed in seeds:
+            calendar = generate_day(seed=seed, **day_options)
+            results = []
+            for name, options in configurations.items():
+                csp = build_csp(calendar, csp_class=NodeLimitCSP)
+                csp.options = options
+                csp.node_limit = node_limit
+
+                start = time.perf_counter()
+                try:
+                    solved = csp.solve().status
+                    nodes = str(csp.nodes_expanded)
+                except NodeLimitReached:
+                    solved, nodes = None, f">{node_limit}"
+                results.append(f"{name} {solved} {nodes} ({time.perf_counter() - start:.3f}s)")
+            print(f"  {day_name}, seed {seed}: " + ", ".join(results))
+
+def benchmark_optimize(size=40, seeds=(0, 2, 5, 6), time_limits=(0.1, 1.0)):
+    print("Branch-and-bound: priority kept on overconstrained days within a time limit")
+    for seed in seeds:
+        calendar = generate_day(size, seed, first_hour=8, last_hour=14, max_slack_hours=1, max_extra_windows=4)
+        results = []
+        for time_limit in time_limits:
+            csp = build_csp(calendar)
+            total = sum(event.get_priority_score() for event in csp.domains)
+
+            start = time.perf_counter()
+            score = csp.optimize(time_limit)
+            elapsed = time.perf_counter() - start
+            results.append(f"limit {time_limit}s: {len(csp.assignments)}/{len(csp.domains)} events, {score / total:.1%} of priority, optimal {csp.proved_optimal} ({elapsed:.3f}s)")
+        print(f"  {size} events, seed {seed}: " + ", ".join(results))
+
+def benchmark_local_search(sizes=(150, 200, 210), seeds=(1, 2), node_limit=3000, time_limit=10.0):
+    print("Local search vs systematic search on tightly packed days (solved, nodes or moves, time)")
+    granularity = timedelta(minutes=1)
+    configurations = {
+        "interval backtracking": SolverOptions(),
+        "bitset backtracking": SolverOptions(domain_model="bitset", granularity=granularity),
+        "min-conflicts": SolverOptions(search="local", granularity=granularity, random_seed=0, time_limit=time_limit),
+        "annealing": SolverOptions(search="local", granularity=granularity, random_seed=0, time_limit=time_limit, temperature=1.0),
+    }
+
+    for size in sizes:
+        for seed in seeds:
+            calendar = generate_packed_day(size, seed)
+            results = []
+            for name, options in configurations.items():
+                csp = build_csp(calendar, csp_class=NodeLimitCSP)
+                csp.options = options
+                csp.node_limit = node_limit
+
+                start = time.perf_counter()
+                try:
+                    solved = csp.solve().status
+                    nodes = str(csp.nodes_expanded)
+                except NodeLimitReached:
+                    solved, nodes = None, f">{node_limit}"
+                results.append(f"{name} {solved} {nodes} ({time.perf_counter() - start:.3f}s)")
+            print(f"  {size} events, seed {seed}: " + ", ".join(results))
+
+def benchmark_incremental(sizes=(60, 120), seeds=(0, 2, 5)):
+    print("Incremental re-solve: cold solve vs warm start after inserting and removing one event")
+    options = SolverOptions(domain_model="bitset", granularity=timedelta(minutes=1))
+    for size in sizes:
+        for seed in seeds:
+            calendar = generate_packed_day(size, seed)
+
+            start = time.perf_counter()
+            first = calendar.generate_schedule(BENCHMARK_DAY, options)
+            cold_time = time.perf_counter() - start
+
+            # The new event takes the slot of the earliest scheduled one, which has to move
+            earliest = min(first.assignments.values(), key=lambda interval: interval.start_date)
+            task = TemporalTask("Inserted event", "Benchmark event", earliest.start_date, earliest.end_date)
+            calendar.schedule_event(task, 20, 15, 10, 25)
+            start = time.perf_counter()
+            inserted = calendar.generate_schedule(BENCHMARK_DAY, options)
+            insert_time = time.perf_counter() - start
+            moved = sum(1 for event, interval in first.assignments.items() if inserted.assignments.get(event) != interval)
+
+            event = next(event for event in inserted.assignments if event.get_task() is task)
+            calendar.remove_event(event)
+            start = time.perf_counter()
+            removed = calendar.generate_schedule(BENCHMARK_DAY, options)
+            remove_time = time.perf_counter() - start
+
+            print(
+                f"  {size} events, seed {seed}: cold {first.status} ({cold_time:.3f}s), "
+                f"insert {inserted.status}, {moved} moved, {inserted.nodes_expanded - first.nodes_expanded} nodes ({insert_time * 1000:.1f}ms), "
+                f"remove {removed.status} ({remove_time * 1000:.1f}ms)"
+            )
+
+def benchmark_solution_cache(size=30, days=30):
+    print("Solution cache: a month of weekday and weekend routines")
+    calendar = Calendar()
+    for offset in range(days):
+        day = BENCHMARK_DAY + timedelta(days=offset)
+        # Every weekday has the same routine, and so does every weekend day
+        generate_day(size, 0 if day.weekday() < 5 else 1, day, first_hour=8, last_hour=14, max_slack_hours=1, calendar=calendar, prefix=f"Day {offset} event")
+
+    start = time.perf_counter()
+    statuses = [calendar.generate_schedule(BENCHMARK_DAY + timedelta(days=offset)).status for offset in range(days)]
+    elapsed = time.perf_counter() - start
+
+    cache = calendar.solution_cache
+    print(f"  {days} days of {size} events: {statuses.count('solved')} solved, {cache.hits} hits, {cache.misses} misses ({elapsed:.3f}s)")
+
+def benchmark_no_overlap(seeds=(0, 2, 5), node_limit=2000):
+    print("No-overlap: pairwise supports vs the global constraint (status, nodes, time)")
+    configurations = {
+        "bitset pairwise": SolverOptions(domain_model="bitset", granularity=timedelta(minutes=1)),
+        "bitset global": SolverOptions(domain_model="bitset", granularity=timedelta(minutes=1), no_overlap="global"),
+        "interval global": SolverOptions(no_overlap="global"),
+    }
+    days = {
+        "40 dense events": lambda seed: generate_day(40, seed, first_hour=8, last_hour=14, max_slack_hours=1, max_extra_windows=4),
+        "80 spread events": lambda seed: generate_day(80, seed),
+        "150 packed events": lambda seed: generate_packed_day(150, seed),
+        "200 packed events": lambda seed: generate_packed_day(200, seed),
+    }
+
+    for day_name, generate in days.items():
+        for seed in seeds:
+            calendar = generate(seed)
+            results = []
+            for name, options in configurations.items():
+                csp = build_csp(calendar, csp_class=NodeLimitCSP)
+                csp.options = options
+                csp.node_limit = node_limit
+
+                start = time.perf_counter()
+                try:
+                    solved = csp.solve().status
+                    nodes = str(csp.nodes_expanded)
+                except NodeLimitReached:
+                    solved, nodes = None, f">{node_limit}"
+                results.append(f"{name} {solved} {nodes} ({time.perf_counter() - start:.3f}s)")
+            print(f"  {day_name}, seed {seed}: " + ", ".join(results))
+
+def benchmark_instrumentation(sizes=(40, 80), seeds=(0, 2, 5), repeats=3):
+    print("Instrumentation: solve time with and without stats, and what they show")
+    for size in sizes:
+        for seed in seeds:
+            calendar = generate_day(size, seed)
+            times = {}
+            for instrument in (False, True):
+                best = None
+                for _ in range(repeats):
+                    csp = build_csp(calendar)
+                    csp.options = SolverOptions(instrument=instrument)
+                    start = time.perf_counter()
+                    result = csp.solve()
+                    elapsed = time.perf_counter() - start
+                    best = elapsed if best is None else min(best, elapsed)
+                times[instrument] = best
+            stats = result.stats
+            phases = ", ".join(f"{phase} {seconds:.3f}s" for phase, seconds in stats.phases.items())
+            print(
+                f"  {size} events, seed {seed}: off {times[False]:.3f}s, on {times[True]:.3f}s; "
+                f"{stats.arcs} arcs, {stats.revisions} revisions, {stats.values_removed} values removed, "
+                f"{stats.nodes} nodes, {stats.backtracks} backtracks, undo depth {stats.max_undo_depth} ({phases})"
+            )
+
+def benchmark_trace(size=80, seeds=(0, 5), sample_rates=(None, 1, 16), repeats=3, path="trace.jsonl"):
+    print("Solver trace: solve time untraced and traced at different sample rates")
+    for domain_model in ("interval", "bitset"):
+        for seed in seeds:
+            calendar = generate_day(size, seed)
+            results = []
+            for sample_every in sample_rates:
+                best = None
+                for _ in range(repeats):
+                    csp = build_csp(calendar)
+                    csp.options = SolverOptions(domain_model=domain_model, granularity=timedelta(minutes=1))
+                    if sample_every is not None:
+                        csp.trace = SolverTrace(path, sample_every=sample_every)
+                    start = time.perf_counter()
+                    csp.solve()
+                    elapsed = time.perf_counter() - start
+                    if csp.trace is not None:
+                        csp.trace.close()
+                    best = elapsed if best is None else min(best, elapsed)
+                if sample_every is None:
+                    results.append(f"off {best:.3f}s")
+                else:
+                    results.append(f"1 in {sample_every} {best:.3f}s ({summarize_trace(path)['records']} records)")
+            print(f"  {domain_model}, {size} events, seed {seed}: " + ", ".join(results))
+    os.remove(path)
+
+def benchmark_view_cache(size=60, days=30, think_time=0.01):
+    print("View cache: paging forward then back through a month of day views")
+    calendar = Calendar()
+    for offset in range(days):
+        generate_day(size, offset, BENCHMARK_DAY + timedelta(days=offset), calendar=calendar, prefix=f"Day {offset} event")
+
+    for prefetch in (None, False, True):
+        cache = ViewCache(calendar, prefetch=bool(prefetch))
+        # None renders every view, as drawing without the cache would
+        render = (lambda day: cache._render(cache._key("day", day))) if prefetch is None else (lambda day: cache.get("day", day))
+        waits = []
+        for offset in list(range(days)) + list(reversed(range(days))):
+            start = time.perf_counter()
+            render(BENCHMARK_DAY + timedelta(days=offset))
+            waits.append(time.perf_counter() - start)
+            # The user reads the page before the next keypress, which is when prefetching happens
+            time.sleep(think_time)
+        cache.close()
+
+        name = "no cache" if prefetch is None else "prefetch" if prefetch else "cache"
+        print(f"  {name}: {sum(waits) / len(waits) * 1000:.3f}ms per page, worst {max(waits) * 1000:.3f}ms, {cache.hits} hits, {cache.misses} misses")
+
+def benchmark_schedule_range(size=30, days=14, max_workers=4):
+    print("Multi-day range: windows solved one by one vs in a process pool")
+    for workers in (0, max_workers):
+        calendar = Calendar()
+        for offset in range(days):
+            # A different seed every day, so no window is a solution cache hit
+            generate_day(size, offset, BENCHMARK_DAY + timedelta(days=offset), first_hour=8, last_hour=14, max_slack_hours=1, calendar=calendar, prefix=f"Day {offset} event")
+
+        start = time.perf_counter()
+        first_result = None
+        statuses = []
+        for _, result in calendar.generate_schedule_range(BENCHMARK_DAY, BENCHMARK_DAY + timedelta(days=days), SolverOptions(max_workers=workers)):
+            if first_result is None:
+                first_result = time.perf_counter() - start
+            statuses.append(result.status)
+        elapsed = time.perf_counter() - start
+        print(f"  {days} days of {size} events, {workers} workers: {len(statuses)} windows, {statuses.count('solved')} solved, first after {first_result:.3f}s ({elapsed:.3f}s)")
+
+def benchmark_async_calendar(size=60, days=7, tick=0.01):
+    print("Async calendar: event loop lag while a week is solved")
+    options = SolverOptions(domain_model="bitset")
+
+    async def run(blocking: bool):
+        calendar = Calendar()
+        for offset in range(days):
+            generate_day(size, offset, BENCHMARK_DAY + timedelta(days=offset), calendar=calendar, prefix=f"Day {offset} event")
+        cal = AsyncCalendar(calendar)
+        lags = []
+
+        async def ticker():
+            # Each tick stands in for a redraw, lag is how late it ran
+            while True:
+                expected = time.perf_counter() + tick
+                await asyncio.sleep(tick)
+                lags.append(time.perf_counter() - expected)
+                await cal.get_events(TimeInterval(BENCHMARK_DAY, BENCHMARK_DAY + timedelta(hours=23)))
+
+        ticking = asyncio.create_task(ticker())
+        await asyncio.sleep(tick)
+        start = time.perf_counter()
+        for offset in range(days):
+            day = BENCHMARK_DAY + timedelta(days=offset)
+            if blocking:
+                calendar.generate_schedule(day, options)
+            else:
+                await cal.generate_schedule(day, options)
+        elapsed = time.perf_counter() - start
+        # Lets a tick held up by the last solve report its lag
+        await asyncio.sleep(2 * tick)
+        ticking.cancel()
+        cal.close()
+        return elapsed, lags
+
+    for blocking in (True, False):
+        elapsed, lags = asyncio.run(run(blocking))
+        name = "on the loop" if blocking else "executor"
+        print(f"  {name}: {elapsed:.3f}s, {len(lags)} ticks, worst lag {max(lags, default=0) * 1000:.1f}ms")
+
+def benchmark_calendar_host(users=16, size=40, shard_counts=(1, 2, 4)):
+    print(f"Calendar host: {users} users each solving a day of {size} events ({os.cpu_count()} cores)")
+    options = SolverOptions(domain_model="bitset")
+    day = TimeInterval(BENCHMARK_DAY, BENCHMARK_DAY + timedelta(hours=23, minutes=59))
+    user_events = {f"user-{i}": generate_day(size, i).get_events(day) for i in range(users)}
+
+    for shards in shard_counts:
+        with tempfile.TemporaryDirectory() as directory, CalendarHost(directory, shards=shards) as host:
+            for user, events in user_events.items():
+                for event in events:
+                    host.submit(user, "schedule_event", event.get_task(), event._goal_value, event._routine_value, event._personal_value, event._relational_value)
+            host.stats()
+
+            start = time.perf_counter()
+            futures = [host.submit(user, "generate_schedule", BENCHMARK_DAY, options) for user in user_events]
+            solved = sum(1 for future in futures if future.result())
+            elapsed = time.perf_counter() - start
+            print(f"  {shards} shards: {elapsed:.3f}s, {users / elapsed:.1f} schedules/s, {solved} solved")
+
+def benchmark_free_busy(people=(2, 4, 16), size=6, days=5, repeats=20):
+    print(f"Free/busy: common free half hours in one day across calendars of {size} events a day")
+    window = TimeInterval(BENCHMARK_DAY + timedelta(hours=8), BENCHMARK_DAY + timedelta(hours=18))
+    for k in people:
+        calendars = []
+        for person in range(k):
+            calendar = Calendar()
+            for offset in range(days):
+                generate_day(size, person * days + offset, BENCHMARK_DAY + timedelta(days=offset), first_hour=6, last_hour=20, max_slack_hours=1, calendar=calendar)
+            calendars.append(calendar)
+
+        def naive():
+            # Every busy slot of every calendar, sorted together, then the gaps between them
+            slots = sorted(event.get_time_slot() for calendar in calendars for event in calendar.get_events(window) if event.get_time_slot().is_overlapping(window))
+            free, free_start = [], window.start_date
+            for slot in slots:
+                if slot.start_date - free_start >= timedelta(minutes=30):
+                    free.append(TimeInterval(free_start, slot.start_date))
+                free_start = max(free_start, slot.end_date)
+            if window.end_date - free_start >= timedelta(minutes=30):
+                free.append(TimeInterval(free_start, window.end_date))
+            return free
+
+        for name, function in (("naive", naive), ("k-way merge", lambda: free_slots(calendars, window, timedelta(minutes=30)))):
+            start = time.perf_counter()
+            for _ in range(repeats):
+                found = function()
+            print(f"  {k} calendars, {name}: {(time.perf_counter() - start) / repeats * 1000:.3f}ms, {len(found)} free slots")
+
+def benchmark_join(sizes=(20, 80, 320), days=7, repeats=5):
+    print("Interval join: conflicts between two calendars over a week")
+    for size in sizes:
+        first, second = Calendar(), Calendar()
+        for offset in range(days):
+            day = BENCHMARK_DAY + timedelta(days=offset)
+            generate_day(size, offset, day, calendar=first, prefix="Home")
+            generate_day(size, days + offset, day, calendar=second, prefix="Work")
+        window = TimeInterval(BENCHMARK_DAY, BENCHMARK_DAY + timedelta(days=days))
+
+        def nested():
+            # One overlap search of the second tree per busy slot of the first
+            pairs = set()
+            for slot, event in first._time_tree.iter_busy(window):
+                for found in second._time_tree.overlap_search(slot) or []:
+                    other = found["event"]
+                    if other.get_time_slot().is_overlapping(slot) and other.get_time_slot().is_overlapping(window):
+                        pairs.add((event, other))
+            return pairs
+
+        for name, function in (("nested", nested), ("join", lambda: set(first._time_tree.join(second._time_tree, window)))):
+            start = time.perf_counter()
+            for _ in range(repeats):
+                pairs = function()
+            print(f"  {size} events a day, {name}: {(time.perf_counter() - start) / repeats * 1000:.3f}ms, {len(pairs)} conflicts")
+
+if __name__ == "__main__":
+    benchmark_arc_consistency()
+    benchmark_search_heuristics()
+    benchmark_decomposition()
+    benchmark_portfolio()
+    benchmark_domain_models()
+    benchmark_optimize()
+    benchmark_local_search()
+    benchmark_incremental()
+    benchmark_solution_cache()
+    benchmark_no_overlap()
+    benchmark_instrumentation()
+    benchmark_trace()
+    benchmark_view_cache()
+    benchmark_schedule_range()
+    benchmark_async_calendar()
+    benchmark_calendar_host()
+    benchmark_free_busy()
+    benchmark_join()
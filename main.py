@@ -4,6 +4,8 @@ import math
 from typing import Optional, List, Dict, Tuple
 from collections import defaultdict
 from datetime import date, datetime, timedelta
+from models.calendar import Calendar
+from models.view_cache import ViewCache
 
 ascii_title = """
  _    _________________ 
@@ -57,7 +59,7 @@ def print_menu_window(stdscr, menu_options, selected_option_index, menu_row_sect
 
     menu_pad.refresh(0, 0, 0, 0, height-1, width-1)
 
-def run_menu_window(stdscr, menu_options, row_sections, x_padding, y_padding):
+def run_menu_window(stdscr, menu_options, row_sections, x_padding, y_padding, view_cache: ViewCache):
     selected_option_index = 0
     menu_row_sections = row_sections["menu"]
 
@@ -78,7 +80,7 @@ def run_menu_window(stdscr, menu_options, row_sections, x_padding, y_padding):
         elif key in [curses.KEY_ENTER, 10, 13]:  # Enter
             selected_option = menu_options[selected_option_index]
             if selected_option == "View Schedule":
-                run_schedule_window(stdscr, row_sections, x_padding, y_padding)
+                run_schedule_window(stdscr, row_sections, x_padding, y_padding, view_cache, date.today())
             elif selected_option == "Preferences":
                 run_preferences_window()
             elif selected_option == "Chat":
@@ -90,10 +92,11 @@ def run_menu_window(stdscr, menu_options, row_sections, x_padding, y_padding):
 
 
 
-def run_schedule_window(stdscr, row_sections, x_padding, y_padding):
-    schedule_row_sections = row_sections["schedule"]
+def run_schedule_window(stdscr, row_sections, x_padding, y_padding, view_cache: ViewCache, day: date):
+    # Cached views make paging between days a lookup, the cache prefetches the neighbors of each one
+    day_events = view_cache.get("day", day)
 
-    print_schedule_window(stdscr, schedule_row_sections, x_padding, y_padding)
+    print_schedule_window(stdscr, x_padding, y_padding, day_events)
 
 def print_day_title(title_win, day_events):
     height, width = title_win.getmaxyx()
@@ -126,10 +129,9 @@ def print_schedule_window(stdscr, x_padding, y_padding, day_events):
     hours_win_width = (width * 2) / 3
     todo_win_width = width / 3
 
-    # example day_events data structure where: 
+    # day_events is a ViewCache day view where:
     #   date is the selected view date,
     #   events is the list of events in chronological order
-    day_events = None
 
     title_win = schedule_pad.derwin(2, hours_win_width, 1, 1)
     hours_win = schedule_pad.derwin(height-4, hours_win_width, 3, 1)
@@ -210,9 +212,14 @@ def main(stdscr):
         }
     }
 
-    run_menu_window(stdscr, menu_options, row_sections, x_padding, y_padding)
+    # One cache for the whole session, so views stay cached between visits to the schedule
+    calendar = Calendar()
+    view_cache = ViewCache(calendar)
+
+    run_menu_window(stdscr, menu_options, row_sections, x_padding, y_padding, view_cache)
 
     stdscr.getch()
+    view_cache.close()
 
 
 if __name__ == "__main__":
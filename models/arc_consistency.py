@@ -0,0 +1,134 @@
+from typing import List, Dict, Set, Callable, Optional
+from collections import deque
+from dataclasses import dataclass
+from models.time_interval import TimeInterval
+from models.event import Event
+from models.compatibility_tables import CompatibilityTables
+from models.start_time_bitsets import iter_bits, popcount
+
+CHECK_INTERVAL = 64
+
+@dataclass
+class ArcConsistency:
+    """Bitwise arc consistency over a CSP's interval domains.
+
+    The surviving values of each event are a bitset over its original domain indices, so
+    a value keeps its support in a neighbor while its compatibility row, precomputed in
+    CompatibilityTables, still intersects the neighbor's bitset. As in AC-2001 each value
+    remembers the last support it found in each neighbor, and while that one survives the
+    row is not scanned again.
+    """
+    events: List[Event]
+    values: List[List[TimeInterval]]
+    neighbors: List[List[int]]
+    alive: List[int]
+    tables: CompatibilityTables
+    arcs_revised: int
+    revisions: int
+
+    def __init__(self, domains: Dict[Event, List[TimeInterval]], tables: CompatibilityTables, check: Optional[Callable] = None):
+        self.tables = tables
+        # Called every CHECK_INTERVAL revisions, may raise to abandon the propagation
+        self._check = check
+        self.events = tables.events
+        self._domains = domains
+        # Bits follow the tables' value indices, so domains may have shrunk since the tables were built
+        self.values = tables.values
+        self.alive = [
+            sum(1 << tables.value_index[i][value] for value in domains[event]) if event in domains else 0
+            for i, event in enumerate(self.events)
+        ]
+        # Events of the tables outside domains, e.g. those of other components, are left alone
+        self.neighbors = [neighbors if event in domains else [] for event, neighbors in zip(self.events, tables.neighbors)]
+        # _residues[(i, j)][a] is the index of the last support of value a of i found in j, -1 before one is
+        self._residues = {}
+        # Arcs taken off the worklist, and the revisions among them that removed values
+        self.arcs_revised = 0
+        self.revisions = 0
+
+    def _revise(self, i: int, j: int):
+        """Removes every value of i without a support in j, returns the number removed."""
+        rows = self.tables.rows[(i, j)]
+        residues = self._residues.get((i, j))
+        if residues is None:
+            residues = self._residues[(i, j)] = [-1] * len(rows)
+        alive_j = self.alive[j]
+        unsupported = 0
+        for a in iter_bits(self.alive[i]):
+            residue = residues[a]
+            if residue >= 0 and alive_j >> residue & 1:
+                continue
+            supported = rows[a] & alive_j
+            if supported:
+                residues[a] = (supported & -supported).bit_length() - 1
+            else:
+                unsupported |= 1 << a
+
+        if unsupported:
+            self.alive[i] &= ~unsupported
+        return popcount(unsupported)
+
+    def propagate(self):
+        """Runs propagation to a fixpoint, returns the number of values removed."""
+        worklist = deque()
+        queued = set()
+        for i, neighbors in enumerate(self.neighbors):
+            for j in neighbors:
+                worklist.append((i, j))
+                queued.add((i, j))
+
+        removed = 0
+        while worklist:
+            self.arcs_revised += 1
+            if (self._check is not None and self.arcs_revised % CHECK_INTERVAL == 0):
+                self._check()
+            arc = worklist.popleft()
+            queued.discard(arc)
+            i, j = arc
+
+            revised = self._revise(i, j)
+            if not revised:
+                continue
+            removed += revised
+            self.revisions += 1
+
+            for k in self.neighbors[i]:
+                if k != j and (k, i) not in queued:
+                    worklist.append((k, i))
+                    queued.add((k, i))
+
+        return removed
+
+    def build_constraints(self) -> Dict[Event, Dict[Event, Dict[TimeInterval, Set[TimeInterval]]]]:
+        """Builds the CSP support table (node -> neighbor -> value -> supports) over the surviving values."""
+        constraints = {event: {} for event in self.events if event in self._domains}
+
+        for i, neighbors in enumerate(self.neighbors):
+            if (self._check is not None):
+                self._check()
+            if self.events[i] not in constraints:
+                continue
+            node_constraints = constraints[self.events[i]]
+            values_i = self.values[i]
+
+            for j in neighbors:
+                rows = self.tables.rows[(i, j)]
+                values_j = self.values[j]
+                alive_j = self.alive[j]
+
+                supports = {}
+                for a in iter_bits(self.alive[i]):
+                    supported = rows[a] & alive_j
+                    if supported:
+                        supports[values_i[a]] = {values_j[b] for b in iter_bits(supported)}
+                node_constraints[self.events[j]] = supports
+
+        return constraints
+
+    def prune_domains(self):
+        """Trims the CSP's domain lists in place to the surviving values."""
+        for i, event in enumerate(self.events):
+            if event not in self._domains:
+                continue
+            alive = self.alive[i]
+            self._domains[event][:] = [value for a, value in enumerate(self.values[i]) if alive >> a & 1]
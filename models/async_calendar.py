@@ -0,0 +1,124 @@
+from typing import List, Optional, Iterable, Tuple, AsyncIterator, Callable
+from concurrent.futures import Executor, ThreadPoolExecutor
+from datetime import datetime
+from dataclasses import dataclass
+import asyncio
+import functools
+from models.task import Task
+from models.time_interval import TimeInterval
+from models.event import Event
+from models.calendar import Calendar
+from models.schedule import Schedule
+from models.solve_result import SolveResult
+from models.solver_options import SolverOptions
+from models.cancellation_token import CancellationToken
+
+_DONE = object()
+
+@dataclass
+class AsyncCalendar:
+    """asyncio facade over a Calendar for front ends that must not block.
+
+    Queries run on the event loop, while edits and solves run on executor, one at a time by
+    default. Edits wait for a running solve, since it works on the calendar's kept day CSPs,
+    but queries only wait for edits. Cancelling a task awaiting a solve cancels the solve
+    through its CancellationToken, and the task finishes once the solver has stopped.
+    """
+    calendar: Calendar
+
+    def __init__(self, calendar: Optional[Calendar] = None, executor: Optional[Executor] = None):
+        self.calendar = calendar if calendar is not None else Calendar()
+        self._owns_executor = executor is None
+        self._executor = executor if executor is not None else ThreadPoolExecutor(max_workers=1, thread_name_prefix="calendar")
+        # Edits take both locks, solves only the solve lock and queries only the edit lock
+        self._solve_lock = asyncio.Lock()
+        self._edit_lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._owns_executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def get_events(self, interval: TimeInterval) -> List[Event]:
+        async with self._edit_lock:
+            return self.calendar.get_events(interval)
+
+    async def peek_schedule(self, date: datetime) -> Optional[Schedule]:
+        return self.calendar.peek_schedule(date)
+
+    async def schedule_event(self, task: Task, goal_value: float, routine_value: float, personal_value: float, relational_value: float):
+        async with self._solve_lock, self._edit_lock:
+            await self._call(self.calendar.schedule_event, task, goal_value, routine_value, personal_value, relational_value)
+
+    async def schedule_events(self, events: Iterable[Tuple[Task, float, float, float, float]], cancel_token: Optional[CancellationToken] = None) -> int:
+        """Schedules every (task, goal, routine, personal, relational) tuple, returns how many were added.
+
+        Cancelling stops between two events, keeping those already added.
+        """
+        token = cancel_token if cancel_token is not None else CancellationToken()
+
+        def insert_all():
+            count = 0
+            for values in events:
+                if token.is_set():
+                    break
+                self.calendar.schedule_event(*values)
+                count += 1
+            return count
+
+        async with self._solve_lock, self._edit_lock:
+            return await self._call(insert_all, token=token)
+
+    async def remove_event(self, event: Event):
+        async with self._solve_lock, self._edit_lock:
+            await self._call(self.calendar.remove_event, event)
+
+    async def generate_schedule(self, date: datetime, options: Optional[SolverOptions] = None, portfolio: Optional[List[SolverOptions]] = None, optimize: bool = False, time_limit: Optional[float] = None, cancel_token: Optional[CancellationToken] = None) -> SolveResult:
+        token = cancel_token if cancel_token is not None else CancellationToken()
+        async with self._solve_lock:
+            return await self._call(self.calendar.generate_schedule, date, options, portfolio, optimize, time_limit, token, token=token)
+
+    async def get_schedule(self, date: datetime, options: Optional[SolverOptions] = None, cancel_token: Optional[CancellationToken] = None) -> Schedule:
+        # A materialized schedule is read on the loop, only a missing one is solved
+        schedule = self.calendar.peek_schedule(date)
+        if schedule is not None:
+            return schedule
+        token = cancel_token if cancel_token is not None else CancellationToken()
+        async with self._solve_lock:
+            return await self._call(self.calendar.get_schedule, date, options, token, token=token)
+
+    async def generate_schedule_range(self, start: datetime, end: datetime, options: Optional[SolverOptions] = None, cancel_token: Optional[CancellationToken] = None) -> AsyncIterator[Tuple[TimeInterval, SolveResult]]:
+        """Yields (window, result) like Calendar.generate_schedule_range, each window solved on the executor."""
+        token = cancel_token if cancel_token is not None else CancellationToken()
+        async with self._solve_lock:
+            results = self.calendar.generate_schedule_range(start, end, options, token)
+            try:
+                while True:
+                    item = await self._call(next, results, _DONE, token=token)
+                    if item is _DONE:
+                        return
+                    yield item
+            finally:
+                # Also runs when the caller stops iterating early, which stops the solves still running
+                token.cancel()
+                await self._call(results.close)
+
+    async def _call(self, function: Callable, *args, token: Optional[CancellationToken] = None):
+        future = asyncio.get_running_loop().run_in_executor(self._executor, functools.partial(function, *args))
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if token is not None:
+                token.cancel()
+            # The locks stay held until the executor is done with the calendar, however often the task is cancelled
+            while not future.done():
+                try:
+                    await asyncio.shield(future)
+                except (asyncio.CancelledError, Exception):
+                    pass
+            raise
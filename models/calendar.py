@@ -1,44 +1,96 @@
-from typing import List
+from typing import List, Dict, Optional, Iterator, Tuple, Callable
 from collections import defaultdict
 from datetime import date, datetime 
 import bisect
+import time
+import threading
+from concurrent.futures import FIRST_COMPLETED, wait
 from dataclasses import dataclass
 from models.task import Task
 from models.time_interval import TimeInterval
 from models.temporal_task import TemporalTask
-from models.csp import CSP
+from models.csp import CSP, POOL_POLL_INTERVAL
+from models.component_problem import ComponentProblem, solve_component_problem
+from models.worker_pools import pools
+from models.solve_result import SolveResult, SOLVED, INFEASIBLE, TIMEOUT, CANCELLED
+from models.cancellation_token import CancellationToken
+from models.solver_options import SolverOptions
 from models.event import Event
 from models.time_tree import TimeTree
-import json
-
-filename = "debug.json"
-def write_to_debug_file(string):
-    with open(filename, 'w') as f:
-        json.dump(string, f, indent=4) 
-
-def stringify_objects(obj):
-    if isinstance(obj, dict):
-        return {k: stringify_objects(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [stringify_objects(v) for v in obj]
-    elif isinstance(obj, tuple):
-        return tuple(stringify_objects(v) for v in obj)
-    elif isinstance(obj, (str, int, float, bool)) or obj is None:
-        return obj
-    else:
-        # For any other custom object
-        return str(obj)
+from models.solution_cache import SolutionCache
+from models.solver_stats import SolverStats
+from models.stats_registry import registry
+from models.solver_trace import SolverTrace
+from models.schedule import Schedule
+
+# Kinds of change passed to listeners
+INSERTED = "insert"
+REMOVED = "delete"
+SCHEDULED = "schedule"
+COMPLETED = "complete"
 
 @dataclass
 class Calendar:
     _time_tree: TimeTree
     _todos: List
     _dated_todos: List
+    _day_csps: Dict[datetime, CSP]
+    solution_cache: SolutionCache
+    trace: Optional[SolverTrace]
+    _schedules: Dict[datetime, Schedule]
 
     def __init__(self):
         self._time_tree = TimeTree()
         self._dated_todos = []
         self._todos = []
+        # Last solved CSP of each day, keyed by its midnight, kept up to date by edits for warm starts
+        self._day_csps = {}
+        # Schedules of days already solved, reused for days with the same shape
+        self.solution_cache = SolutionCache()
+        # Solves in this process record their assignments, undos and prunes here when set
+        self.trace = None
+        # Last finished schedule of each day, keyed by its midnight, dropped when an event on that day changes
+        self._schedules = {}
+        self._listeners = []
+        # Held by edits and by readers on other threads, e.g. a ViewCache prefetching, so none sees the tree mid-rotation
+        self.lock = threading.RLock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.RLock()
+
+    def add_listener(self, listener: Callable[[str, Optional[Event], List[TimeInterval]], None]):
+        """Calls listener(kind, event, intervals) after every change, with the intervals the change touches.
+
+        Inserted, removed and completed events come with their schedule windows, a newly stored
+        day schedule with no event and the day's interval.
+        """
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable):
+        self._listeners.remove(listener)
+
+    def _notify(self, kind: str, event: Optional[Event], intervals: List[TimeInterval]):
+        for listener in list(self._listeners):
+            listener(kind, event, intervals)
+
+    def get_events(self, interval: TimeInterval) -> List[Event]:
+        """Temporal events with a schedule window overlapping interval, each listed once."""
+        with self.lock:
+            return list({found["event"]: None for found in self._get_events(interval) or []})
+
+    def iter_busy(self, interval: TimeInterval) -> Iterator[Tuple[TimeInterval, Event]]:
+        """Yields (time slot, event) for the temporal events busy during interval, in start order."""
+        return self._time_tree.iter_busy(interval)
+
+    def peek_schedule(self, date: datetime) -> Optional[Schedule]:
+        """The day's materialized schedule if it has one, without ever solving."""
+        return self._schedules.get(datetime(date.year, date.month, date.day))
 
     def _get_day_events(self, day: date):
         return self._get_events(TimeInterval(datetime(day.year, day.month, day.day), datetime(day.year, day.month, day.day, 23, 59, 59)))
@@ -52,33 +104,277 @@ class Calendar:
     def schedule_event(self, task: Task, goal_value: float, routine_value: float, personal_value: float, relational_value: float):
         new_event = Event(task, goal_value, routine_value, personal_value, relational_value)
         
-        if isinstance(task, TemporalTask):
-            self._time_tree.insert(new_event)
-        elif isinstance(task, Task):
-            if (task._deadline):
-                bisect.insort(self._dated_todos, new_event)
-            else:
-                self._todos.append(task)
+        with self.lock:
+            if isinstance(task, TemporalTask):
+                self._time_tree.insert(new_event)
+                self._insert_into_day_csps(new_event)
+                self._invalidate_schedules(new_event)
+                self._notify(INSERTED, new_event, list(new_event.schedule_intervals))
+            elif isinstance(task, Task):
+                if (task._deadline):
+                    bisect.insort(self._dated_todos, new_event)
+                else:
+                    self._todos.append(task)
     
+    def remove_event(self, event: Event):
+        if (not isinstance(event.get_task(), TemporalTask)):
+            raise ValueError("Only events with TemporalTask tasks can be removed")
+        with self.lock:
+            self._time_tree.delete(event)
+            for event_csp in self._day_csps.values():
+                if event in event_csp.domains:
+                    event_csp.remove_event(event)
+            self._invalidate_schedules(event)
+            self._notify(REMOVED, event, list(event.schedule_intervals))
+
+    def complete_event(self, event: Event):
+        if (not isinstance(event.get_task(), TemporalTask)):
+            raise ValueError("Only events with TemporalTask tasks can be completed")
+        # The calendar's own instance is completed, event may be a copy of it, e.g. one sent to a CalendarHost
+        with self.lock:
+            own = next((found for found in self.get_events(event.get_time_slot()) if found == event), None)
+            if own is None:
+                raise ValueError("Event is not in the calendar")
+            if own.get_task().get_completion_status():
+                return
+            own.get_task().set_completed()
+            self._notify(COMPLETED, own, list(own.schedule_intervals))
+
+    def _invalidate_schedules(self, event: Event):
+        for day_start in list(self._schedules):
+            day_interval = self._get_day_interval(day_start)
+            if any(interval.is_overlapping(day_interval) for interval in event.schedule_intervals):
+                del self._schedules[day_start]
+
+    def _get_day_interval(self, day_start: datetime):
+        return TimeInterval(day_start, datetime(day_start.year, day_start.month, day_start.day, 23, 59, 59))
+
+    def _insert_into_day_csps(self, event: Event):
+        for day_start, event_csp in self._day_csps.items():
+            day_interval = self._get_day_interval(day_start)
+            neighbors = []
+            for interval in event.schedule_intervals:
+                if not interval.is_overlapping(day_interval):
+                    continue
+                for found in self._time_tree.overlap_search(interval):
+                    if found["event"] is not event and found["time"].is_overlapping(day_interval) and found["event"] not in neighbors:
+                        neighbors.append(found["event"])
+            if not neighbors:
+                continue
+
+            # Events without arcs are left out of a day's CSP, so a newly overlapped one joins it first
+            for neighbor in neighbors:
+                if neighbor not in event_csp.domains:
+                    event_csp.insert_event(neighbor, neighbor.schedule_intervals)
+            event_csp.insert_event(event, event.schedule_intervals, neighbors)
+
     def _get_events(self, TimeInterval: TimeInterval):
         return self._time_tree.overlap_search(TimeInterval)
     
-    def generate_schedule(self, date: datetime):
-        domains = defaultdict(set)
+    def get_schedule(self, date: datetime, options: Optional[SolverOptions] = None, cancel_token: Optional[CancellationToken] = None) -> Schedule:
+        """Returns the day's materialized schedule, solving the day with options only when it has none."""
+        date_start = datetime(date.year, date.month, date.day)
+        schedule = self._schedules.get(date_start)
+        if schedule is None:
+            result, event_csp = self._solve_day(date_start, options, None, False, None, cancel_token)
+            schedule = self._build_schedule(date_start, event_csp, result)
+            # Unfinished solves are not kept, so the next read tries again
+            if result.status in (SOLVED, INFEASIBLE):
+                self._store_schedule(date_start, schedule)
+        return schedule
 
+    def generate_schedule(self, date: datetime, options: Optional[SolverOptions] = None, portfolio: Optional[List[SolverOptions]] = None, optimize: bool = False, time_limit: Optional[float] = None, cancel_token: Optional[CancellationToken] = None) -> SolveResult:
         date_start = datetime(date.year, date.month, date.day)
-        date_end = datetime(date.year, date.month, date.day, 23, 59, 59)
-        date_time_interval = TimeInterval(date_start, date_end)
-        
+        result, event_csp = self._solve_day(date_start, options, portfolio, optimize, time_limit, cancel_token)
+        if result.status in (SOLVED, INFEASIBLE):
+            self._store_schedule(date_start, self._build_schedule(date_start, event_csp, result))
+        return result
+
+    def _store_schedule(self, date_start: datetime, schedule: Schedule):
+        with self.lock:
+            self._schedules[date_start] = schedule
+            self._notify(SCHEDULED, None, [schedule.day])
+
+    def _build_schedule(self, date_start: datetime, event_csp: CSP, result: SolveResult):
+        # Events are placed on the day they start on, so one crossing midnight shows up once
+        day_interval = self._get_day_interval(date_start)
+        events = {found["event"] for found in self._get_events(day_interval) or []}
+
+        assignments = {}
+        unscheduled = []
+        for event in events | set(event_csp.domains):
+            # Events overlapping no other event stay where they were put
+            interval = result.assignments.get(event) if event in event_csp.domains else event.get_time_slot()
+            if interval is None:
+                unscheduled.append(event)
+            elif day_interval.start_date <= interval.start_date <= day_interval.end_date:
+                assignments[event] = interval
+        return Schedule(day_interval, result.status, assignments, unscheduled)
+
+    def _solve_day(self, date_start: datetime, options: Optional[SolverOptions], portfolio: Optional[List[SolverOptions]], optimize: bool, time_limit: Optional[float], cancel_token: Optional[CancellationToken]) -> Tuple[SolveResult, CSP]:
+        event_csp = self._day_csps.get(date_start)
+        if (event_csp is not None and not optimize and not portfolio and (options is None or options == event_csp.options)):
+            # Edits since the last solve were applied to the kept CSP, so only they are searched again
+            event_csp.trace = self.trace
+            return event_csp.resolve(cancel_token), event_csp
+
+        domains = defaultdict(set)
+        date_time_interval = self._get_day_interval(date_start)
+        stats = SolverStats() if options is not None and options.instrument else None
+
+        started = time.perf_counter()
         arcs = self._time_tree.sweepline_overlap_search(date_time_interval)
+        if stats is not None:
+            stats.add_time("sweepline", time.perf_counter() - started)
+            # Arcs come in both directions
+            stats.overlaps = len(arcs) // 2
 
+        # Copies, since arc consistency prunes domains in place and the tree is keyed by schedule_intervals
         for event, neighbor in arcs.keys():
             if event not in domains:
-                domains[event] = event.schedule_intervals
+                domains[event] = list(event.schedule_intervals)
             if neighbor not in domains:
-                domains[neighbor] = neighbor.schedule_intervals
+                domains[neighbor] = list(neighbor.schedule_intervals)
+
+        event_csp = CSP(domains, arcs, options)
+        event_csp.trace = self.trace
+
+        if optimize:
+            # Drops the lowest priority events when the day can not hold them all
+            started = time.perf_counter()
+            event_csp.cancel_event = cancel_token
+            event_csp.optimize(time_limit)
+            if event_csp.proved_optimal:
+                status = SOLVED
+            else:
+                status = CANCELLED if cancel_token is not None and cancel_token.is_set() else TIMEOUT
+            return self._with_stats(SolveResult(status, event_csp.assignments, event_csp.nodes_expanded, time.perf_counter() - started), stats), event_csp
+        if portfolio:
+            return self._with_stats(event_csp.solve_portfolio(portfolio, cancel_token), stats), event_csp
+
+        started = time.perf_counter()
+        fingerprint, ordered_events = self.solution_cache.fingerprint(date_start, domains, arcs, event_csp.options)
+        cached = self.solution_cache.get(fingerprint, ordered_events, date_start)
+        if stats is not None:
+            stats.add_time("cache", time.perf_counter() - started)
+        if cached is not None:
+            status, assignments = cached
+            # Kept as the day's last schedule, so later edits still warm start from it
+            event_csp.assignments = dict(assignments)
+            self._day_csps[date_start] = event_csp
+            return self._with_stats(SolveResult(status, assignments, 0, time.perf_counter() - started), stats), event_csp
+
+        result = event_csp.solve(cancel_token)
+        self._day_csps[date_start] = event_csp
+        if result.status in (SOLVED, INFEASIBLE):
+            self.solution_cache.put(fingerprint, ordered_events, date_start, result.status, result.assignments if result else {})
+        return self._with_stats(result, stats), event_csp
+
+    def _with_stats(self, result: SolveResult, stats: Optional[SolverStats]):
+        # A solve records its own stats, which take in the calendar's phases, other results only have the calendar's
+        if stats is None:
+            return result
+        if result.stats is None:
+            result.stats = stats
+            registry.record(stats)
+        else:
+            result.stats.merge(stats)
+        return result
+
+    def generate_schedule_range(self, start: datetime, end: datetime, options: Optional[SolverOptions] = None, cancel_token: Optional[CancellationToken] = None) -> Iterator[Tuple[TimeInterval, SolveResult]]:
+        """Solves every independent window of events between start and end, yielding (window, result) as each finishes.
+
+        Windows are the connected components of overlapping events, so an event whose domain
+        crosses midnight is solved together with the events on both days it overlaps. An event
+        overlapping no other is a window of its own, solved by keeping its time slot. With
+        options.max_workers above 1 windows are solved in a process pool, otherwise in order.
+        """
+        if (end < start):
+            raise ValueError("end must not be before start")
+        options = options if options is not None else SolverOptions()
+
+        arcs = self._time_tree.sweepline_overlap_search(TimeInterval(start, end))
+        pending = []
+        for events in self._partition(arcs, self.get_events(TimeInterval(start, end))):
+            domains = {event: list(event.schedule_intervals) for event in events}
+            window = TimeInterval(
+                min(interval.start_date for intervals in domains.values() for interval in intervals),
+                max(interval.end_date for intervals in domains.values() for interval in intervals)
+            )
+            if len(events) == 1:
+                # Nothing competes for its windows, so it stays where it was put, as in _build_schedule
+                yield window, SolveResult(SOLVED, {events[0]: events[0].get_time_slot()})
+                continue
+            window_arcs = {(event, neighbor): overlaps for (event, neighbor), overlaps in arcs.items() if event in domains}
+            midnight = datetime(window.start_date.year, window.start_date.month, window.start_date.day)
+
+            fingerprint, ordered_events = self.solution_cache.fingerprint(midnight, domains, window_arcs, options)
+            cached = self.solution_cache.get(fingerprint, ordered_events, midnight)
+            if cached is not None:
+                yield window, SolveResult(cached[0], cached[1])
+                continue
+            event_csp = CSP(domains, window_arcs, options)
+            event_csp.trace = self.trace
+            pending.append((window, midnight, fingerprint, ordered_events, event_csp))
+
+        if options.max_workers > 1 and len(pending) > 1:
+            solved = self._solve_windows_in_pool(pending, options, cancel_token)
+        else:
+            solved = ((window, midnight, fingerprint, ordered_events, event_csp.solve(cancel_token)) for window, midnight, fingerprint, ordered_events, event_csp in pending)
+
+        for window, midnight, fingerprint, ordered_events, result in solved:
+            if result.status in (SOLVED, INFEASIBLE):
+                self.solution_cache.put(fingerprint, ordered_events, midnight, result.status, result.assignments if result else {})
+            yield window, result
+
+    def _partition(self, arcs, events: List[Event]):
+        # Connected components of the overlap graph over events, in order of their earliest window
+        neighbors = {event: [] for event in events}
+        for event, neighbor in arcs.keys():
+            neighbors[event].append(neighbor)
+
+        seen = set()
+        partitions = []
+        for event in neighbors:
+            if event in seen:
+                continue
+            seen.add(event)
+            component = [event]
+            stack = [event]
+            while stack:
+                for neighbor in neighbors[stack.pop()]:
+                    if neighbor not in seen:
+                        seen.add(neighbor)
+                        component.append(neighbor)
+                        stack.append(neighbor)
+            partitions.append(component)
+
+        partitions.sort(key=lambda component: min(interval.start_date for event in component for interval in event.schedule_intervals))
+        return partitions
 
-        event_csp = CSP(domains, arcs)
-        constraints = event_csp._AC3()
+    def _solve_windows_in_pool(self, pending, options: SolverOptions, cancel_token: Optional[CancellationToken]):
+        cancel_event = pools.new_cancel_event()
+        executor = pools.get(options.max_workers)
+        futures = {}
+        try:
+            for entry in pending:
+                events = entry[3]
+                problem = ComponentProblem.encode(entry[4], events)
+                futures[executor.submit(solve_component_problem, problem, None, cancel_event)] = (entry, problem, time.perf_counter())
 
-        event_csp.solve()
\ No newline at end of file
+            while futures:
+                done, _ = wait(futures, timeout=POOL_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                if (cancel_token is not None and cancel_token.is_set()):
+                    cancel_event.set()
+                for future in done:
+                    (window, midnight, fingerprint, events, _), problem, submitted = futures.pop(future)
+                    status, assignments, nodes_expanded, stats = future.result()
+                    decoded = {event: problem.decode_interval(interval) for event, interval in zip(events, assignments) if interval is not None}
+                    if stats is not None:
+                        registry.record(stats)
+                    yield window, midnight, fingerprint, events, SolveResult(status, decoded, nodes_expanded, time.perf_counter() - submitted, stats)
+        finally:
+            # Also stops the workers when the caller stops reading results early, the pool outlives this range
+            cancel_event.set()
+            for future in futures:
+                future.cancel()
@@ -0,0 +1,159 @@
+from typing import Dict, List, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from urllib.parse import quote
+import multiprocessing
+import os
+import pickle
+import time
+import zlib
+from models.calendar import Calendar
+
+# Calendar methods a host forwards, the rest of Calendar stays inside the shards
+METHODS = ("schedule_event", "remove_event", "complete_event", "get_events", "peek_schedule", "get_schedule", "generate_schedule")
+
+@dataclass
+class CalendarHost:
+    """Keeps many users' calendars spread over shards worker processes, one process per calendar.
+
+    A user belongs to shard crc32(user_id) % shards, and requests reach it over a pipe, so
+    requests for users of different shards run in parallel while those of one shard run in
+    order. A calendar unused for idle_timeout seconds is written to a pickle snapshot in
+    snapshot_dir and dropped, to be loaded again by its user's next request. Arguments and
+    results are copied across the pipe, so events passed back in compare equal to the
+    calendar's own rather than being them.
+    """
+    snapshot_dir: str
+    shards: int
+    idle_timeout: float
+
+    def __init__(self, snapshot_dir: str, shards: Optional[int] = None, idle_timeout: float = 300.0):
+        shards = shards if shards is not None else os.cpu_count() or 1
+        if shards <= 0:
+            raise ValueError("shards must be positive")
+        if idle_timeout <= 0:
+            raise ValueError("idle_timeout must be positive")
+        os.makedirs(snapshot_dir, exist_ok=True)
+        self.snapshot_dir = snapshot_dir
+        self.shards = shards
+        self.idle_timeout = idle_timeout
+
+        self._connections = []
+        self._processes = []
+        # One thread per shard sends its requests and waits for the replies, one at a time
+        self._senders = []
+        for shard in range(shards):
+            connection, worker_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_serve, args=(worker_connection, snapshot_dir, idle_timeout), name=f"calendar-shard-{shard}", daemon=True)
+            process.start()
+            worker_connection.close()
+            self._connections.append(connection)
+            self._processes.append(process)
+            self._senders.append(ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"calendar-shard-{shard}"))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def shard_of(self, user_id: str) -> int:
+        return zlib.crc32(user_id.encode()) % self.shards
+
+    def submit(self, user_id: str, method: str, *args) -> Future:
+        """Runs the Calendar method on the user's calendar, returning a future of its result."""
+        if method not in METHODS:
+            raise ValueError(f"method must be one of {METHODS}")
+        return self._send(self.shard_of(user_id), ("call", user_id, method, args))
+
+    def call(self, user_id: str, method: str, *args):
+        """Runs the Calendar method on the user's calendar and returns its result."""
+        return self.submit(user_id, method, *args).result()
+
+    def evict(self, user_id: str) -> bool:
+        """Snapshots and drops the user's calendar now, returning whether it was loaded."""
+        return self._send(self.shard_of(user_id), ("evict", user_id, None, ())).result()
+
+    def stats(self) -> List[Dict]:
+        """Per shard counts of loaded calendars, requests, loads from snapshots and evictions."""
+        return [future.result() for future in [self._send(shard, ("stats", None, None, ())) for shard in range(self.shards)]]
+
+    def close(self):
+        """Snapshots every loaded calendar and stops the shards."""
+        if not self._processes:
+            return
+        for shard in range(self.shards):
+            self._send(shard, ("close", None, None, ())).result()
+        for sender, process, connection in zip(self._senders, self._processes, self._connections):
+            sender.shutdown()
+            process.join()
+            connection.close()
+        self._processes = []
+
+    def _send(self, shard: int, request) -> Future:
+        return self._senders[shard].submit(self._round_trip, shard, request)
+
+    def _round_trip(self, shard: int, request):
+        connection = self._connections[shard]
+        connection.send(request)
+        ok, value = connection.recv()
+        if not ok:
+            raise value
+        return value
+
+def snapshot_path(snapshot_dir: str, user_id: str) -> str:
+    return os.path.join(snapshot_dir, quote(user_id, safe="") + ".pickle")
+
+def _serve(connection, snapshot_dir: str, idle_timeout: float):
+    # Main loop of a shard process, answering one request at a time
+    calendars = {}
+    last_used = {}
+    counts = {"requests": 0, "loads": 0, "evictions": 0}
+
+    def load(user_id: str) -> Calendar:
+        if user_id not in calendars:
+            path = snapshot_path(snapshot_dir, user_id)
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    calendars[user_id] = pickle.load(f)
+                counts["loads"] += 1
+            else:
+                calendars[user_id] = Calendar()
+        last_used[user_id] = time.monotonic()
+        return calendars[user_id]
+
+    def evict(user_id: str) -> bool:
+        if user_id not in calendars:
+            return False
+        path = snapshot_path(snapshot_dir, user_id)
+        # Written aside and renamed, so a crash never leaves half a snapshot
+        with open(path + ".tmp", "wb") as f:
+            pickle.dump(calendars.pop(user_id), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + ".tmp", path)
+        del last_used[user_id]
+        counts["evictions"] += 1
+        return True
+
+    while True:
+        if connection.poll(min(idle_timeout, 1.0)):
+            kind, user_id, method, args = connection.recv()
+            try:
+                if kind == "call":
+                    counts["requests"] += 1
+                    reply = (True, getattr(load(user_id), method)(*args))
+                elif kind == "evict":
+                    reply = (True, evict(user_id))
+                elif kind == "stats":
+                    reply = (True, dict(counts, loaded=len(calendars)))
+                else:
+                    for loaded in list(calendars):
+                        evict(loaded)
+                    connection.send((True, None))
+                    return
+            except Exception as error:
+                reply = (False, error)
+            connection.send(reply)
+
+        now = time.monotonic()
+        for user_id in [user_id for user_id, used in last_used.items() if now - used >= idle_timeout]:
+            evict(user_id)
@@ -0,0 +1,16 @@
+import threading
+from dataclasses import dataclass
+
+@dataclass
+class CancellationToken:
+    """Flag another thread sets to stop a running solve, which checks it at bounded intervals."""
+    _event: threading.Event
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    def is_set(self):
+        return self._event.is_set()
@@ -0,0 +1,21 @@
+from typing import List, Optional
+from dataclasses import dataclass
+from models.time_interval import TimeInterval
+from models.event import Event
+
+@dataclass
+class Change:
+    """One calendar change as recorded by a ChangeFeed, kind being one of the calendar's change kinds."""
+    sequence: int
+    kind: str
+    event: Optional[Event]
+    intervals: List[TimeInterval]
+
+    def __init__(self, sequence: int, kind: str, event: Optional[Event], intervals: List[TimeInterval]):
+        self.sequence = sequence
+        self.kind = kind
+        self.event = event
+        self.intervals = intervals
+
+    def touches(self, window: TimeInterval) -> bool:
+        return any(interval.is_overlapping(window) for interval in self.intervals)
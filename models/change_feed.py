@@ -0,0 +1,85 @@
+from typing import Iterable, List, Optional
+from collections import deque
+from dataclasses import dataclass
+import threading
+from models.time_interval import TimeInterval
+from models.event import Event
+from models.calendar import Calendar, INSERTED, REMOVED, SCHEDULED, COMPLETED
+from models.change import Change
+from models.subscription import Subscription
+
+KINDS = (INSERTED, REMOVED, SCHEDULED, COMPLETED)
+
+@dataclass
+class ChangeFeed:
+    """Log of a calendar's changes numbered 1, 2, 3, ... which subscribers read at their own pace.
+
+    The last capacity changes are kept, and each subscription only holds the sequence number of
+    the last change it read, so a slow consumer costs nothing until it polls and then gets a
+    batch. A consumer that saved that number can subscribe again from it, as long as the
+    changes after it are still kept.
+    """
+    calendar: Calendar
+    capacity: int
+    sequence: int
+
+    def __init__(self, calendar: Calendar, capacity: int = 4096):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.calendar = calendar
+        self.capacity = capacity
+        # Sequence number of the last change, 0 before the first
+        self.sequence = 0
+        self._log = deque(maxlen=capacity)
+        self._changed = threading.Condition()
+        calendar.add_listener(self._on_change)
+
+    def subscribe(self, kinds: Optional[Iterable[str]] = None, window: Optional[TimeInterval] = None, since: Optional[int] = None, batch_size: int = 64) -> Subscription:
+        """Subscribes to the changes of the given kinds touching window, all of them by default.
+
+        The subscription starts after change since, or after the latest change when since is None.
+        """
+        kinds = frozenset(KINDS if kinds is None else kinds)
+        if not kinds <= set(KINDS):
+            raise ValueError(f"kinds must be among {KINDS}")
+        if batch_size <= 0:
+            raise ValueError("batch_size must be positive")
+        with self._changed:
+            if since is None:
+                since = self.sequence
+            elif since < 0 or since > self.sequence:
+                raise ValueError(f"since must be between 0 and {self.sequence}")
+            elif since < self._oldest() - 1:
+                raise ValueError(f"changes after {since} are no longer kept, the oldest kept is {self._oldest()}")
+            return Subscription(self, kinds, window, since, batch_size)
+
+    def close(self):
+        self.calendar.remove_listener(self._on_change)
+
+    def _oldest(self) -> int:
+        return self._log[0].sequence if self._log else self.sequence + 1
+
+    def _on_change(self, kind: str, event: Optional[Event], intervals: List[TimeInterval]):
+        with self._changed:
+            self.sequence += 1
+            self._log.append(Change(self.sequence, kind, event, intervals))
+            self._changed.notify_all()
+
+    def _read(self, subscription: Subscription, timeout: Optional[float]) -> List[Change]:
+        # Returns the next batch of matching changes after the subscription's position and moves it
+        with self._changed:
+            if timeout != 0:
+                self._changed.wait_for(lambda: self.sequence > subscription.position, timeout)
+            if subscription.position < self._oldest() - 1:
+                raise ValueError(f"changes after {subscription.position} are no longer kept, the oldest kept is {self._oldest()}")
+
+            batch = []
+            # Sequence numbers are consecutive, so the next change is found by offset
+            index = subscription.position + 1 - self._oldest()
+            while index < len(self._log) and len(batch) < subscription.batch_size:
+                change = self._log[index]
+                if subscription.matches(change):
+                    batch.append(change)
+                subscription.position = change.sequence
+                index += 1
+            return batch
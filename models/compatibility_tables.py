@@ -0,0 +1,154 @@
+from typing import List, Dict, Tuple, Callable, Optional, Iterable
+from datetime import datetime, timedelta
+from dataclasses import dataclass
+from models.time_interval import TimeInterval
+from models.event import Event
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+import bisect
+
+MICROSECOND = timedelta(microseconds=1)
+
+def interval_compatible(s1: int, e1: int, d1: int, s2: int, e2: int, d2: int) -> bool:
+    """CSP._time_interval_constraint over integer times: can both events fit in their windows without overlapping."""
+    if (e1 < s2 or e2 < s1):
+        return True
+    if (s2 <= s1 and e1 <= e2):
+        sliding_room = (e1 - s1) - d1
+        return (s1 - s2) + sliding_room >= d2 or (e2 - e1) + sliding_room >= d2
+    if (s1 <= s2 and e2 <= e1):
+        sliding_room = (e2 - s2) - d2
+        return (s2 - s1) + sliding_room >= d1 or (e1 - e2) + sliding_room >= d1
+    return max(e1, e2) - min(s1, s2) >= d1 + d2
+
+@dataclass
+class CompatibilityTables:
+    """Compatibility of every pair of domain values on every arc, computed once up front.
+
+    Each domain is converted to integer microsecond starts, ends and a duration, and each
+    arc (i, j) gets one packed row per value of i whose bit b is set when value b of j is
+    compatible. Rows are built with NumPy broadcasting when it is installed. Events inserted
+    into or removed from a solved CSP are added or dropped in place, a dropped event keeping
+    its index with no neighbors.
+    """
+    events: List[Event]
+    index: Dict[Event, int]
+    values: List[List[TimeInterval]]
+    value_index: List[Dict[TimeInterval, int]]
+    starts: List[List[int]]
+    ends: List[List[int]]
+    durations: List[int]
+    neighbors: List[List[int]]
+    rows: Dict[Tuple[int, int], List[int]]
+
+    def __init__(self, domains: Dict[Event, List[TimeInterval]], arcs, check: Optional[Callable] = None):
+        self.events = list(domains.keys())
+        self.index = {event: i for i, event in enumerate(self.events)}
+        self.values = [list(domains[event]) for event in self.events]
+        self.value_index = [{value: a for a, value in enumerate(values)} for values in self.values]
+
+        self._origin = min((interval.start_date for intervals in domains.values() for interval in intervals), default=datetime.min)
+        self.starts = [[(interval.start_date - self._origin) // MICROSECOND for interval in domains[event]] for event in self.events]
+        self.ends = [[(interval.end_date - self._origin) // MICROSECOND for interval in domains[event]] for event in self.events]
+        self.durations = [event.get_duration() // MICROSECOND for event in self.events]
+
+        # Arcs produced by sweepline_overlap_search are symmetric, so every
+        # arc key is treated as a binary constraint enforced in both directions
+        neighbor_sets = [set() for _ in self.events]
+        for node, neighbor in arcs.keys():
+            i, j = self.index[node], self.index[neighbor]
+            neighbor_sets[i].add(j)
+            neighbor_sets[j].add(i)
+        self.neighbors = [sorted(neighbor_set) for neighbor_set in neighbor_sets]
+
+        self.rows = {}
+        for i, neighbors in enumerate(self.neighbors):
+            # check may raise to abandon the build, e.g. once a solve runs out of time
+            if (check is not None):
+                check()
+            for j in neighbors:
+                if j > i:
+                    self._build_rows(i, j)
+
+    def add_event(self, event: Event, values: List[TimeInterval], neighbors: Iterable[Event]):
+        """Adds an event and the rows of its arcs to neighbors, events already in the tables."""
+        i = len(self.events)
+        self.events.append(event)
+        self.index[event] = i
+        self.values.append(list(values))
+        self.value_index.append({value: a for a, value in enumerate(values)})
+        # Times before the origin are negative, which the predicate handles all the same
+        self.starts.append([(interval.start_date - self._origin) // MICROSECOND for interval in values])
+        self.ends.append([(interval.end_date - self._origin) // MICROSECOND for interval in values])
+        self.durations.append(event.get_duration() // MICROSECOND)
+        self.neighbors.append([])
+        for neighbor in neighbors:
+            j = self.index[neighbor]
+            self.neighbors[i].append(j)
+            bisect.insort(self.neighbors[j], i)
+            self._build_rows(j, i)
+        self.neighbors[i].sort()
+
+    def remove_event(self, event: Event):
+        """Drops the event's arcs, its index stays taken so no other index moves."""
+        i = self.index.pop(event)
+        for j in self.neighbors[i]:
+            self.neighbors[j].remove(i)
+            del self.rows[(i, j)]
+            del self.rows[(j, i)]
+        self.neighbors[i] = []
+
+    def _build_rows(self, i: int, j: int):
+        if np is not None:
+            rows, reverse_rows = self._build_numpy(i, j)
+        else:
+            rows, reverse_rows = self._build_python(i, j)
+        self.rows[(i, j)] = rows
+        self.rows[(j, i)] = reverse_rows
+
+    def _build_python(self, i: int, j: int):
+        starts_j, ends_j, d2 = self.starts[j], self.ends[j], self.durations[j]
+        rows = []
+        reverse_rows = [0] * len(starts_j)
+        for a, (s1, e1) in enumerate(zip(self.starts[i], self.ends[i])):
+            row = 0
+            for b in range(len(starts_j)):
+                if interval_compatible(s1, e1, self.durations[i], starts_j[b], ends_j[b], d2):
+                    row |= 1 << b
+                    reverse_rows[b] |= 1 << a
+            rows.append(row)
+        return rows, reverse_rows
+
+    def _build_numpy(self, i: int, j: int):
+        s1 = np.array(self.starts[i], dtype=np.int64)[:, None]
+        e1 = np.array(self.ends[i], dtype=np.int64)[:, None]
+        s2 = np.array(self.starts[j], dtype=np.int64)[None, :]
+        e2 = np.array(self.ends[j], dtype=np.int64)[None, :]
+        d1, d2 = self.durations[i], self.durations[j]
+
+        disjoint = (e1 < s2) | (e2 < s1)
+        inside_second = (s2 <= s1) & (e1 <= e2)
+        inside_first = (s1 <= s2) & (e2 <= e1)
+        room1 = (e1 - s1) - d1
+        room2 = (e2 - s2) - d2
+        fits_in_second = ((s1 - s2) + room1 >= d2) | ((e2 - e1) + room1 >= d2)
+        fits_in_first = ((s2 - s1) + room2 >= d1) | ((e1 - e2) + room2 >= d1)
+        fits_in_hull = (np.maximum(e1, e2) - np.minimum(s1, s2)) >= d1 + d2
+
+        table = disjoint | np.where(inside_second, fits_in_second, np.where(inside_first, fits_in_first, fits_in_hull))
+        return self._pack(table), self._pack(table.T)
+
+    def _pack(self, table):
+        packed = np.packbits(table, axis=1, bitorder="little")
+        return [int.from_bytes(row.tobytes(), "little") for row in packed]
+
+    def row(self, node: Event, neighbor: Event, value: TimeInterval) -> int:
+        """Bitset of the neighbor's original domain indices compatible with value of node."""
+        i = self.index[node]
+        return self.rows[(i, self.index[neighbor])][self.value_index[i][value]]
+
+    def compatible(self, node: Event, neighbor: Event, value: TimeInterval, neighbor_value: TimeInterval) -> bool:
+        return bool(self.row(node, neighbor, value) >> self.value_index[self.index[neighbor]][neighbor_value] & 1)
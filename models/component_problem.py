@@ -0,0 +1,88 @@
+from typing import List, Tuple, Optional
+from datetime import datetime, timedelta
+from dataclasses import dataclass, replace
+from models.time_interval import TimeInterval
+from models.temporal_task import TemporalTask
+from models.event import Event
+from models.solver_options import SolverOptions
+from models.solver_stats import SolverStats
+
+MICROSECOND = timedelta(microseconds=1)
+
+@dataclass
+class ComponentProblem:
+    """Compact, picklable encoding of one connected component of a schedule CSP.
+
+    Events are replaced by their index, times by integer microseconds from origin,
+    so a component can be shipped to a worker process without pickling calendar objects.
+    """
+    origin: datetime
+    durations: List[int]
+    domains: List[List[Tuple[int, int]]]
+    edges: List[Tuple[int, int]]
+    options: SolverOptions
+
+    def __init__(self, origin: datetime, durations: List[int], domains: List[List[Tuple[int, int]]], edges: List[Tuple[int, int]], options: SolverOptions):
+        self.origin = origin
+        self.durations = durations
+        self.domains = domains
+        self.edges = edges
+        self.options = options
+
+    @classmethod
+    def encode(cls, csp, events: List[Event]):
+        index = {event: i for i, event in enumerate(events)}
+        origin = min((interval.start_date for event in events for interval in csp.domains[event]), default=datetime.min)
+
+        def offset(date: datetime):
+            return (date - origin) // MICROSECOND
+
+        durations = [event.get_duration() // MICROSECOND for event in events]
+        domains = [[(offset(interval.start_date), offset(interval.end_date)) for interval in csp.domains[event]] for event in events]
+        # Before arc consistency has built the constraints, the arcs give the same edges
+        if csp.constraints:
+            pairs = [(event, neighbor) for event in events for neighbor in csp.constraints.get(event, {})]
+        else:
+            pairs = csp.arcs.keys()
+        edges = sorted({(index[a], index[b]) for a, b in pairs if a in index and b in index and index[a] < index[b]})
+        options = replace(csp.options, decompose=False, max_workers=0)
+
+        return cls(origin, durations, domains, edges, options)
+
+    def decode_interval(self, interval: Tuple[int, int]):
+        return TimeInterval(self.origin + interval[0] * MICROSECOND, self.origin + interval[1] * MICROSECOND)
+
+    def encode_interval(self, interval: TimeInterval):
+        return ((interval.start_date - self.origin) // MICROSECOND, (interval.end_date - self.origin) // MICROSECOND)
+
+def solve_component_problem(problem: ComponentProblem, options: Optional[SolverOptions] = None, cancel_event=None) -> Tuple[str, List[Optional[Tuple[int, int]]], int, Optional[SolverStats]]:
+    """Solves an encoded problem, returning (status, encoded assignment per event, nodes expanded, stats).
+
+    Events missing from an unsolved result's assignment are None. The search stops once
+    cancel_event is set, which is how a pool's solve stops its workers.
+    """
+    from models.csp import CSP
+
+    options = replace(options, max_workers=0) if options is not None else problem.options
+
+    # Stand-in events only need a unique identity and the right duration
+    events = []
+    for i, duration in enumerate(problem.durations):
+        start = problem.origin
+        task = TemporalTask(str(i), "", start, start + duration * MICROSECOND)
+        events.append(Event(task, 0, 0, 0, 0))
+
+    domains = {events[i]: [problem.decode_interval(interval) for interval in domain] for i, domain in enumerate(problem.domains)}
+    arcs = {}
+    for i, j in problem.edges:
+        arcs[(events[i], events[j])] = set()
+        arcs[(events[j], events[i])] = set()
+
+    csp = CSP(domains, arcs, options)
+    result = csp.solve(cancel_event)
+
+    assignments = [
+        problem.encode_interval(result.assignments[event]) if event in result.assignments else None
+        for event in events
+    ]
+    return result.status, assignments, result.nodes_expanded, result.stats
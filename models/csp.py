@@ -1,8 +1,40 @@
-from typing import List, Dict, Set, Tuple
+from typing import List, Dict, Set, Tuple, Optional, Callable, Iterable
+from concurrent.futures import FIRST_COMPLETED, wait
+from collections import deque
+from contextlib import nullcontext
+import random
+import time
 from datetime import timedelta
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from models.time_interval import TimeInterval
 from models.event import Event
+from models.arc_consistency import ArcConsistency
+from models.compatibility_tables import CompatibilityTables, MICROSECOND
+from models.solver_options import SolverOptions
+from models.nogood_store import NogoodStore
+from models.component_problem import ComponentProblem, solve_component_problem
+from models.start_time_bitsets import StartTimeBitsets, iter_bits, popcount
+from models.local_search import LocalSearch
+from models.no_overlap import NoOverlap
+from models.solve_result import SolveResult, SOLVED, INFEASIBLE, TIMEOUT, CANCELLED
+from models.cancellation_token import CancellationToken
+from models.solver_stats import SolverStats
+from models.stats_registry import registry
+from models.solver_trace import SolverTrace
+from models.worker_pools import pools
+
+CANCEL_CHECK_INTERVAL = 64 # Nodes expanded or arcs revised between checks of the cancel event and deadline
+POOL_POLL_INTERVAL = 0.05 # Seconds between checks of the cancel event while waiting on worker processes
+RESTART_GROWTH = 1.5 # Factor the restart node limit grows by after every restart
+
+class SearchCancelled(Exception):
+    pass
+
+class SearchRestart(Exception):
+    pass
+
+class SearchTimeout(Exception):
+    pass
 
 @dataclass
 class CSP:
@@ -11,13 +43,60 @@ class CSP:
     constraints: Dict[Event, Dict[Event, Dict[TimeInterval, Set[TimeInterval]]]] 
     assignments: Dict[Event, List[TimeInterval]] 
     undo_stack: List 
+    options: SolverOptions
+    nodes_expanded: int
+    nogoods: NogoodStore
+    winning_options: Optional[SolverOptions]
+    tables: Optional[CompatibilityTables]
+    best_score: Optional[float]
+    dropped: List[Event]
+    stats: Optional[SolverStats]
+    trace: Optional[SolverTrace]
 
-    def __init__(self, domains = None, arcs = None):
+    def __init__(self, domains = None, arcs = None, options: Optional[SolverOptions] = None):
         self.domains = {}
         self.arcs = {}
         self.constraints = {}
         self.assignments = {}
         self.undo_stack = []
+        self.options = options if options is not None else SolverOptions()
+        self.nodes_expanded = 0
+        self.nogoods = NogoodStore(self.options.nogood_capacity)
+        # Domain value each event was assigned with, and the assigned events whose
+        # forward checking pruned each event's domain, used for conflict sets
+        self._chosen = {}
+        self._pruned_by = {}
+        self._window_sources = {}
+        self._assign_conflicts = set()
+        self._random = random.Random(self.options.random_seed) if self.options.random_seed is not None else None
+        self._restart_limit = None
+        # Anything with an is_set() method, e.g. a CancellationToken or a multiprocessing.Event
+        # shared by a portfolio, and the time.monotonic() time the solve has to stop by
+        self.cancel_event = None
+        self.deadline = None
+        self._best_partial = {}
+        self.winning_options = None
+        self.tables = None
+        # Best schedule found by optimize, the events it leaves out and whether it was proved optimal
+        self.best_score = None
+        self.best_assignments = None
+        self.dropped = []
+        self.proved_optimal = False
+        self._dropped = set()
+        self._scores = {}
+        self._optimize_deadline = None
+        self._on_improvement = None
+        # Domains before arc consistency, and what insert_event and remove_event leave for resolve():
+        # the last schedule and its domain values, the events inserted and the events to propagate from
+        self._initial_domains = {}
+        self._previous = None
+        self._previous_chosen = {}
+        self._inserted = set()
+        self._dirty = set()
+        # Counters of the current solve when options.instrument is set, otherwise None
+        self.stats = None
+        # Assignments, undos and prunes are recorded here when set, e.g. by the Calendar solving this CSP
+        self.trace = None
         if (domains is not None):
             self.domains = domains
         if (arcs is not None):
@@ -30,6 +109,152 @@ class CSP:
         if (e1, e2) not in self.arcs:
             self.arcs[(e1, e2)] = set()
         self.arcs[(e1, e2)].add((t1, t2))
+
+    def insert_event(self, event: Event, intervals: List[TimeInterval], neighbors: Iterable[Event] = ()):
+        """Adds an event to a solved CSP, building supports only for its arcs to neighbors.
+
+        neighbors are events already in the CSP whose windows overlap intervals. The next
+        resolve() starts from the last schedule and moves as few events as it can.
+        """
+        self._release()
+        neighbors = list(neighbors)
+        self.domains[event] = list(intervals)
+        self._initial_domains[event] = list(intervals)
+        for neighbor in neighbors:
+            overlaps = {(t1, t2) for t1 in intervals for t2 in self._initial_domains.get(neighbor, self.domains[neighbor]) if t1.is_overlapping(t2)}
+            self.arcs[(event, neighbor)] = overlaps
+            self.arcs[(neighbor, event)] = {(t2, t1) for t1, t2 in overlaps}
+        if self.tables is not None:
+            self.tables.add_event(event, intervals, neighbors)
+
+        # Before the first solve there are no supports yet, arc consistency builds them all
+        if not self.constraints:
+            return
+        self.constraints[event] = {}
+        for neighbor in neighbors:
+            self._build_supports(event, neighbor)
+            self._build_supports(neighbor, event)
+        self._inserted.add(event)
+        self._dirty.add(event)
+
+    def remove_event(self, event: Event):
+        """Removes an event from a solved CSP, the rest of the last schedule stays as it was."""
+        self._release()
+        neighbors = list(self._get_neighbors(event))
+        for neighbor in neighbors:
+            self.constraints[neighbor].pop(event, None)
+            self.arcs.pop((event, neighbor), None)
+            self.arcs.pop((neighbor, event), None)
+        for key in [key for key in self.arcs if event in key]:
+            del self.arcs[key]
+        self.domains.pop(event, None)
+        self.constraints.pop(event, None)
+        if self.tables is not None and event in self.tables.index:
+            self.tables.remove_event(event)
+        self._initial_domains.pop(event, None)
+        self._previous.pop(event, None)
+        self._previous_chosen.pop(event, None)
+        self._inserted.discard(event)
+        self._dirty.discard(event)
+        # Nogoods may rely on the removed event's constraints
+        self.nogoods = NogoodStore(self.options.nogood_capacity)
+
+        # Values pruned because of the removed event can be usable again, so the events it was
+        # connected to go back to their full domains and are propagated from at the next resolve()
+        component = self._connected(neighbors)
+        for member in component:
+            if member in self._initial_domains:
+                self.domains[member] = list(self._initial_domains[member])
+        for member in component:
+            for neighbor in self._get_neighbors(member):
+                self._build_supports(member, neighbor)
+        self._dirty.update(component)
+
+    def resolve(self, cancel_token: Optional[CancellationToken] = None) -> SolveResult:
+        """Searches again after insert_event or remove_event, warm started from the last schedule.
+
+        The last schedule is replayed for every event except the inserted ones, then for
+        every event except those and their neighbors, then their components, and only
+        if all of those fail is the day searched from scratch.
+        """
+        return self._run(self._repair, cancel_token)
+
+    def _release(self):
+        # Keeps the last schedule for resolve() and clears the search state so domains can be edited
+        if self._previous is not None:
+            return
+        self._previous = dict(self.assignments)
+        self._previous_chosen = dict(self._chosen)
+        self._undo(0)
+        self.assignments = {}
+        self._chosen = {}
+        self._pruned_by = {}
+        self._window_sources = {}
+
+    def _build_supports(self, event: Event, neighbor: Event):
+        # Read off the compatibility rows, which edits keep up to date, so warm and cold solves share one predicate
+        tables = self._get_tables()
+        i, j = tables.index[event], tables.index[neighbor]
+        rows, value_index = tables.rows[(i, j)], tables.value_index[i]
+        neighbor_values = tables.values[j]
+        alive = sum(1 << tables.value_index[j][value] for value in self.domains[neighbor])
+        supports = {}
+        for value in self.domains[event]:
+            supported = rows[value_index[value]] & alive
+            if supported:
+                supports[value] = {neighbor_values[b] for b in iter_bits(supported)}
+        self.constraints.setdefault(event, {})[neighbor] = supports
+
+    def _connected(self, events: Iterable[Event]):
+        component = set(events)
+        stack = list(component)
+        while stack:
+            for neighbor in self._get_neighbors(stack.pop()):
+                if neighbor not in component:
+                    component.add(neighbor)
+                    stack.append(neighbor)
+        return component
+
+    def _propagate(self, events: Iterable[Event]):
+        # AC-3 over the support tables, starting from the arcs into and out of events
+        queue = deque()
+        for event in events:
+            for neighbor in self._get_neighbors(event):
+                queue.append((neighbor, event))
+                queue.append((event, neighbor))
+        queued = set(queue)
+
+        revisions = 0
+        while queue:
+            arc = queue.popleft()
+            queued.discard(arc)
+            node, neighbor = arc
+            revisions += 1
+            if (revisions % CANCEL_CHECK_INTERVAL == 0):
+                self._check_budget()
+
+            supports = self.constraints[node][neighbor]
+            alive = set(self.domains[neighbor])
+            domain = self.domains[node]
+            remaining = [value for value in domain if not supports.get(value, set()).isdisjoint(alive)]
+            if self.stats is not None:
+                self.stats.arcs += 1
+                if len(remaining) != len(domain):
+                    self.stats.revisions += 1
+                    self.stats.values_removed += len(domain) - len(remaining)
+            if self.trace is not None and len(remaining) != len(domain):
+                self.trace.prune(node, len(domain) - len(remaining))
+            if len(remaining) == len(domain):
+                continue
+            if not remaining:
+                return False
+            self.domains[node] = remaining
+
+            for other in self._get_neighbors(node):
+                if other != neighbor and (other, node) not in queued:
+                    queue.append((other, node))
+                    queued.add((other, node))
+        return True
         
     def _time_interval_constraint(self, inter1: TimeInterval, inter2: TimeInterval, event_duration1: timedelta, event_duration2: timedelta):
         if (inter1.end_date < inter2.start_date or inter2.end_date < inter1.start_date):
@@ -50,18 +275,25 @@ class CSP:
         if event_duration1 + event_duration2 <= total_window:
             return True
     
+    def _get_tables(self):
+        if self.tables is None:
+            self.tables = CompatibilityTables(self.domains, self.arcs, self._check_budget)
+        return self.tables
+
     def _AC3(self):
+        tables = self._get_tables()
         constraints = {}
         queue = list(self.arcs.keys()).copy()
+        revisions = 0
         
         while (len(queue) != 0):
             
             node, neighbor = queue.pop(0)
-            
-            # Can guarantee that the task for all of the nodes are temporal tasks, which have the get_duration function because
-            # the generate_schedule function will only pass temporal tasks from the callendar into this function
-            node_duration = node.get_duration()
-            neighbor_duration = neighbor.get_duration()
+            revisions += 1
+            if self.stats is not None:
+                self.stats.arcs += 1
+            if (revisions % CANCEL_CHECK_INTERVAL == 0):
+                self._check_budget()
             
             if node not in constraints:
                 constraints[node] = {}
@@ -76,7 +308,7 @@ class CSP:
             for d1o in self.domains[node].copy():
                 for d2o in self.domains[neighbor].copy():
                     
-                    if (self._time_interval_constraint(d1o, d2o, node_duration, neighbor_duration)):
+                    if (tables.compatible(node, neighbor, d1o, d2o)):
                         
                         if d1o not in constraints[node][neighbor]:
                             constraints[node][neighbor][d1o] = set()
@@ -92,8 +324,28 @@ class CSP:
         self.constraints = constraints
         return constraints
 
+    def _AC2001(self):
+        # Reaches the same fixpoint as _AC3, with a deque worklist, bitwise supports from the compatibility tables and residues
+        propagator = ArcConsistency(self.domains, self._get_tables(), self._check_budget)
+        removed = propagator.propagate()
+        if self.stats is not None:
+            self.stats.arcs += propagator.arcs_revised
+            self.stats.revisions += propagator.revisions
+            self.stats.values_removed += removed
+
+        constraints = propagator.build_constraints()
+        propagator.prune_domains()
+
+        self.constraints = constraints
+        return constraints
+
     def _revise(self, node, neighbor, bad_dom, constraints, queue):
         self.domains[node].remove(bad_dom)
+        if self.stats is not None:
+            self.stats.revisions += 1
+            self.stats.values_removed += 1
+        if self.trace is not None:
+            self.trace.prune(node, 1)
         
         for check_neighbor in constraints[node]:
             if (check_neighbor == neighbor):
@@ -114,39 +366,561 @@ class CSP:
         
         return constraints
     
-    def solve(self):
-        if self.constraints is None:
-            self._AC3()
-        return self._backtrack()
+    def solve(self, cancel_token: Optional[CancellationToken] = None) -> SolveResult:
+        """Searches for a schedule of every event, giving up after options.time_limit seconds or once cancel_token is cancelled."""
+        return self._run(self._solve, cancel_token)
+
+    def solve_portfolio(self, portfolio: List[SolverOptions], cancel_token: Optional[CancellationToken] = None) -> SolveResult:
+        """Races every configuration in portfolio in its own process and keeps the first finished result."""
+        return self._run(lambda: self._race(portfolio), cancel_token)
+
+    def _run(self, search: Callable, cancel_token: Optional[CancellationToken]):
+        started = time.perf_counter()
+        if cancel_token is not None:
+            self.cancel_event = cancel_token
+        if self.options.time_limit is not None:
+            self.deadline = time.monotonic() + self.options.time_limit
+        self._best_partial = {}
+        self.stats = SolverStats() if self.options.instrument else None
+
+        try:
+            # The global no-overlap constraint of the bitset model needs no pairwise supports
+            if not self.constraints and not self._global_bitset():
+                self._initial_domains = {event: list(values) for event, values in self.domains.items()}
+                with self._timed("propagation"):
+                    self._AC2001()
+            with self._timed("search"):
+                status = SOLVED if search() else INFEASIBLE
+        except SearchTimeout:
+            status = TIMEOUT
+        except SearchCancelled:
+            status = CANCELLED
+
+        if status == SOLVED:
+            assignments = dict(self.assignments)
+            self._record_undo_depth()
+        else:
+            # Components solved before stopping stay in assignments, the deepest partial search fills in the rest
+            self._undo(0)
+            assignments = {**self._best_partial, **self.assignments}
+        if self.stats is not None:
+            registry.record(self.stats)
+        return SolveResult(status, assignments, self.nodes_expanded, time.perf_counter() - started, self.stats)
+
+    def _timed(self, phase: str):
+        return self.stats.timed(phase) if self.stats is not None else nullcontext()
+
+    def _record_undo_depth(self):
+        # The stack only shrinks in _undo, so checking there and after a solve sees its deepest point
+        if self.stats is not None and len(self.undo_stack) > self.stats.max_undo_depth:
+            self.stats.max_undo_depth = len(self.undo_stack)
+
+    def _repair(self):
+        # Without edits since the last solve, its schedule is replayed as it is
+        self._release()
+        previous, chosen = self._previous, self._previous_chosen
+        inserted, dirty = self._inserted, self._dirty
+        self._previous, self._previous_chosen = None, {}
+        self._inserted, self._dirty = set(), set()
+
+        with self._timed("propagation"):
+            if not self._propagate(dirty):
+                return False
+        # Local search starts from its own greedy placement, so there is nothing to warm start
+        if not previous or self.options.search == "local":
+            return self._solve()
+
+        rings = [set(inserted)]
+        rings.append(rings[-1] | {neighbor for event in inserted for neighbor in self._get_neighbors(event)})
+        rings.append(self._connected(rings[-1]))
+        for k, free in enumerate(rings):
+            if k > 0 and free == rings[k - 1]:
+                continue
+            if self._warm_search(free, previous, chosen):
+                return True
+        return self._solve()
+
+    def _warm_search(self, free: Set[Event], previous: Dict[Event, TimeInterval], chosen: Dict[Event, TimeInterval]):
+        # Replays the previous schedule outside free in its original order, then searches the rest
+        for event, interval in previous.items():
+            if event in free or event not in self.domains:
+                continue
+            value = chosen.get(event)
+            if value is None:
+                value = next((window for window in self.domains[event] if window.start_date <= interval.start_date and interval.end_date <= window.end_date), None)
+            if value is None or value not in self.domains[event]:
+                continue
+
+            if self.options.domain_model == "bitset":
+                # Bitset search keeps exact start times of assigned events fixed
+                self.assignments[event] = interval
+                self.undo_stack.append(("assignment", event, None))
+            elif (
+                not self._assign(event, value) or
+                (self.options.forward_checking and not self._forward_check(event, value))
+            ):
+                self._undo(0)
+                return False
+
+        if self._search():
+            return True
+        self._undo(0)
+        return False
+
+    def _global_bitset(self):
+        return self.options.no_overlap == "global" and self.options.domain_model == "bitset" and self.options.search == "systematic"
+
+    def _no_overlap_feasible(self):
+        # Each event relaxed to its earliest and latest exact start over all its windows, so
+        # a failure proves there is no schedule whatever model searches the day
+        events = list(self.domains)
+        origin = min((interval.start_date for intervals in self.domains.values() for interval in intervals), default=None)
+        est, lst, lengths = [], [], []
+        for event in events:
+            duration = event.get_duration()
+            windows = [window for window in self.domains[event] if window.get_duration() >= duration]
+            if not windows:
+                return False
+            est.append((min(window.start_date for window in windows) - origin) // MICROSECOND)
+            lst.append((max(window.end_date for window in windows) - duration - origin) // MICROSECOND)
+            lengths.append(duration // MICROSECOND)
+        return NoOverlap(lengths).tighten(est, lst) is not None
+
+    def _solve(self):
+        if self.options.no_overlap == "global" and not self._global_bitset() and not self._no_overlap_feasible():
+            return False
+        # Without pairwise constraints the global constraint's day is searched as a whole
+        if self.options.decompose and not self._global_bitset():
+            components = self._get_components()
+            if len(components) > 1:
+                return self._solve_components(components)
+        return self._search()
+
+    def _search(self):
+        checkpoint = len(self.undo_stack)
+        restart_nodes = self.options.restart_nodes
+
+        while True:
+            self._restart_limit = self.nodes_expanded + restart_nodes if restart_nodes else None
+            try:
+                if self.options.search == "local":
+                    return self._local_search()
+                if self.options.domain_model == "bitset":
+                    return self._bitset_search()
+                if self.options.backjumping:
+                    return self._backjump() is None
+                return self._backtrack()
+            except SearchRestart:
+                # Learned nogoods stay valid, so they are kept across restarts
+                self._undo(checkpoint)
+                restart_nodes = max(restart_nodes + 1, int(restart_nodes * RESTART_GROWTH))
+            finally:
+                self._restart_limit = None
+
+    def _check_budget(self):
+        if (self.cancel_event is not None and self.cancel_event.is_set()):
+            raise SearchCancelled()
+        if (self.deadline is not None and time.monotonic() > self.deadline):
+            raise SearchTimeout()
+
+    def _expand_node(self):
+        self.nodes_expanded += 1
+        if self.stats is not None:
+            self.stats.nodes += 1
+        if (len(self.assignments) > len(self._best_partial)):
+            self._best_partial = dict(self.assignments)
+        if (self._restart_limit is not None and self.nodes_expanded > self._restart_limit):
+            raise SearchRestart()
+        if (self.nodes_expanded % CANCEL_CHECK_INTERVAL == 0):
+            self._check_budget()
+
+    def _remaining_options(self, options: SolverOptions):
+        # Worker processes get what is left of this solve's time limit as their own
+        if self.deadline is None:
+            return options
+        remaining = max(self.deadline - time.monotonic(), 0.0)
+        return replace(options, time_limit=remaining if options.time_limit is None else min(options.time_limit, remaining))
+
+    def _merge_stats(self, stats: Optional[SolverStats]):
+        # Workers collect their own stats, their phase times overlap this process's
+        if self.stats is not None and stats is not None:
+            self.stats.merge(stats)
+
+    def _forward_cancel(self, cancel_event):
+        if (self.cancel_event is not None and self.cancel_event.is_set()):
+            cancel_event.set()
+
+    def _race(self, portfolio: List[SolverOptions]):
+        events = list(self.domains.keys())
+        problem = ComponentProblem.encode(self, events)
+        cancel_event = pools.new_cancel_event()
+        winner = None
+        partial = []
+
+        executor = pools.get(len(portfolio))
+        pending = {executor.submit(solve_component_problem, problem, self._remaining_options(options), cancel_event): options for options in portfolio}
+        try:
+            while pending and winner is None:
+                done, _ = wait(pending, timeout=POOL_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                self._forward_cancel(cancel_event)
+                for future in done:
+                    options = pending.pop(future)
+                    status, assignments, nodes_expanded, stats = future.result()
+                    self.nodes_expanded += nodes_expanded
+                    self._merge_stats(stats)
+                    # Only a schedule or a proof that there is none decides the race, running out of time proves nothing
+                    if (winner is None and status in (SOLVED, INFEASIBLE)):
+                        winner = (status, assignments, options)
+                    elif (sum(interval is not None for interval in assignments) > sum(interval is not None for interval in partial)):
+                        partial = assignments
+        finally:
+            # Stop the losing configurations, they check the event every CANCEL_CHECK_INTERVAL nodes
+            cancel_event.set()
+            for future in pending:
+                future.cancel()
+
+        if winner is not None:
+            status, partial, self.winning_options = winner
+        decoded = {event: problem.decode_interval(interval) for event, interval in zip(events, partial) if interval is not None}
+
+        if winner is None:
+            self._best_partial = decoded
+            if (self.cancel_event is not None and self.cancel_event.is_set()):
+                raise SearchCancelled()
+            raise SearchTimeout()
+        if status == INFEASIBLE:
+            self._best_partial = decoded
+            return False
+        self.assignments.update(decoded)
+        return True
+
+    def _bitset_search(self):
+        # Discretized start times with arc consistency maintained after every assignment
+        if self._global_bitset():
+            # Neighbors only guide the search heuristics here, the arcs are enough for that
+            neighbors = {event: set() for event in self.domains}
+            for event, neighbor in self.arcs:
+                if event in neighbors and neighbor in neighbors:
+                    neighbors[event].add(neighbor)
+                    neighbors[neighbor].add(event)
+            model = StartTimeBitsets(self.domains, neighbors, self.options.granularity, no_overlap=True)
+        else:
+            model = StartTimeBitsets(self.domains, self.constraints, self.options.granularity)
+        assigned = [False] * len(model.events)
+        for i, event in enumerate(model.events):
+            if event in self.assignments:
+                # Events assigned before the search, e.g. by a warm start, keep their start
+                start = (self.assignments[event].start_date - model.origin) // model.granularity
+                if not model.bits[i] >> start & 1:
+                    return False
+                model.bits[i] = 1 << start
+                assigned[i] = True
+        if not model.propagate(range(len(model.events))):
+            return False
+
+        try:
+            solved = self._bitset_backtrack(model, assigned, assigned.count(False))
+        except (SearchTimeout, SearchCancelled):
+            # Events on the current branch whose start is fixed make up the partial schedule
+            self._best_partial = {event: model.decode(i) for i, event in enumerate(model.events) if assigned[i] and model.bits[i] & (model.bits[i] - 1) == 0}
+            raise
+        if not solved:
+            return False
+
+        for i, event in enumerate(model.events):
+            self.assignments[event] = model.decode(i)
+        return True
+
+    def _select_bitset(self, model: StartTimeBitsets, assigned: List[bool]):
+        candidates = [i for i in range(len(model.events)) if not assigned[i]]
+        if self._random is not None:
+            self._random.shuffle(candidates)
+
+        def degree(i):
+            return sum(1 for j in model.neighbors[i] if not assigned[j])
+
+        ordering = self.options.variable_ordering
+        if ordering == "mrv":
+            fewest = min(popcount(model.bits[i]) for i in candidates)
+            return max((i for i in candidates if popcount(model.bits[i]) == fewest), key=degree)
+        if ordering == "degree":
+            return max(candidates, key=degree)
+        return candidates[0]
+
+    def _order_starts(self, model: StartTimeBitsets, i: int, assigned: List[bool]):
+        starts = list(iter_bits(model.bits[i]))
+        if self._random is not None:
+            self._random.shuffle(starts)
+        if self.options.value_ordering == "lcv":
+            starts.sort(key=lambda start: model.count_ruled_out(i, start, assigned))
+        return starts
+
+    def _bitset_backtrack(self, model: StartTimeBitsets, assigned: List[bool], remaining: int):
+        if (remaining == 0):
+            return True
+        self._expand_node()
+
+        i = self._select_bitset(model, assigned)
+        assigned[i] = True
+        for start in self._order_starts(model, i, assigned):
+            checkpoint = len(model.trail)
+            consistent = model.assign(i, start)
+            if self.stats is not None or self.trace is not None:
+                self._observe_bitset_assign(model, i, start, checkpoint)
+            if (consistent and self._bitset_backtrack(model, assigned, remaining - 1)):
+                return True
+            model.undo(checkpoint)
+            if self.trace is not None:
+                self.trace.undo(model.events[i])
+        assigned[i] = False
+        if self.stats is not None:
+            self.stats.backtracks += 1
+        return False
+
+    def _observe_bitset_assign(self, model: StartTimeBitsets, i: int, start: int, checkpoint: int):
+        removed = model.removed_since(checkpoint)
+        # The assigned event's own bits are not pruned, only narrowed to its start
+        removed.pop(i, None)
+        if self.stats is not None:
+            self.stats.values_removed += sum(removed.values())
+            self.stats.max_undo_depth = max(self.stats.max_undo_depth, len(model.trail))
+        if self.trace is not None:
+            self.trace.assign(model.events[i], self._decode_start(model, i, start))
+            for j, count in removed.items():
+                if count:
+                    self.trace.prune(model.events[j], count)
+
+    def _local_search(self):
+        model = StartTimeBitsets(self.domains, self.constraints, self.options.granularity)
+        if not model.propagate(range(len(model.events))):
+            return False
+        if not model.events:
+            return True
+
+        search = LocalSearch(model, self._random if self._random is not None else random.Random(), self.options)
+        try:
+            for iteration in range(self.options.max_iterations):
+                if search.total_conflicts == 0:
+                    break
+                self._expand_node()
+                search.step(iteration)
+            if search.best_conflicts:
+                # Running out of moves proves nothing, so it counts as running out of time
+                raise SearchTimeout()
+        except (SearchTimeout, SearchCancelled):
+            self._best_partial = {model.events[i]: self._decode_start(model, i, start) for i, start in search.conflict_free_starts().items()}
+            raise
+
+        for i, event in enumerate(model.events):
+            self.assignments[event] = self._decode_start(model, i, search.best_starts[i])
+        return True
+
+    def _decode_start(self, model: StartTimeBitsets, i: int, start: int):
+        start_date = model.origin + start * model.granularity
+        return TimeInterval(start_date, start_date + model.events[i].get_duration())
+
+    def _get_components(self):
+        # Connected components of the constraint graph, each in domain order
+        component_of = {}
+        num_components = 0
+        for event in self.domains:
+            if event in component_of:
+                continue
+
+            component_of[event] = num_components
+            stack = [event]
+            while stack:
+                current = stack.pop()
+                for neighbor in self._get_neighbors(current):
+                    if neighbor not in component_of:
+                        component_of[neighbor] = num_components
+                        stack.append(neighbor)
+            num_components += 1
+
+        components = [[] for _ in range(num_components)]
+        for event in self.domains:
+            components[component_of[event]].append(event)
+        return components
+
+    def _build_component_csp(self, component: List[Event]):
+        component_csp = CSP(
+            {event: self.domains[event] for event in component},
+            {(event, neighbor): self.arcs.get((event, neighbor), set()) for event in component for neighbor in self._get_neighbors(event)},
+            replace(self.options, decompose=False, max_workers=0)
+        )
+        component_csp.constraints = {event: self._get_neighbors(event) for event in component}
+        component_csp.cancel_event = self.cancel_event
+        component_csp.deadline = self.deadline
+        component_csp.tables = self.tables
+        component_csp.stats = self.stats
+        component_csp.trace = self.trace
+        return component_csp
+
+    def _solve_components(self, components: List[List[Event]]):
+        # A single component gains nothing from another process
+        if (self.options.max_workers > 1 and len(components) > 1):
+            return self._solve_components_in_pool(components)
+
+        solved = True
+        for component in components:
+            component_csp = self._build_component_csp(component)
+            try:
+                component_solved = component_csp._search()
+            except (SearchTimeout, SearchCancelled):
+                self.nodes_expanded += component_csp.nodes_expanded
+                self._best_partial.update(component_csp._best_partial)
+                raise
+
+            solved = solved and component_solved
+            self.nodes_expanded += component_csp.nodes_expanded
+            if component_solved:
+                self.assignments.update(component_csp.assignments)
+            else:
+                self._best_partial.update(component_csp._best_partial)
+        return solved
+
+    def _solve_components_in_pool(self, components: List[List[Event]]):
+        problems = [ComponentProblem.encode(self, component) for component in components]
+        for problem in problems:
+            problem.options = self._remaining_options(problem.options)
+        cancel_event = pools.new_cancel_event()
+
+        executor = pools.get(self.options.max_workers)
+        futures = [executor.submit(solve_component_problem, problem, None, cancel_event) for problem in problems]
+        pending = set(futures)
+        try:
+            while pending:
+                _, pending = wait(pending, timeout=POOL_POLL_INTERVAL)
+                self._forward_cancel(cancel_event)
+        finally:
+            # The pool outlives this solve, so nothing left of it may keep the workers busy
+            cancel_event.set()
+            for future in pending:
+                future.cancel()
+        results = [future.result() for future in futures]
+
+        statuses = set()
+        for component, problem, (status, assignments, nodes_expanded, stats) in zip(components, problems, results):
+            statuses.add(status)
+            self.nodes_expanded += nodes_expanded
+            self._merge_stats(stats)
+            decoded = {event: problem.decode_interval(interval) for event, interval in zip(component, assignments) if interval is not None}
+            if status == SOLVED:
+                self.assignments.update(decoded)
+            else:
+                self._best_partial.update(decoded)
+
+        # One component without a schedule settles the whole day, whatever happened to the others
+        if INFEASIBLE in statuses:
+            return False
+        if CANCELLED in statuses:
+            raise SearchCancelled()
+        if TIMEOUT in statuses:
+            raise SearchTimeout()
+        return True
     
     def _get_unassigned(self):
         return [event for event in self.domains if event not in self.assignments]
+
+    def _get_neighbors(self, event: Event):
+        return self.constraints.get(event, {})
+
+    def _get_degree(self, event: Event):
+        return sum(1 for neighbor in self._get_neighbors(event) if neighbor not in self.assignments)
+
+    def _select_unassigned(self, unassigned_events: List[Event]):
+        ordering = self.options.variable_ordering
+        if self._random is not None:
+            self._random.shuffle(unassigned_events)
+        if ordering == "mrv":
+            # Fewest remaining values first, ties broken by the most unassigned neighbors
+            fewest = min(len(self.domains[event]) for event in unassigned_events)
+            return max((event for event in unassigned_events if len(self.domains[event]) == fewest), key=self._get_degree)
+        if ordering == "degree":
+            return max(unassigned_events, key=self._get_degree)
+        return unassigned_events[0]
+
+    def _count_ruled_out(self, event: Event, interval: TimeInterval):
+        ruled_out = 0
+        for neighbor, supports in self._get_neighbors(event).items():
+            if neighbor in self.assignments:
+                continue
+            interval_supports = supports.get(interval, set())
+            ruled_out += sum(1 for neighbor_interval in self.domains[neighbor] if neighbor_interval not in interval_supports)
+        return ruled_out
+
+    def _order_values(self, event: Event):
+        values = list(self.domains[event])
+        if self._random is not None:
+            self._random.shuffle(values)
+        if self.options.value_ordering == "lcv":
+            values.sort(key=lambda interval: self._count_ruled_out(event, interval))
+        return values
+
+    def _forward_check(self, event: Event, interval: TimeInterval):
+        for neighbor, supports in self._get_neighbors(event).items():
+            if neighbor in self.assignments:
+                continue
+
+            interval_supports = supports.get(interval, set())
+            domain = self.domains[neighbor]
+            remaining = [neighbor_interval for neighbor_interval in domain if neighbor_interval in interval_supports]
+
+            if len(remaining) != len(domain):
+                self.undo_stack.append(("domain", neighbor, domain))
+                self.domains[neighbor] = remaining
+                if self.stats is not None:
+                    self.stats.values_removed += len(domain) - len(remaining)
+                if self.trace is not None:
+                    self.trace.prune(neighbor, len(domain) - len(remaining))
+
+                if neighbor not in self._pruned_by:
+                    self._pruned_by[neighbor] = set()
+                if event not in self._pruned_by[neighbor]:
+                    self._pruned_by[neighbor].add(event)
+                    self.undo_stack.append(("pruned_by", neighbor, event))
+            if not remaining:
+                return False
+        return True
     
-    # def _forward_check(self, event):
-    #     return "TODO"
-    
-    def _mergeSplit(self, intr1: TimeInterval, intr2: TimeInterval, dur1: timedelta, dur2: timedelta):
-        intr1_valid = intr1.get_duration() >= dur1
-        intr2_valid = intr2.get_duration() >= dur2
+    def _mergeSplit(self, intr1: Optional[TimeInterval], intr2: Optional[TimeInterval], duration: timedelta):
+        intr1_valid = intr1 is not None and intr1.get_duration() >= duration
+        intr2_valid = intr2 is not None and intr2.get_duration() >= duration
         res = None
 
         if (intr1_valid and intr2_valid):
-            res = [min(intr1.start_date, intr2.start_date), max(intr1.end_date, intr2.end_date)]
+            res = TimeInterval(min(intr1.start_date, intr2.start_date), max(intr1.end_date, intr2.end_date))
         elif (intr1_valid and not intr2_valid):
             res = intr1
         elif (not intr1_valid and intr2_valid):
             res = intr2
 
         return res
+
+    def _ordered_windows(self, first: TimeInterval, second: TimeInterval, first_duration: timedelta, second_duration: timedelta):
+        # Windows left for two events when first has to finish before second starts
+        first_end = min(first.end_date, second.end_date - second_duration)
+        second_start = max(second.start_date, first.start_date + first_duration)
+
+        first_window = TimeInterval(first.start_date, first_end) if first.start_date <= first_end else None
+        second_window = TimeInterval(second_start, second.end_date) if second_start <= second.end_date else None
+
+        if (
+            first_window is None or second_window is None or
+            first_window.get_duration() < first_duration or second_window.get_duration() < second_duration
+        ):
+            return None, None
+        return first_window, second_window
     
     def _split_interval(self, intr1: TimeInterval, intr2: TimeInterval, dur1: timedelta, dur2: timedelta):
-        spl1 = TimeInterval(intr1.start_date, min(intr2.end_date - dur2, intr1.end_date))
-        spl2 = TimeInterval(max(intr1.start_date + dur1, intr2.start_date), intr2.end_date)
-        spl3 = TimeInterval(intr2.start_date, min(intr1.end_date - dur1, intr2.end_date))
-        spl4 = TimeInterval(max(intr2.start_date + dur2, intr1.start_date), intr1.end_date)
+        spl1, spl2 = self._ordered_windows(intr1, intr2, dur1, dur2)
+        spl3, spl4 = self._ordered_windows(intr2, intr1, dur2, dur1)
         
-        newinter1 = self._mergeSplit(spl1, spl3, dur1, dur2)
-        newinter2 = self._mergeSplit(spl2, spl4, dur1, dur2)
+        newinter1 = self._mergeSplit(spl1, spl4, dur1)
+        newinter2 = self._mergeSplit(spl2, spl3, dur2)
+
+        if (newinter1 is None or newinter2 is None):
+            return None, None
         
         # Ensure the durations for the merged intervals are large enough
         if (not (max(newinter1.end_date, newinter2.end_date) - min(newinter1.start_date, newinter2.start_date) >= dur1 + dur2)):
@@ -155,43 +929,266 @@ class CSP:
         return newinter1, newinter2
 
     def _assign(self, event: Event, interval: TimeInterval):
+        if self.trace is not None:
+            self.trace.assign(event, interval)
         self.assignments[event] = interval
+        self.undo_stack.append(("assignment", event, None))
+        self._chosen[event] = interval
+        self.undo_stack.append(("chosen", event, None))
+
+        # Assigned events that have narrowed this event's window, directly or through another neighbor
+        sources = set()
+        self._window_sources[event] = sources
+        self.undo_stack.append(("sources", event, None))
 
-        for neighbor in self.constraints[event].keys():
+        for neighbor in self._get_neighbors(event).keys():
+
+            if (neighbor in self.assignments and self.assignments[event].is_overlapping(self.assignments[neighbor])):
+                if (self.tables is not None and not self.tables.compatible(event, neighbor, interval, self._chosen[neighbor])):
+                    # The domain values themselves can not both hold, whatever the windows narrowed to
+                    self._assign_conflicts = {neighbor}
+                    return False
 
-            if (neighbor in self.assignments and interval.is_overlapping(self.assignments[neighbor])):
                 neighbor_interval = self.assignments[neighbor]
-                intr1, intr2 = self._split_interval(interval, neighbor_interval, event.get_duration(), neighbor.get_duration())
+                sources.add(neighbor)
+                sources.update(self._window_sources[neighbor])
+
+                intr1, intr2 = self._split_interval(self.assignments[event], neighbor_interval, event.get_duration(), neighbor.get_duration())
 
                 if (not intr1 or not intr2):
+                    self._assign_conflicts = sources
                     return False
 
                 if (neighbor_interval != intr2):
-                    self.undo_stack.append((neighbor, neighbor_interval))
-                    neighbor_interval = intr2
+                    self.undo_stack.append(("assignment", neighbor, neighbor_interval))
+                    self.assignments[neighbor] = intr2
+
+                    self.undo_stack.append(("sources", neighbor, self._window_sources[neighbor]))
+                    self._window_sources[neighbor] = self._window_sources[neighbor] | sources | {event}
 
                 if (self.assignments[event] != intr1):
                     self.assignments[event] = intr1
 
-        self.undo_stack.append((event, None))
         return True
     
     def _undo(self, checkpoint):
+        self._record_undo_depth()
         while (len(self.undo_stack) > checkpoint):
-            event, interval = self.undo_stack.pop()
-            if (interval is None):
+            kind, event, value = self.undo_stack.pop()
+            if (kind == "domain"):
+                self.domains[event] = value
+            elif (kind == "pruned_by"):
+                self._pruned_by[event].discard(value)
+            elif (kind == "chosen"):
+                del self._chosen[event]
+            elif (kind == "dropped"):
+                self._dropped.discard(event)
+            elif (kind == "sources"):
+                if (value is None):
+                    del self._window_sources[event]
+                else:
+                    self._window_sources[event] = value
+            elif (value is None):
                 del self.assignments[event]
+                if self.trace is not None:
+                    self.trace.undo(event)
             else:
-                self.assignments[event] = interval
+                self.assignments[event] = value
     
     def _backtrack(self):
         unasigned_events = self._get_unassigned()
         if (len(unasigned_events) == 0):
             return True
-        for event in unasigned_events:
-            for sched_intrvl in self.domains[event]:
+        self._expand_node()
+
+        event = self._select_unassigned(unasigned_events)
+        for sched_intrvl in self._order_values(event):
+            checkpoint = len(self.undo_stack)
+            if (
+                self._assign(event, sched_intrvl) and
+                (not self.options.forward_checking or self._forward_check(event, sched_intrvl)) and
+                self._backtrack()
+            ):
+                return True
+            self._undo(checkpoint)
+        if self.stats is not None:
+            self.stats.backtracks += 1
+        return False
+
+    def _backjump(self):
+        """Search with conflict-directed backjumping and nogood learning, forward checking if enabled.
+
+        Returns None once every event is assigned, otherwise the conflict set of
+        the failed subtree and whether it depends on the order of assignments.
+        """
+        unasigned_events = self._get_unassigned()
+        if (len(unasigned_events) == 0):
+            return None
+        self._expand_node()
+
+        event = self._select_unassigned(unasigned_events)
+        # Values removed by earlier forward checks are blamed on the events that pruned them
+        conflicts = set(self._pruned_by.get(event, ()))
+        order_dependent = False
+
+        for sched_intrvl in self._order_values(event):
+            nogood = self.nogoods.find_violated(event, sched_intrvl, self._chosen)
+            if (nogood is not None):
+                conflicts.update(other for other, _ in nogood if other != event)
+                continue
+
+            checkpoint = len(self.undo_stack)
+            if (not self._assign(event, sched_intrvl)):
+                # Only the neighbors that narrowed the windows involved are blamed, but how far
+                # windows narrow depends on assignment order, so nothing is learned from this
+                conflicts.update(self._assign_conflicts)
+                order_dependent = True
+                self._undo(checkpoint)
+                continue
+
+            # Without forward checking only _assign finds conflicts, with the assigned neighbors it blames
+            if (self.options.forward_checking and not self._forward_check(event, sched_intrvl)):
+                wiped_out = next(neighbor for neighbor in self._get_neighbors(event) if not self.domains[neighbor])
+                conflicts.update(culprit for culprit in self._pruned_by[wiped_out] if culprit != event)
+                self._undo(checkpoint)
+                continue
+
+            result = self._backjump()
+            if (result is None):
+                return None
+            self._undo(checkpoint)
+
+            child_conflicts, child_order_dependent = result
+            if (event not in child_conflicts):
+                # This event played no part in the failure, so jump past it
+                if self.stats is not None:
+                    self.stats.backtracks += 1
+                return result
+            conflicts.update(culprit for culprit in child_conflicts if culprit != event)
+            order_dependent = order_dependent or child_order_dependent
+
+        if (not order_dependent and conflicts):
+            self.nogoods.add(frozenset((culprit, self._chosen[culprit]) for culprit in conflicts))
+        if self.stats is not None:
+            self.stats.backtracks += 1
+        return conflicts, order_dependent
+
+    def optimize(self, time_limit: Optional[float] = None, on_improvement: Optional[Callable] = None):
+        """Schedules the events with the highest summed priority score that fit, returns that score.
+
+        Branch-and-bound over the interval model that may drop events. Every better schedule is
+        passed to on_improvement(score, assignments), and after time_limit seconds the best one
+        found so far is kept in assignments with proved_optimal left False.
+        """
+        if not self.constraints:
+            # Arc consistency assumes every event gets scheduled, so the supports are built without pruning
+            self.constraints = ArcConsistency(self.domains, self._get_tables()).build_constraints()
+        deadline = time.monotonic() + time_limit if time_limit is not None else None
+        scores = {event: event.get_priority_score() for event in self.domains}
+
+        if self.options.decompose:
+            components = self._get_components()
+            if len(components) > 1:
+                return self._optimize_components(components, scores, deadline, on_improvement)
+        return self._optimize(scores, deadline, on_improvement)
+
+    def _optimize(self, scores: Dict[Event, float], deadline: Optional[float], on_improvement: Optional[Callable]):
+        self._scores = scores
+        self._optimize_deadline = deadline
+        self._on_improvement = on_improvement
+        self.best_score = None
+        self.best_assignments = None
+        self.proved_optimal = False
+        # Branch and bound never restarts, it would lose the bound found so far
+        self._restart_limit = None
+
+        checkpoint = len(self.undo_stack)
+        try:
+            self._branch_and_bound(0.0)
+            self.proved_optimal = True
+        except (SearchTimeout, SearchCancelled):
+            self._undo(checkpoint)
+
+        self.assignments = dict(self.best_assignments) if self.best_assignments is not None else {}
+        self.dropped = [event for event in self.domains if event not in self.assignments]
+        return self.best_score if self.best_score is not None else 0.0
+
+    def _optimize_components(self, components: List[List[Event]], scores: Dict[Event, float], deadline: Optional[float], on_improvement: Optional[Callable]):
+        # Scores add up over components, so each is optimized alone with an equal share of the time left
+        total = 0.0
+        proved_optimal = True
+        for k, component in enumerate(components):
+            component_csp = self._build_component_csp(component)
+            component_deadline = None
+            if deadline is not None:
+                component_deadline = time.monotonic() + max(deadline - time.monotonic(), 0) / (len(components) - k)
+
+            callback = None
+            if on_improvement is not None:
+                def callback(score, assignments, base_score=total, base_assignments=dict(self.assignments)):
+                    on_improvement(base_score + score, {**base_assignments, **assignments})
+
+            total += component_csp._optimize({event: scores[event] for event in component}, component_deadline, callback)
+            self.nodes_expanded += component_csp.nodes_expanded
+            self.assignments.update(component_csp.assignments)
+            proved_optimal = proved_optimal and component_csp.proved_optimal
+
+        self.best_score = total
+        self.best_assignments = dict(self.assignments)
+        self.proved_optimal = proved_optimal
+        self.dropped = [event for event in self.domains if event not in self.assignments]
+        return total
+
+    def _prune_neighbors(self, event: Event, interval: TimeInterval):
+        # Forward checking that never fails, a neighbor left without values can only be dropped
+        for neighbor, supports in self._get_neighbors(event).items():
+            if neighbor in self.assignments or neighbor in self._dropped:
+                continue
+
+            interval_supports = supports.get(interval, set())
+            domain = self.domains[neighbor]
+            remaining = [neighbor_interval for neighbor_interval in domain if neighbor_interval in interval_supports]
+            if len(remaining) != len(domain):
+                self.undo_stack.append(("domain", neighbor, domain))
+                self.domains[neighbor] = remaining
+
+    def _record_best(self, score: float):
+        if (self.best_score is None or score > self.best_score):
+            self.best_score = score
+            self.best_assignments = dict(self.assignments)
+            if self._on_improvement is not None:
+                self._on_improvement(score, self.best_assignments)
+
+    def _branch_and_bound(self, score: float):
+        self._expand_node()
+        # The deadline is only enforced once there is a schedule to hand back
+        if (
+            self._optimize_deadline is not None and self.best_assignments is not None and
+            self.nodes_expanded % CANCEL_CHECK_INTERVAL == 0 and time.monotonic() > self._optimize_deadline
+        ):
+            raise SearchTimeout()
+
+        undecided = [event for event in self.domains if event not in self.assignments and event not in self._dropped]
+        # Admissible bound: every undecided event that still has a value gets scheduled
+        bound = sum(self._scores[event] for event in undecided if self.domains[event])
+        if (self.best_score is not None and score + bound <= self.best_score):
+            return
+        if (len(undecided) == 0):
+            self._record_best(score)
+            return
+
+        # Events without values are dropped first, then the most valuable events are decided
+        event = max(undecided, key=lambda event: (not self.domains[event], self._scores[event], -len(self.domains[event])))
+        if self.domains[event]:
+            for sched_intrvl in self._order_values(event):
                 checkpoint = len(self.undo_stack)
-                if (self._assign(event, sched_intrvl) and self._backtrack()):
-                    return True
+                if (self._assign(event, sched_intrvl)):
+                    self._prune_neighbors(event, sched_intrvl)
+                    self._branch_and_bound(score + self._scores[event])
                 self._undo(checkpoint)
-        return False
\ No newline at end of file
+
+        checkpoint = len(self.undo_stack)
+        self._dropped.add(event)
+        self.undo_stack.append(("dropped", event, None))
+        self._branch_and_bound(score)
+        self._undo(checkpoint)
@@ -45,7 +45,7 @@ class Event:
         return f"Event(Task: {self._task.get_title()}, goal_value: {self._goal_value}, routine_value: {self._routine_value}, personal_value: {self._personal_value}, relational_value: {self._relational_value})"
 
     def __hash__(self):
-        return hash(self.__str__())
+        return hash((self._task.get_title(), self._goal_value, self._routine_value, self._personal_value, self._relational_value))
     
     def __repr__(self):
         return f"Event(title:{self._task._title}, description:{self._task._description})"
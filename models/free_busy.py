@@ -0,0 +1,51 @@
+from typing import Iterable, Iterator, List
+from datetime import timedelta
+import heapq
+from models.time_interval import TimeInterval
+
+def merge_busy(sources: Iterable, interval: TimeInterval) -> Iterator[TimeInterval]:
+    """Yields the union of the busy time of several Calendars or TimeTrees within interval, in order.
+
+    Each source streams its busy time slots through iter_busy in start order, and a heap holding
+    the next slot of each merges them, so k sources with n slots in all take O(n log k).
+    """
+    streams = [source.iter_busy(interval) for source in sources]
+    heap = []
+    for index, stream in enumerate(streams):
+        first = next(stream, None)
+        if first is not None:
+            heap.append((first[0].start_date, first[0].end_date, index))
+    heapq.heapify(heap)
+
+    start = end = None
+    while heap:
+        slot_start, slot_end, index = heap[0]
+        following = next(streams[index], None)
+        if following is None:
+            heapq.heappop(heap)
+        else:
+            heapq.heapreplace(heap, (following[0].start_date, following[0].end_date, index))
+
+        slot_start, slot_end = max(slot_start, interval.start_date), min(slot_end, interval.end_date)
+        if end is not None and slot_start <= end:
+            end = max(end, slot_end)
+            continue
+        if end is not None:
+            yield TimeInterval(start, end)
+        start, end = slot_start, slot_end
+    if end is not None:
+        yield TimeInterval(start, end)
+
+def free_slots(sources: Iterable, interval: TimeInterval, min_length: timedelta = timedelta(0)) -> List[TimeInterval]:
+    """Gaps within interval at least min_length long in which none of the sources is busy."""
+    if min_length < timedelta(0):
+        raise ValueError("min_length must not be negative")
+    free = []
+    free_start = interval.start_date
+    for busy in merge_busy(sources, interval):
+        if busy.start_date > free_start and busy.start_date - free_start >= min_length:
+            free.append(TimeInterval(free_start, busy.start_date))
+        free_start = max(free_start, busy.end_date)
+    if interval.end_date > free_start and interval.end_date - free_start >= min_length:
+        free.append(TimeInterval(free_start, interval.end_date))
+    return free
@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Iterator, Tuple
 from datetime import datetime
 from dataclasses import dataclass, field
 from models.task import Task
@@ -8,31 +8,61 @@ from models.temporal_task import TemporalTask
 @dataclass
 class Goal(TemporalTask):
     _subgoals: Dict[str, Task] = field(default_factory=dict)
+    _subgoal_list: List[Task] = field(default_factory=list, repr=False, compare=False)
+    # Aggregate counters over this goal's subtree, kept up to date on every
+    # add / remove / complete so progress reads never walk the tree.
+    # _completed_steps counts this goal and every completed descendant,
+    # _total_steps counts every descendant (not including this goal).
     _completed_steps: int = 0
+    _total_steps: int = 0
     
     def __init__(self, title: str, description: str, start_date: datetime, end_date: datetime, startline: Optional[datetime] = None, deadline: Optional[datetime] = None):
         super().__init__(title, description, start_date, end_date, start_date, end_date)
 
         self._subgoals = {}
+        self._subgoal_list = []
         self._completed_steps = 0
+        self._total_steps = 0
 
     def __str__(self):
-        return self._build_tree_str(self)
+        return "\n".join(self.iter_tree_lines())
 
-    def _build_tree_str(self, node, prefix="", is_last=True) -> str:
-        connector = "└── " if is_last else "├── "
-        lines = [prefix + connector + str(node.get_title())]
+    def _iter_subtree(self) -> Iterator[Tuple[Task, int]]:
+        # Pre-order walk using an explicit stack, so arbitrarily deep goal
+        # chains never hit the recursion limit. Yields (node, depth).
+        stack = [(self, 0)]
+        while stack:
+            node, depth = stack.pop()
+            yield node, depth
 
-        new_prefix = prefix + ("    " if is_last else "│   ")
-        
-        if (isinstance(node, Goal)):
-            child_count = len(node._subgoals)
+            if isinstance(node, Goal):
+                for child in reversed(node._subgoal_list):
+                    stack.append((child, depth + 1))
+
+    def iter_tree_lines(self, max_depth: Optional[int] = None, max_width: Optional[int] = None) -> Iterator[str]:
+        """Lazily yields the rendered lines of this goal's tree.
+
+        Subtrees below max_depth are collapsed into a single summary line,
+        and every line is cut to max_width characters.
+        """
+        stack = [(self, "", True, 0)]
+        while stack:
+            node, prefix, is_last, depth = stack.pop()
+            line = prefix + ("└── " if is_last else "├── ") + str(node.get_title())
+            yield line if max_width is None else line[:max_width]
+
+            if not isinstance(node, Goal) or not node._subgoal_list:
+                continue
 
-            for i, child in enumerate(node._subgoals.values()):
-                is_last_child = (i == child_count - 1)
-                lines.append(self._build_tree_str(child, new_prefix, is_last_child))
+            new_prefix = prefix + ("    " if is_last else "│   ")
+            if max_depth is not None and depth >= max_depth:
+                line = new_prefix + f"└── ... ({node._total_steps} more)"
+                yield line if max_width is None else line[:max_width]
+                continue
 
-        return "\n".join(lines)
+            child_count = len(node._subgoal_list)
+            for i in range(child_count - 1, -1, -1):
+                stack.append((node._subgoal_list[i], new_prefix, i == child_count - 1, depth + 1))
 
     def _check_index(self, index):
         if index is None or index < 0 or index >= len(self._subgoals):
@@ -54,25 +84,39 @@ class Goal(TemporalTask):
                 "Goal can not have a start_date, end_date, startline or deadline before or past this goal's start / end"
             )
     
+    def _subtree_counts(self, goal: Task):
+        # Returns the (completed, total) contribution of goal to its parent
+        if isinstance(goal, Goal):
+            return goal._completed_steps, goal._total_steps + 1
+        return int(goal._completed), 1
+
+    def _update_progress(self, completed_delta: int, total_delta: int):
+        goal = self
+        while goal is not None:
+            goal._completed_steps += completed_delta
+            goal._total_steps += total_delta
+            goal = goal._parent
+
+    def _detach_subgoal(self, goal: Task):
+        self._subgoal_list.remove(goal)
+        goal._parent = None
+
+        completed, total = self._subtree_counts(goal)
+        self._update_progress(-completed, -total)
+
     def get_completion_status(self):
-        completed = self._completed
-        for subgoal in self._subgoals.values():
-            completed += subgoal.get_completion_status()
-        return int(completed)
+        return self._completed_steps
 
     def get_num_subgoals(self):
-        count = len(self._subgoals)
-        for subgoal in self._subgoals.values():
-            if (isinstance(subgoal, Goal)):
-                count += subgoal.get_num_subgoals()
-        return count
+        return self._total_steps
+
+    def get_subgoal_at(self, index: int):
+        self._check_index(index)
+        return self._subgoal_list[index]
 
     def get_subgoal(self, key):
         if isinstance(key, int):
-            self._check_index(key)
-            values = list(self._subgoals.values())
-            self._check_index(key)
-            return values[key]
+            return self.get_subgoal_at(key)
         elif isinstance(key, str):
             if key in self._subgoals:
                 return self._subgoals[key]
@@ -80,27 +124,46 @@ class Goal(TemporalTask):
         raise TypeError("Key must be an int or str")
     
     def get_subgoals(self):
-        return list(self._subgoals.values())
+        return self._subgoal_list.copy()
+
+    def _complete_subtree(self):
+        # Marks every node under this goal completed without notifying the
+        # parent chain, and returns how many nodes changed state
+        changed = 0
+        for node, _ in self._iter_subtree():
+            if not node._completed:
+                node._completed = True
+                changed += 1
+            if isinstance(node, Goal):
+                node._completed_steps = node._total_steps + 1
+        return changed
 
     def set_completed(self):
-        for subgoal in self._subgoals.values():
-            subgoal.set_completed()
-        self._completed = True
+        changed = self._complete_subtree()
+        if changed and self._parent is not None:
+            self._parent._update_progress(changed, 0)
     
     def add_subgoal(self, goal: Task):
         self._check_time_period(goal)
 
+        if goal._title in self._subgoals:
+            self._detach_subgoal(self._subgoals[goal._title])
+
         self._subgoals[goal._title] = goal
-        
-        # self._check_completion()
+        self._subgoal_list.append(goal)
+        goal._parent = self
+
+        completed, total = self._subtree_counts(goal)
+        self._update_progress(completed, total)
 
     def remove_subgoal(self, key):
         if isinstance(key, int):
             self._check_index(key)
-            del list(self._subgoals.values())[key]
+            goal = self._subgoal_list[key]
+            self._detach_subgoal(self._subgoals.pop(goal.get_title()))
         elif isinstance(key, str):
             if (key in self._subgoals):
-                self._subgoals.pop(key)
+                self._detach_subgoal(self._subgoals.pop(key))
                 return
             raise ValueError(f"Goal with title: {key} not found")
         else:
@@ -108,8 +171,7 @@ class Goal(TemporalTask):
         
     def complete_subgoal(self, key):
         if isinstance(key, int):
-            self._check_index(key)
-            list(self._subgoals.values())[int(key)].set_completed()
+            self.get_subgoal_at(key).set_completed()
         elif isinstance(key, str):
             if (key in self._subgoals):
                 self._subgoals[key].set_completed()
@@ -0,0 +1,168 @@
+from typing import List, Dict, Tuple
+from itertools import accumulate
+from dataclasses import dataclass
+import math
+import random
+from models.start_time_bitsets import StartTimeBitsets, iter_bits
+from models.solver_options import SolverOptions
+
+@dataclass
+class LocalSearch:
+    """Min-conflicts local search placing every event on one of its discretized start slots.
+
+    An event's conflicts are the slots it overlaps with its neighbors in the constraint graph,
+    so moving an event part of the way out of a clash already counts as progress. Conflict
+    counts are kept up to date, so a move only touches the moved event's neighbors.
+    """
+    model: StartTimeBitsets
+    values: List[List[int]]
+    starts: List[int]
+    conflicts: List[int]
+    total_conflicts: int
+    best_starts: List[int]
+    best_conflicts: int
+    tabu: Dict[Tuple[int, int], int]
+
+    def __init__(self, model: StartTimeBitsets, rng: random.Random, options: SolverOptions):
+        self.model = model
+        self._rng = rng
+        self._options = options
+        self.temperature = options.temperature
+        self.values = [list(iter_bits(bits)) for bits in model.bits]
+        self.tabu = {}
+
+        # Events on their own are never picked, conflicted events are kept in a list for random choice
+        self._conflicted = []
+        self._position = {}
+
+        # Greedy start: in order of latest possible start, each event takes the earliest
+        # start clashing with the fewest events placed before it
+        n = len(model.events)
+        self.starts = [None] * n
+        self.conflicts = [0] * n
+        self.total_conflicts = 0
+        for i in sorted(range(n), key=lambda i: self.values[i][-1]):
+            counts = self._slot_conflicts(i)
+            low = self.values[i][0]
+            self.starts[i] = min(self.values[i], key=lambda start: counts[start - low])
+
+            for j in model.neighbors[i]:
+                if self.starts[j] is not None:
+                    overlap = self._overlap(i, self.starts[i], j, self.starts[j])
+                    self.conflicts[i] += overlap
+                    self.conflicts[j] += overlap
+                    self.total_conflicts += overlap
+        for i in range(n):
+            self._update_conflicted(i)
+
+        self.best_starts = list(self.starts)
+        self.best_conflicts = self.total_conflicts
+
+    def _overlap(self, i: int, start_i: int, j: int, start_j: int):
+        return max(0, min(start_i + self.model.lengths[i], start_j + self.model.lengths[j]) - max(start_i, start_j))
+
+    def _update_conflicted(self, i: int):
+        if self.conflicts[i] and i not in self._position:
+            self._position[i] = len(self._conflicted)
+            self._conflicted.append(i)
+        elif not self.conflicts[i] and i in self._position:
+            last = self._conflicted.pop()
+            position = self._position.pop(i)
+            if last != i:
+                self._conflicted[position] = last
+                self._position[last] = position
+
+    def _slot_conflicts(self, i: int):
+        """Slots of overlap with placed neighbors for each start of i, indexed from i's first start."""
+        lengths = self.model.lengths
+        low, high = self.values[i][0], self.values[i][-1]
+
+        # The overlap with one neighbor is a trapezoid in the start of i, so it is added as
+        # four slope changes and integrated twice, costing O(degree + span) for every start
+        bends = []
+        for j in self.model.neighbors[i]:
+            start_j = self.starts[j]
+            if start_j is None:
+                continue
+            rising = start_j - lengths[i]
+            widest = min(lengths[i], lengths[j])
+            bends.extend(((rising, 1), (rising + widest, -1), (start_j + lengths[j] - widest, -1), (start_j + lengths[j], 1)))
+
+        base = min([low] + [position for position, _ in bends])
+        slope_changes = [0] * (high - base + 1)
+        for position, change in bends:
+            if position <= high:
+                slope_changes[position - base] += change
+
+        slopes = accumulate(slope_changes)
+        overlaps = list(accumulate(slopes, initial=0))
+        return overlaps[low - base:high - base + 1]
+
+    def move(self, i: int, start: int):
+        old_start = self.starts[i]
+        for j in self.model.neighbors[i]:
+            change = self._overlap(i, start, j, self.starts[j]) - self._overlap(i, old_start, j, self.starts[j])
+            if change:
+                self.conflicts[i] += change
+                self.conflicts[j] += change
+                self.total_conflicts += change
+                self._update_conflicted(j)
+        self.starts[i] = start
+        self._update_conflicted(i)
+
+        if self.total_conflicts < self.best_conflicts:
+            self.best_conflicts = self.total_conflicts
+            self.best_starts = list(self.starts)
+
+    def conflict_free_starts(self) -> Dict[int, int]:
+        """Best starts of a set of events with no overlap between them, kept greedily in index order."""
+        kept = {}
+        for i, start in enumerate(self.best_starts):
+            if all(self._overlap(i, start, j, kept[j]) == 0 for j in self.model.neighbors[i] if j in kept):
+                kept[i] = start
+        return kept
+
+    def step(self, iteration: int):
+        i = self._rng.choice(self._conflicted)
+        old_start = self.starts[i]
+        values = self.values[i]
+        if len(values) == 1:
+            return
+
+        counts = self._slot_conflicts(i)
+        low = values[0]
+        current = counts[old_start - low]
+
+        if self.temperature > 0:
+            # Annealing: a random other start, kept when better or with a chance shrinking as it cools
+            start = self._rng.choice(values)
+            delta = counts[start - low] - current
+            if start != old_start and (delta <= 0 or self._rng.random() < math.exp(-delta / self.temperature)):
+                self.move(i, start)
+            self.temperature *= self._options.cooling
+            return
+
+        if self._rng.random() < self._options.walk_probability:
+            start = self._rng.choice(values)
+        else:
+            fewest = None
+            candidates = []
+            for start in values:
+                if start == old_start:
+                    continue
+                count = counts[start - low]
+                # Tabu starts are allowed only when they would beat the best schedule so far
+                if self.tabu.get((i, start), -1) > iteration and self.total_conflicts - current + count >= self.best_conflicts:
+                    continue
+                if fewest is None or count < fewest:
+                    fewest = count
+                    candidates = [start]
+                elif count == fewest:
+                    candidates.append(start)
+            if not candidates:
+                return
+            start = self._rng.choice(candidates)
+
+        if start != old_start:
+            self.tabu[(i, old_start)] = iteration + self._options.tabu_tenure
+            self.move(i, start)
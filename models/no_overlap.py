@@ -0,0 +1,164 @@
+from typing import List, Optional, Tuple
+from dataclasses import dataclass
+from models.theta_lambda_tree import ThetaLambdaTree
+
+@dataclass
+class NoOverlap:
+    """Global no-overlap (disjunctive) constraint over tasks with integer start bounds.
+
+    Task i runs for lengths[i] and starts between est[i] and lst[i]. A pass runs overload
+    checking with edge finding, detectable precedences and not-first/not-last, each in
+    O(n log n) with a Θ-Λ tree, forward in time and on the mirrored tasks. The rules run
+    separately on clusters of tasks whose spans of time overlap, and a cluster's result is
+    remembered until its bounds change, so a search only pays for the part of the day it touched.
+    """
+    lengths: List[int]
+    memo_capacity: int
+
+    def __init__(self, lengths: List[int], memo_capacity: int = 4096):
+        self.lengths = lengths
+        self.memo_capacity = memo_capacity
+        self._memo = {}
+
+    def propagate(self, est: List[int], lst: List[int]) -> Optional[Tuple[List[int], List[int]]]:
+        """One pass of every rule, returns the tightened (est, lst) or None when no schedule exists."""
+        lengths = self.lengths
+        new_est, new_lst = list(est), list(lst)
+        for cluster in self._clusters(est, lst):
+            # A task alone in its span of time has nothing to overlap with
+            if len(cluster) == 1:
+                continue
+            key = (tuple(cluster), tuple(est[i] for i in cluster), tuple(lst[i] for i in cluster))
+            if key in self._memo:
+                bounds = self._memo[key]
+            else:
+                bounds = self._propagate_cluster(list(key[1]), list(key[2]), [lengths[i] for i in cluster])
+                if len(self._memo) >= self.memo_capacity:
+                    self._memo.clear()
+                self._memo[key] = bounds
+            if bounds is None:
+                return None
+            for i, start, latest in zip(cluster, *bounds):
+                new_est[i], new_lst[i] = start, latest
+        return new_est, new_lst
+
+    def _clusters(self, est: List[int], lst: List[int]) -> List[List[int]]:
+        """Splits the tasks into groups whose spans of time do not overlap, so no rule links two groups."""
+        clusters = []
+        reach = None
+        for i in sorted(range(len(est)), key=est.__getitem__):
+            if reach is None or est[i] >= reach:
+                clusters.append([])
+                reach = est[i]
+            clusters[-1].append(i)
+            reach = max(reach, lst[i] + self.lengths[i])
+        return clusters
+
+    def _propagate_cluster(self, est: List[int], lst: List[int], lengths: List[int]) -> Optional[Tuple[List[int], List[int]]]:
+        lct = [start + length for start, length in zip(lst, lengths)]
+        mirrored_est = [-end for end in lct]
+        mirrored_lct = [-start for start in est]
+
+        edge_found = _edge_finding(est, lct, lengths)
+        if edge_found is None:
+            return None
+        mirrored_edge_found = _edge_finding(mirrored_est, mirrored_lct, lengths)
+        if mirrored_edge_found is None:
+            return None
+        precedences = _detectable_precedences(est, lct, lengths)
+        mirrored_precedences = _detectable_precedences(mirrored_est, mirrored_lct, lengths)
+        not_last = _not_last(est, lct, lengths)
+        # Not-first is not-last on the mirrored tasks
+        not_first = _not_last(mirrored_est, mirrored_lct, lengths)
+
+        new_est = [max(values) for values in zip(edge_found, precedences, (-end for end in not_first))]
+        new_lct = [min(values) for values in zip(not_last, (-start for start in mirrored_edge_found), (-start for start in mirrored_precedences))]
+        new_lst = [end - length for end, length in zip(new_lct, lengths)]
+        if any(start > latest for start, latest in zip(new_est, new_lst)):
+            return None
+        return new_est, new_lst
+
+    def tighten(self, est: List[int], lst: List[int]) -> Optional[Tuple[List[int], List[int]]]:
+        """Repeats propagate() until the bounds stop moving."""
+        while True:
+            bounds = self.propagate(est, lst)
+            if bounds is None:
+                return None
+            if bounds == (est, lst):
+                return bounds
+            est, lst = bounds
+
+def _edge_finding(est: List[int], lct: List[int], lengths: List[int]) -> Optional[List[int]]:
+    n = len(est)
+    tree = ThetaLambdaTree(est, lengths, sorted(range(n), key=est.__getitem__))
+    tree.fill()
+
+    new_est = list(est)
+    by_lct = sorted(range(n), key=lct.__getitem__, reverse=True)
+    if n and tree.get_ect() > lct[by_lct[0]]:
+        return None
+    for k in range(n - 1):
+        tree.make_gray(by_lct[k])
+        j = by_lct[k + 1]
+        # Overload: the tasks ending by lct[j] do not fit before it
+        if tree.get_ect() > lct[j]:
+            return None
+        # A gray task that can not end before lct[j] together with Θ has to come after all of Θ
+        while tree.get_ect_gray() > lct[j]:
+            i = tree.get_responsible()
+            new_est[i] = max(new_est[i], tree.get_ect())
+            tree.remove(i)
+    return new_est
+
+
+def _detectable_precedences(est: List[int], lct: List[int], lengths: List[int]) -> List[int]:
+    n = len(est)
+    ect = [start + length for start, length in zip(est, lengths)]
+    lst = [end - length for end, length in zip(lct, lengths)]
+    tree = ThetaLambdaTree(est, lengths, sorted(range(n), key=est.__getitem__), gray=False)
+    by_lst = sorted(range(n), key=lst.__getitem__)
+    in_theta = [False] * n
+
+    new_est = list(est)
+    q = 0
+    for i in sorted(range(n), key=ect.__getitem__):
+        # Every task j with lst[j] < ect[i] has to come before i
+        while q < n and ect[i] > lst[by_lst[q]]:
+            tree.insert(by_lst[q])
+            in_theta[by_lst[q]] = True
+            q += 1
+        if in_theta[i]:
+            tree.remove(i)
+            new_est[i] = max(new_est[i], tree.get_ect())
+            tree.insert(i)
+        else:
+            new_est[i] = max(new_est[i], tree.get_ect())
+    return new_est
+
+
+def _not_last(est: List[int], lct: List[int], lengths: List[int]) -> List[int]:
+    n = len(est)
+    lst = [end - length for end, length in zip(lct, lengths)]
+    tree = ThetaLambdaTree(est, lengths, sorted(range(n), key=est.__getitem__), gray=False)
+    by_lst = sorted(range(n), key=lst.__getitem__)
+    in_theta = [False] * n
+
+    new_lct = list(lct)
+    q = 0
+    last = None
+    for i in sorted(range(n), key=lct.__getitem__):
+        while q < n and lct[i] > lst[by_lst[q]]:
+            last = by_lst[q]
+            tree.insert(last)
+            in_theta[last] = True
+            q += 1
+        if in_theta[i]:
+            tree.remove(i)
+            ect = tree.get_ect()
+            tree.insert(i)
+        else:
+            ect = tree.get_ect()
+        # The tasks starting before lct[i] can not all end before i starts, so i is not last among them
+        if ect > lst[i]:
+            new_lct[i] = min(new_lct[i], lst[last])
+    return new_lct
@@ -0,0 +1,56 @@
+from typing import Dict, FrozenSet, Set, Tuple, Optional
+from collections import OrderedDict
+from dataclasses import dataclass
+from models.time_interval import TimeInterval
+from models.event import Event
+
+Nogood = FrozenSet[Tuple[Event, TimeInterval]]
+
+@dataclass
+class NogoodStore:
+    """Bounded store of learned incompatible assignments, evicting the least recently used nogood."""
+    capacity: int
+    _nogoods: "OrderedDict[Nogood, None]"
+    _index: Dict[Tuple[Event, TimeInterval], Set[Nogood]]
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._nogoods = OrderedDict()
+        self._index = {}
+
+    def __len__(self):
+        return len(self._nogoods)
+
+    def __contains__(self, nogood: Nogood):
+        return nogood in self._nogoods
+
+    def add(self, nogood: Nogood):
+        if self.capacity <= 0 or not nogood:
+            return
+        if nogood in self._nogoods:
+            self._nogoods.move_to_end(nogood)
+            return
+
+        self._nogoods[nogood] = None
+        for pair in nogood:
+            if pair not in self._index:
+                self._index[pair] = set()
+            self._index[pair].add(nogood)
+
+        if len(self._nogoods) > self.capacity:
+            self._evict()
+
+    def _evict(self):
+        nogood, _ = self._nogoods.popitem(last=False)
+        for pair in nogood:
+            self._index[pair].discard(nogood)
+            if not self._index[pair]:
+                del self._index[pair]
+
+    def find_violated(self, event: Event, interval: TimeInterval, chosen: Dict[Event, TimeInterval]) -> Optional[Nogood]:
+        """Returns a nogood made true by assigning interval to event on top of the chosen values, if any."""
+        for nogood in self._index.get((event, interval), ()):
+            if all(other == event or chosen.get(other) == value for other, value in nogood):
+                self._nogoods.move_to_end(nogood)
+                return nogood
+        return None
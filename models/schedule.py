@@ -0,0 +1,41 @@
+from typing import Dict, List, Tuple, Optional
+from dataclasses import dataclass
+import bisect
+from models.time_interval import TimeInterval
+from models.event import Event
+
+@dataclass
+class Schedule:
+    """Materialized schedule of one day: where each event went, in time order, and what did not fit.
+
+    assignments only holds the events placed within day. With the interval domain model an
+    assigned interval is the narrowed window the event runs in rather than its exact time.
+    """
+    day: TimeInterval
+    status: str
+    assignments: Dict[Event, TimeInterval]
+    timeline: List[Tuple[TimeInterval, Event]]
+    unscheduled: List[Event]
+
+    def __init__(self, day: TimeInterval, status: str, assignments: Dict[Event, TimeInterval], unscheduled: List[Event]):
+        self.day = day
+        self.status = status
+        self.assignments = assignments
+        self.timeline = sorted(
+            ((interval, event) for event, interval in assignments.items()),
+            key=lambda entry: (entry[0].start_date, entry[0].end_date, entry[1].get_task().get_title())
+        )
+        self._starts = [interval.start_date for interval, _ in self.timeline]
+        self.unscheduled = sorted(unscheduled, key=lambda event: event.get_priority_score(), reverse=True)
+
+    def __len__(self):
+        return len(self.timeline)
+
+    def get_interval(self, event: Event) -> Optional[TimeInterval]:
+        """Interval the event was placed in, None when it is unscheduled or not on this day."""
+        return self.assignments.get(event)
+
+    def between(self, interval: TimeInterval) -> List[Tuple[TimeInterval, Event]]:
+        """Timeline entries overlapping interval, in time order."""
+        end = bisect.bisect_left(self._starts, interval.end_date)
+        return [entry for entry in self.timeline[:end] if entry[0].end_date > interval.start_date]
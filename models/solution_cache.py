@@ -0,0 +1,80 @@
+from typing import Dict, List, Tuple, Optional
+from collections import OrderedDict
+from datetime import datetime
+from dataclasses import dataclass, astuple
+from models.time_interval import TimeInterval
+from models.event import Event
+from models.solver_options import SolverOptions
+
+Fingerprint = Tuple
+
+@dataclass
+class SolutionCache:
+    """LRU cache of day schedules keyed by the shape of the day rather than its events or date.
+
+    A fingerprint lists every event's duration and domain relative to midnight in a canonical
+    order, plus the arcs between positions in that order, so days with the same routines at the
+    same times share an entry and a hit is shifted onto the new day's events and midnight.
+    """
+    capacity: int
+    hits: int
+    misses: int
+    evictions: int
+    _entries: "OrderedDict[Fingerprint, Tuple[str, Tuple]]"
+
+    def __init__(self, capacity: int = 256):
+        if capacity < 0:
+            raise ValueError("capacity can not be negative")
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def fingerprint(self, midnight: datetime, domains: Dict[Event, List[TimeInterval]], arcs, options: SolverOptions) -> Tuple[Fingerprint, List[Event]]:
+        """Returns the fingerprint of a day's CSP and its events in the fingerprint's order."""
+        def shape(event: Event):
+            return (event.get_duration(), tuple(sorted((interval.start_date - midnight, interval.end_date - midnight) for interval in domains[event])))
+
+        shapes = {event: shape(event) for event in domains}
+        events = sorted(domains, key=shapes.__getitem__)
+        index = {event: i for i, event in enumerate(events)}
+        # Events with the same shape can be ordered either way, so isomorphic days may still
+        # miss, but a hit always has exactly the same constraints between the same positions
+        edges = tuple(sorted({tuple(sorted((index[a], index[b]))) for a, b in arcs if a in index and b in index}))
+
+        return (astuple(options), tuple(shapes[event] for event in events), edges), events
+
+    def get(self, fingerprint: Fingerprint, events: List[Event], midnight: datetime) -> Optional[Tuple[str, Dict[Event, TimeInterval]]]:
+        """Returns the cached status and assignments moved onto events and midnight, or None on a miss."""
+        entry = self._entries.get(fingerprint)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(fingerprint)
+        self.hits += 1
+
+        status, offsets = entry
+        assignments = {
+            event: TimeInterval(midnight + offset[0], midnight + offset[1])
+            for event, offset in zip(events, offsets)
+            if offset is not None
+        }
+        return status, assignments
+
+    def put(self, fingerprint: Fingerprint, events: List[Event], midnight: datetime, status: str, assignments: Dict[Event, TimeInterval]):
+        if self.capacity <= 0:
+            return
+        offsets = tuple(
+            (assignments[event].start_date - midnight, assignments[event].end_date - midnight) if event in assignments else None
+            for event in events
+        )
+        self._entries[fingerprint] = (status, offsets)
+        self._entries.move_to_end(fingerprint)
+
+        if len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+            self.evictions += 1
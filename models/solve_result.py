@@ -0,0 +1,36 @@
+from typing import Dict, Optional
+from dataclasses import dataclass
+from models.time_interval import TimeInterval
+from models.event import Event
+from models.solver_stats import SolverStats
+
+SOLVED = "solved"
+INFEASIBLE = "infeasible"
+TIMEOUT = "timeout"
+CANCELLED = "cancelled"
+STATUSES = (SOLVED, INFEASIBLE, TIMEOUT, CANCELLED)
+
+@dataclass
+class SolveResult:
+    """Outcome of a solve: its status, the most complete assignment reached and search stats.
+
+    Truthy only when the status is solved, so it can be tested like the old boolean result.
+    stats is only set when the solve ran with options.instrument.
+    """
+    status: str
+    assignments: Dict[Event, TimeInterval]
+    nodes_expanded: int
+    elapsed: float
+    stats: Optional[SolverStats]
+
+    def __init__(self, status: str, assignments: Dict[Event, TimeInterval], nodes_expanded: int = 0, elapsed: float = 0.0, stats: Optional[SolverStats] = None):
+        if status not in STATUSES:
+            raise ValueError(f"status must be one of {STATUSES}")
+        self.status = status
+        self.assignments = assignments
+        self.nodes_expanded = nodes_expanded
+        self.elapsed = elapsed
+        self.stats = stats
+
+    def __bool__(self):
+        return self.status == SOLVED
@@ -0,0 +1,99 @@
+from typing import List, Optional
+from datetime import timedelta
+from dataclasses import dataclass
+
+VARIABLE_ORDERINGS = ("static", "mrv", "degree")
+VALUE_ORDERINGS = ("static", "lcv")
+DOMAIN_MODELS = ("interval", "bitset")
+SEARCHES = ("systematic", "local")
+NO_OVERLAPS = ("pairwise", "global")
+
+@dataclass
+class SolverOptions:
+    # static keeps the domain dict order, mrv picks the smallest remaining domain
+    # (ties broken by degree) and degree picks the most constrained event
+    variable_ordering: str = "mrv"
+    # static keeps the domain order, lcv tries the values ruling out the fewest neighbor values first
+    value_ordering: str = "lcv"
+    forward_checking: bool = True
+    # Conflict-directed backjumping on top of forward checking, learning nogoods
+    # into an LRU store holding at most nogood_capacity entries (0 disables learning)
+    backjumping: bool = True
+    nogood_capacity: int = 1000
+    # Solve each connected component of the constraint graph on its own, farming them
+    # out to a process pool of max_workers processes when max_workers is above 1
+    decompose: bool = True
+    max_workers: int = 0
+    # Breaks variable and value ordering ties randomly when set, and restarts the
+    # search after restart_nodes nodes (growing each time) when above 0
+    random_seed: Optional[int] = None
+    restart_nodes: int = 0
+    # interval searches over whole schedule windows, bitset over start times every granularity
+    # stored as int bitsets, always maintaining arc consistency and never backjumping
+    domain_model: str = "interval"
+    granularity: timedelta = timedelta(minutes=5)
+    # systematic runs the searches above, local runs min-conflicts over start times every granularity
+    # for at most max_iterations moves or time_limit seconds, seeded by random_seed
+    search: str = "systematic"
+    max_iterations: int = 100000
+    time_limit: Optional[float] = None
+    # Local search only moves an event back to a start it left within tabu_tenure moves when that
+    # beats the best schedule so far, and picks a random start with walk_probability. A temperature
+    # above 0 switches to simulated annealing, multiplying the temperature by cooling every move
+    tabu_tenure: int = 10
+    walk_probability: float = 0.1
+    temperature: float = 0.0
+    cooling: float = 0.999
+    # pairwise propagates the arcs between overlapping events. global replaces them in the bitset model
+    # with one no-overlap constraint over the whole day (edge finding, not-first/not-last, detectable
+    # precedences and timetabling) and, whatever the model, refutes infeasible days before searching
+    no_overlap: str = "pairwise"
+    # Collects SolverStats on the result and in stats_registry.registry, off by default
+    # so the hot paths only pay a None check
+    instrument: bool = False
+
+    def __post_init__(self):
+        if self.variable_ordering not in VARIABLE_ORDERINGS:
+            raise ValueError(f"variable_ordering must be one of {VARIABLE_ORDERINGS}")
+        if self.value_ordering not in VALUE_ORDERINGS:
+            raise ValueError(f"value_ordering must be one of {VALUE_ORDERINGS}")
+        if self.nogood_capacity < 0:
+            raise ValueError("nogood_capacity can not be negative")
+        if self.max_workers < 0:
+            raise ValueError("max_workers can not be negative")
+        if self.restart_nodes < 0:
+            raise ValueError("restart_nodes can not be negative")
+        if self.domain_model not in DOMAIN_MODELS:
+            raise ValueError(f"domain_model must be one of {DOMAIN_MODELS}")
+        if self.granularity <= timedelta(0):
+            raise ValueError("granularity must be positive")
+        if self.search not in SEARCHES:
+            raise ValueError(f"search must be one of {SEARCHES}")
+        if self.max_iterations < 0:
+            raise ValueError("max_iterations can not be negative")
+        if self.time_limit is not None and self.time_limit < 0:
+            raise ValueError("time_limit can not be negative")
+        if self.tabu_tenure < 0:
+            raise ValueError("tabu_tenure can not be negative")
+        if not 0 <= self.walk_probability <= 1:
+            raise ValueError("walk_probability must be between 0 and 1")
+        if self.temperature < 0:
+            raise ValueError("temperature can not be negative")
+        if not 0 < self.cooling <= 1:
+            raise ValueError("cooling must be above 0 and at most 1")
+        if self.no_overlap not in NO_OVERLAPS:
+            raise ValueError(f"no_overlap must be one of {NO_OVERLAPS}")
+
+def default_portfolio(size: int = 4) -> List[SolverOptions]:
+    # Deterministic configurations and a local search first, then randomized restarting searches with different seeds
+    portfolio = [
+        SolverOptions(),
+        SolverOptions(search="local", random_seed=0),
+        SolverOptions(backjumping=False),
+        SolverOptions(variable_ordering="degree"),
+    ]
+    seed = 1
+    while len(portfolio) < size:
+        portfolio.append(SolverOptions(random_seed=seed, restart_nodes=100))
+        seed += 1
+    return portfolio[:size]
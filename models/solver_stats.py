@@ -0,0 +1,47 @@
+from typing import Dict
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+import time
+
+@dataclass
+class SolverStats:
+    """Counters and per-phase wall times of one solve, collected when options.instrument is set.
+
+    arcs counts arcs revised by arc consistency, revisions those revisions that removed values
+    and values_removed every domain value pruned by propagation or forward checking.
+    """
+    arcs: int = 0
+    revisions: int = 0
+    values_removed: int = 0
+    nodes: int = 0
+    backtracks: int = 0
+    max_undo_depth: int = 0
+    overlaps: int = 0
+    phases: Dict[str, float] = field(default_factory=dict)
+
+    @contextmanager
+    def timed(self, phase: str):
+        """Adds the wall time spent in the with block to phase."""
+        started = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.add_time(phase, time.perf_counter() - started)
+
+    def add_time(self, phase: str, seconds: float):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def merge(self, other: "SolverStats"):
+        """Adds other's counters and phase times to these, e.g. for a component solved apart."""
+        self.arcs += other.arcs
+        self.revisions += other.revisions
+        self.values_removed += other.values_removed
+        self.nodes += other.nodes
+        self.backtracks += other.backtracks
+        self.max_undo_depth = max(self.max_undo_depth, other.max_undo_depth)
+        self.overlaps += other.overlaps
+        for phase, seconds in other.phases.items():
+            self.add_time(phase, seconds)
+
+    def as_dict(self) -> Dict:
+        return asdict(self)
@@ -0,0 +1,141 @@
+from typing import Dict
+from collections import deque, Counter
+from dataclasses import dataclass
+import json
+import threading
+import time
+from models.event import Event
+from models.time_interval import TimeInterval
+
+ASSIGN = "assign"
+UNDO = "undo"
+PRUNE = "prune"
+
+@dataclass
+class SolverTrace:
+    """Sampled trace of solver events written to path as JSON lines by a background thread.
+
+    Searches only append raw records to a ring buffer of capacity entries, keeping one in every
+    sample_every, and the thread formats and appends them to the file every flush_interval
+    seconds. When the buffer fills faster than it is flushed the oldest records are dropped.
+    """
+    path: str
+    sample_every: int
+    capacity: int
+    flush_interval: float
+    recorded: int
+    dropped: int
+
+    def __init__(self, path: str, sample_every: int = 1, capacity: int = 65536, flush_interval: float = 0.5):
+        if sample_every < 1:
+            raise ValueError("sample_every must be at least 1")
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        if flush_interval <= 0:
+            raise ValueError("flush_interval must be positive")
+        self.path = path
+        self.sample_every = sample_every
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.recorded = 0
+        self.dropped = 0
+        self._seen = 0
+        self._buffer = deque(maxlen=capacity)
+        self._started = time.perf_counter()
+        self._file = open(path, "w")
+        self._write({"kind": "trace", "sample_every": sample_every})
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="solver-trace", daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def assign(self, event: Event, interval: TimeInterval):
+        self._record(ASSIGN, event, interval)
+
+    def undo(self, event: Event):
+        self._record(UNDO, event, None)
+
+    def prune(self, event: Event, removed: int):
+        self._record(PRUNE, event, removed)
+
+    def _record(self, kind: str, event: Event, value):
+        self._seen += 1
+        if self._seen % self.sample_every:
+            return
+        if len(self._buffer) == self.capacity:
+            self.dropped += 1
+        self._buffer.append((time.perf_counter(), kind, event, value))
+        self.recorded += 1
+
+    def flush(self):
+        """Writes every buffered record now."""
+        with self._lock:
+            while self._buffer:
+                moment, kind, event, value = self._buffer.popleft()
+                record = {"t": round(moment - self._started, 6), "kind": kind, "event": event.get_task().get_title()}
+                if kind == ASSIGN:
+                    record["start"] = value.start_date.isoformat()
+                    record["end"] = value.end_date.isoformat()
+                elif kind == PRUNE:
+                    record["removed"] = value
+                self._write(record)
+            self._file.flush()
+
+    def close(self):
+        """Stops the flushing thread, writes what is left and closes the file."""
+        if self._file.closed:
+            return
+        self._stop.set()
+        self._thread.join()
+        self.flush()
+        self._file.close()
+
+    def _write(self, record: Dict):
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+def summarize_trace(path: str, top: int = 10) -> Dict:
+    """Counts a trace file's records by kind and finds the events assigned and undone the most.
+
+    Counts are scaled by the trace's sample_every to estimate the full solve.
+    """
+    sample_every = 1
+    kinds = Counter()
+    assigns = Counter()
+    undos = Counter()
+    removed = 0
+    first = last = None
+    with open(path) as f:
+        for line in f:
+            record = json.loads(line)
+            if record["kind"] == "trace":
+                sample_every = record["sample_every"]
+                continue
+            kinds[record["kind"]] += 1
+            first = record["t"] if first is None else first
+            last = record["t"]
+            if record["kind"] == ASSIGN:
+                assigns[record["event"]] += 1
+            elif record["kind"] == UNDO:
+                undos[record["event"]] += 1
+            elif record["kind"] == PRUNE:
+                removed += record["removed"]
+
+    return {
+        "sample_every": sample_every,
+        "records": sum(kinds.values()),
+        "span": 0.0 if first is None else last - first,
+        "estimated": {kind: count * sample_every for kind, count in kinds.items()},
+        "values_removed": removed * sample_every,
+        "most_assigned": assigns.most_common(top),
+        "most_undone": undos.most_common(top),
+    }
@@ -0,0 +1,200 @@
+from typing import List, Dict, Tuple, Optional
+from datetime import datetime, timedelta
+from dataclasses import dataclass
+from models.time_interval import TimeInterval
+from models.event import Event
+from models.no_overlap import NoOverlap
+
+def range_mask(low: int, high: int) -> int:
+    """Bitset with every bit from low to high (inclusive) set."""
+    low = max(low, 0)
+    if high < low:
+        return 0
+    return ((1 << (high - low + 1)) - 1) << low
+
+def spread_down(mask: int, length: int) -> int:
+    """Bitset of the starts s where a run of length bits from s meets mask."""
+    result = mask
+    span = 1
+    while span < length:
+        step = min(span, length - span)
+        result |= result >> step
+        span += step
+    return result
+
+def iter_bits(bits: int):
+    while bits:
+        lowest = bits & -bits
+        yield lowest.bit_length() - 1
+        bits ^= lowest
+
+def popcount(bits: int) -> int:
+    # int.bit_count() needs Python 3.10
+    return bin(bits).count("1")
+
+@dataclass
+class StartTimeBitsets:
+    """Discretized CSP model where each event's domain is the set of start slots it can take.
+
+    Slot s stands for the start time origin + s * granularity and is bit s of the event's
+    domain int. An event occupies lengths[i] slots, so keeping two events apart is a
+    shift of a run of bits followed by an AND. With no_overlap the pairwise arcs are replaced by
+    one NoOverlap constraint over every event plus timetabling on their compulsory parts, and
+    neighbors are only used by the search heuristics.
+    """
+    events: List[Event]
+    origin: datetime
+    granularity: timedelta
+    lengths: List[int]
+    bits: List[int]
+    neighbors: List[List[int]]
+    trail: List[Tuple[int, int]]
+    no_overlap: Optional[NoOverlap]
+
+    def __init__(self, domains: Dict[Event, List[TimeInterval]], neighbors: Dict[Event, Dict], granularity: timedelta, no_overlap: bool = False):
+        self.events = list(domains.keys())
+        index = {event: i for i, event in enumerate(self.events)}
+        self.granularity = granularity
+
+        earliest = min((interval.start_date for intervals in domains.values() for interval in intervals), default=datetime.min)
+        midnight = datetime(earliest.year, earliest.month, earliest.day)
+        self.origin = midnight + ((earliest - midnight) // granularity) * granularity
+
+        self.lengths = []
+        self.bits = []
+        for event in self.events:
+            duration = event.get_duration()
+            self.lengths.append(-(-duration // granularity))
+
+            bits = 0
+            for interval in domains[event]:
+                first = -((self.origin - interval.start_date) // granularity)
+                last = (interval.end_date - duration - self.origin) // granularity
+                bits |= range_mask(first, last)
+            self.bits.append(bits)
+
+        self.neighbors = [sorted(index[neighbor] for neighbor in neighbors.get(event, {}) if neighbor in index) for event in self.events]
+        self.trail = []
+        self.no_overlap = NoOverlap(self.lengths) if no_overlap else None
+
+    def forbidden(self, i: int, start: int, j: int) -> int:
+        """Start slots of j that overlap i starting at slot start."""
+        return range_mask(start - self.lengths[j] + 1, start + self.lengths[i] - 1)
+
+    def _set_bits(self, i: int, bits: int):
+        self.trail.append((i, self.bits[i]))
+        self.bits[i] = bits
+
+    def _revise(self, j: int, i: int):
+        """Removes the starts of j overlapping every start left for i, returns whether j's first or last start moved."""
+        bits_i = self.bits[i]
+        low = (bits_i & -bits_i).bit_length() - 1
+        high = bits_i.bit_length() - 1
+        # Starts of j that overlap both i's earliest and latest start overlap all of them
+        first = high - self.lengths[j] + 1
+        last = low + self.lengths[i] - 1
+        if last < first:
+            return False
+
+        bits_j = self.bits[j]
+        unsupported = bits_j & range_mask(first, last)
+        if not unsupported:
+            return False
+
+        remaining = bits_j & ~unsupported
+        self._set_bits(j, remaining)
+        # Only the bounds of j are used to revise its neighbors, so interior removals need no requeue
+        return not remaining or (remaining & -remaining) != (bits_j & -bits_j) or remaining.bit_length() != bits_j.bit_length()
+
+    def propagate(self, changed) -> bool:
+        """Restores arc consistency after the domains in changed shrank, returns False on a wipeout."""
+        if self.no_overlap is not None:
+            return self._propagate_global()
+        queue = list(changed)
+        queued = set(queue)
+        while queue:
+            i = queue.pop()
+            queued.discard(i)
+            if not self.bits[i]:
+                return False
+            for j in self.neighbors[i]:
+                if self._revise(j, i):
+                    if not self.bits[j]:
+                        return False
+                    if j not in queued:
+                        queue.append(j)
+                        queued.add(j)
+        return True
+
+    def _timetable(self, low: List[int], high: List[int]) -> bool:
+        # Slots every start left for an event covers are taken, so no other event can start over them
+        parts = []
+        taken = 0
+        for i, length in enumerate(self.lengths):
+            if high[i] < low[i] + length:
+                part = range_mask(high[i], low[i] + length - 1)
+                if taken & part:
+                    return False
+                taken |= part
+                parts.append(part)
+            else:
+                parts.append(0)
+        if not taken:
+            return True
+
+        for i, length in enumerate(self.lengths):
+            remaining = self.bits[i] & ~spread_down(taken & ~parts[i], length)
+            if remaining != self.bits[i]:
+                if not remaining:
+                    return False
+                self._set_bits(i, remaining)
+        return True
+
+    def _propagate_global(self) -> bool:
+        while True:
+            if not all(self.bits):
+                return False
+            checkpoint = len(self.trail)
+            low = [(bits & -bits).bit_length() - 1 for bits in self.bits]
+            high = [bits.bit_length() - 1 for bits in self.bits]
+            if not self._timetable(low, high):
+                return False
+
+            low = [(bits & -bits).bit_length() - 1 for bits in self.bits]
+            high = [bits.bit_length() - 1 for bits in self.bits]
+            bounds = self.no_overlap.propagate(low, high)
+            if bounds is None:
+                return False
+            if bounds == (low, high):
+                if len(self.trail) == checkpoint:
+                    return True
+                continue
+            for i, (first, last) in enumerate(zip(*bounds)):
+                if (first, last) != (low[i], high[i]):
+                    remaining = self.bits[i] & range_mask(first, last)
+                    if not remaining:
+                        return False
+                    self._set_bits(i, remaining)
+
+    def assign(self, i: int, start: int) -> bool:
+        self._set_bits(i, 1 << start)
+        return self.propagate([i])
+
+    def removed_since(self, checkpoint: int) -> Dict[int, int]:
+        """Number of start slots removed from each domain since the trail was checkpoint long."""
+        before = {}
+        for i, bits in self.trail[checkpoint:]:
+            before.setdefault(i, bits)
+        return {i: popcount(bits & ~self.bits[i]) for i, bits in before.items()}
+
+    def undo(self, checkpoint: int):
+        while len(self.trail) > checkpoint:
+            i, bits = self.trail.pop()
+            self.bits[i] = bits
+
+    def count_ruled_out(self, i: int, start: int, assigned: List[bool]) -> int:
+        return sum(popcount(self.bits[j] & self.forbidden(i, start, j)) for j in self.neighbors[i] if not assigned[j])
+
+    def decode(self, i: int) -> TimeInterval:
+        start = self.origin + ((self.bits[i] & -self.bits[i]).bit_length() - 1) * self.granularity
+        return TimeInterval(start, start + self.events[i].get_duration())
@@ -0,0 +1,43 @@
+from typing import List
+from collections import deque
+from dataclasses import dataclass
+import threading
+from models.solver_stats import SolverStats
+
+@dataclass
+class StatsRegistry:
+    """Rolling, thread-safe record of the stats of the last capacity instrumented solves."""
+    capacity: int
+
+    def __init__(self, capacity: int = 128):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self._entries = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def record(self, stats: SolverStats):
+        with self._lock:
+            self._entries.append(stats)
+
+    def recent(self) -> List[SolverStats]:
+        """Recorded stats, oldest first."""
+        with self._lock:
+            return list(self._entries)
+
+    def totals(self) -> SolverStats:
+        """Every recorded solve's counters and phase times added together."""
+        total = SolverStats()
+        for stats in self.recent():
+            total.merge(stats)
+        return total
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+# Every instrumented solve in this process is recorded here
+registry = StatsRegistry()
@@ -0,0 +1,40 @@
+from typing import FrozenSet, List, Optional
+from dataclasses import dataclass
+from models.time_interval import TimeInterval
+from models.change import Change
+
+@dataclass
+class Subscription:
+    """A consumer's position in a ChangeFeed and the kinds and window of changes it reads."""
+    kinds: FrozenSet[str]
+    window: Optional[TimeInterval]
+    position: int
+    batch_size: int
+
+    def __init__(self, feed, kinds: FrozenSet[str], window: Optional[TimeInterval], position: int, batch_size: int):
+        self._feed = feed
+        self.kinds = kinds
+        self.window = window
+        # Sequence number of the last change read, what a consumer saves to resume from
+        self.position = position
+        self.batch_size = batch_size
+
+    def __iter__(self):
+        """Yields every matching change already in the feed."""
+        while True:
+            batch = self.poll()
+            if not batch and self.position >= self._feed.sequence:
+                return
+            yield from batch
+
+    def matches(self, change: Change) -> bool:
+        return change.kind in self.kinds and (self.window is None or change.touches(self.window))
+
+    def poll(self, timeout: Optional[float] = 0) -> List[Change]:
+        """Returns up to batch_size matching changes after position and moves past them.
+
+        With a timeout it first waits up to that many seconds, or for ever when None, for a new
+        change. The batch can still be empty when the changes read did not match. Raises a
+        ValueError when changes the subscription has not read were dropped from the feed.
+        """
+        return self._feed._read(self, timeout)
@@ -1,7 +1,7 @@
 from __future__ import annotations
 from typing import Optional, TYPE_CHECKING
 from datetime import datetime
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 @dataclass
 class Task:
@@ -9,11 +9,13 @@ class Task:
     _description: str
     _completed: bool = False
     _deadline: Optional[datetime] = None
+    _parent: Optional[Task] = field(default=None, repr=False, compare=False)
 
     def __init__(self, title: str, description: str, deadline: Optional[datetime] = None):
         self._title = title
         self._description = description
         self._deadline = deadline
+        self._parent = None
 
     def __eq__(self, other):
         if TYPE_CHECKING:
@@ -46,4 +48,8 @@ class Task:
         return self._deadline
     
     def set_completed(self):
-        self._completed = True
\ No newline at end of file
+        if self._completed:
+            return
+        self._completed = True
+        if self._parent is not None:
+            self._parent._update_progress(1, 0)
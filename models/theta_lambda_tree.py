@@ -0,0 +1,116 @@
+from typing import List
+from dataclasses import dataclass
+
+NEG_INF = -(1 << 62)
+NONE = -1
+
+@dataclass
+class ThetaLambdaTree:
+    """Balanced tree over tasks ordered by earliest start, used by the no-overlap filtering rules.
+
+    Tasks are white (in Θ), gray (in Λ) or absent. The root holds the earliest completion time
+    of Θ and of Θ plus at most one gray task, together with the gray task responsible for it.
+    Every insert, recolor or removal updates one leaf to root path in O(log n). A tree built with
+    gray=False only keeps Θ, which is all detectable precedences and not-last need.
+    """
+    size: int
+    position: List[int]
+    sum_p: List[int]
+    ect: List[int]
+    sum_p_gray: List[int]
+    ect_gray: List[int]
+    responsible_p: List[int]
+    responsible_ect: List[int]
+
+    def __init__(self, est: List[int], lengths: List[int], order: List[int], gray: bool = True):
+        """order lists the tasks by ascending est and fixes their leaves."""
+        self._est = est
+        self._lengths = lengths
+        self._gray = gray
+        self.size = 1
+        while self.size < max(len(order), 1):
+            self.size *= 2
+        self.position = [0] * len(est)
+        for leaf, task in enumerate(order):
+            self.position[task] = self.size + leaf
+
+        nodes = 2 * self.size
+        self.sum_p = [0] * nodes
+        self.ect = [NEG_INF] * nodes
+        self.sum_p_gray = [0] * nodes
+        self.ect_gray = [NEG_INF] * nodes
+        self.responsible_p = [NONE] * nodes
+        self.responsible_ect = [NONE] * nodes
+
+    def fill(self):
+        """Inserts every task at once, building the tree bottom up in O(n)."""
+        for task, node in enumerate(self.position):
+            length = self._lengths[task]
+            self.sum_p[node] = self.sum_p_gray[node] = length
+            self.ect[node] = self.ect_gray[node] = self._est[task] + length
+        for node in range(self.size - 1, 0, -1):
+            self._combine(node)
+
+    def insert(self, task: int):
+        node = self.position[task]
+        length = self._lengths[task]
+        self.sum_p[node] = self.sum_p_gray[node] = length
+        self.ect[node] = self.ect_gray[node] = self._est[task] + length
+        self.responsible_p[node] = self.responsible_ect[node] = NONE
+        self._update(node)
+
+    def make_gray(self, task: int):
+        node = self.position[task]
+        self.sum_p[node] = 0
+        self.ect[node] = NEG_INF
+        self.sum_p_gray[node] = self._lengths[task]
+        self.ect_gray[node] = self._est[task] + self._lengths[task]
+        self.responsible_p[node] = self.responsible_ect[node] = task
+        self._update(node)
+
+    def remove(self, task: int):
+        node = self.position[task]
+        self.sum_p[node] = self.sum_p_gray[node] = 0
+        self.ect[node] = self.ect_gray[node] = NEG_INF
+        self.responsible_p[node] = self.responsible_ect[node] = NONE
+        self._update(node)
+
+    def _update(self, node: int):
+        node //= 2
+        while node:
+            self._combine(node)
+            node //= 2
+
+    def _combine(self, node: int):
+        left, right = 2 * node, 2 * node + 1
+        sum_p, ect = self.sum_p, self.ect
+        sum_p[node] = sum_p[left] + sum_p[right]
+        ect_right, ect_left = ect[right], ect[left] + sum_p[right]
+        ect[node] = ect_right if ect_right > ect_left else ect_left
+        if self._gray:
+            # A gray task adds its length on the left or on the right, whichever gains more
+            if self.sum_p_gray[left] + self.sum_p[right] > self.sum_p[left] + self.sum_p_gray[right]:
+                self.sum_p_gray[node] = self.sum_p_gray[left] + self.sum_p[right]
+                self.responsible_p[node] = self.responsible_p[left]
+            else:
+                self.sum_p_gray[node] = self.sum_p[left] + self.sum_p_gray[right]
+                self.responsible_p[node] = self.responsible_p[right]
+
+            best, responsible = self.ect_gray[right], self.responsible_ect[right]
+            if self.ect[left] + self.sum_p_gray[right] > best:
+                best, responsible = self.ect[left] + self.sum_p_gray[right], self.responsible_p[right]
+            if self.ect_gray[left] + self.sum_p[right] > best:
+                best, responsible = self.ect_gray[left] + self.sum_p[right], self.responsible_ect[left]
+            self.ect_gray[node] = best
+            self.responsible_ect[node] = responsible
+
+    # Node 1 is the root, and also the only leaf of a tree over a single task
+    def get_ect(self) -> int:
+        return self.ect[1]
+
+    def get_ect_gray(self) -> int:
+        return self.ect_gray[1]
+
+    def get_responsible(self) -> int:
+        """Gray task whose addition gives get_ect_gray()."""
+        return self.responsible_ect[1]
@@ -29,7 +29,7 @@ class TimeInterval:
         return f"({self.start_date}, {self.end_date})"
     
     def __hash__(self):
-        return hash(self.__str__())
+        return hash((self.start_date, self.end_date))
       
     def get_start_date(self):
         return self.start_date
@@ -1,6 +1,7 @@
-from typing import List
+from typing import List, Iterator, Tuple
 from datetime import datetime
 from dataclasses import dataclass
+import heapq
 from models.time_interval import TimeInterval
 from models.time_tree_node import TimeTreeNode
 from models.event import Event
@@ -48,11 +49,13 @@ class TimeTree:
             node.left.max if node.left else datetime.min,
             node.right.max if node.right else datetime.min
         )
+        node.min = node.left.min if node.left else node.key.start_date
         child_node.max = max(
             child_node.key.end_date,
             child_node.left.max if child_node.left else datetime.min,
             child_node.right.max if child_node.right else datetime.min
         )
+        child_node.min = child_node.left.min if child_node.left else child_node.key.start_date
 
         return child_node
     
@@ -71,11 +74,13 @@ class TimeTree:
             node.left.max if node.left else datetime.min,
             node.right.max if node.right else datetime.min
         )
+        node.min = node.left.min if node.left else node.key.start_date
         child_node.max = max(
             child_node.key.end_date,
             child_node.left.max if child_node.left else datetime.min,
             child_node.right.max if child_node.right else datetime.min
         )
+        child_node.min = child_node.left.min if child_node.left else child_node.key.start_date
 
         return child_node
     
@@ -100,6 +105,8 @@ class TimeTree:
         left_max = node.left.max if node.left else datetime.min
         right_max = node.right.max if node.right else datetime.min
         node.max = max(node.key.end_date, left_max, right_max)
+        # min is the earliest start in the subtree, which right subtree searches are pruned by
+        node.min = node.left.min if node.left else node.key.start_date
 
         balance = self._get_balance(node)
 
@@ -119,18 +126,20 @@ class TimeTree:
 
         return node
     
-    def _delete_node_recursive(self, node: TimeTreeNode, event: Event, key: TimeInterval):
+    def _delete_node_recursive(self, node: TimeTreeNode, event: Event, key: TimeInterval, moved: bool = False):
+        # moved is set when removing the successor whose key and events were moved up to a deleted node
         if node is None:
             return node
         
         if (key < node.key):
-            node.left = self._delete_node_recursive(node.left, event, key)
+            node.left = self._delete_node_recursive(node.left, event, key, moved)
         elif (key > node.key):
-            node.right = self._delete_node_recursive(node.right, event, key)
+            node.right = self._delete_node_recursive(node.right, event, key, moved)
         else:
-            node.remove_event(event)
+            if not moved:
+                node.remove_event(event)
             
-            if (node.get_num_events() == 0):
+            if (moved or node.get_num_events() == 0):
                     
                 if node.left is None or node.right is None:
                     temp = node.left if node.left else node.right
@@ -144,9 +153,10 @@ class TimeTree:
                     temp = self._min_value_node(node.right)
                     node.key = temp.key
                     node.events = temp.events
-                    node.right = self._delete_node_recursive(node.right, event, temp.key)
+                    node.right = self._delete_node_recursive(node.right, event, temp.key, True)
                 
-                self._size -= 1
+                if not moved:
+                    self._size -= 1
 
         if node is None:
             return node
@@ -156,6 +166,8 @@ class TimeTree:
         left_max = node.left.max if node.left else datetime.min
         right_max = node.right.max if node.right else datetime.min
         node.max = max(node.key.end_date, left_max, right_max)
+        # min is the earliest start in the subtree, which right subtree searches are pruned by
+        node.min = node.left.min if node.left else node.key.start_date
 
         balance = self._get_balance(node)
         
@@ -235,6 +247,58 @@ class TimeTree:
 
         return overlaps
 
+    def iter_busy(self, interval: TimeInterval) -> Iterator[Tuple[TimeInterval, Event]]:
+        """Yields (time slot, event) for each event whose time slot overlaps interval, in start order.
+
+        Walks the tree in order without building a list, skipping subtrees ending before interval.
+        A time slot lies within one of its event's windows, so it starts no earlier than that
+        window and is held back in a heap until no window left to visit starts before it.
+        """
+        pending = []
+        stack = []
+        node = self._root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left if node.left is not None and node.left.max >= interval.start_date else None
+            node = stack.pop()
+            if node.key.start_date > interval.end_date:
+                break
+            while pending and pending[0][0] <= node.key.start_date:
+                yield self._pop_busy(pending)
+            for event in node.get_events():
+                slot = event.get_time_slot()
+                # An event sits in a node per window, the one containing its time slot lists it
+                if node.key.start_date <= slot.start_date and slot.end_date <= node.key.end_date and slot.is_overlapping(interval):
+                    heapq.heappush(pending, (slot.start_date, slot.end_date, id(event), slot, event))
+            node = node.right
+        while pending:
+            yield self._pop_busy(pending)
+
+    def join(self, other: "TimeTree", window: TimeInterval) -> Iterator[Tuple[Event, Event]]:
+        """Yields (event of this tree, event of other) for every pair of time slots overlapping in window.
+
+        Sweeps both trees' busy streams in start order keeping the slots still running on each
+        side, so each slot is only compared with those it overlaps or that ended before it.
+        """
+        streams = (self.iter_busy(window), other.iter_busy(window))
+        heads = [next(stream, None) for stream in streams]
+        active = ([], [])
+        while heads[0] is not None or heads[1] is not None:
+            side = 0 if heads[1] is None or (heads[0] is not None and heads[0][0].start_date <= heads[1][0].start_date) else 1
+            slot, event = heads[side]
+            heads[side] = next(streams[side], None)
+
+            running = [entry for entry in active[1 - side] if entry[0].end_date >= slot.start_date]
+            active[1 - side][:] = running
+            for _, running_event in running:
+                yield (event, running_event) if side == 0 else (running_event, event)
+            active[side].append((slot, event))
+
+    def _pop_busy(self, pending: List) -> Tuple[TimeInterval, Event]:
+        *_, slot, event = heapq.heappop(pending)
+        return slot, event
+
     def sweepline_overlap_search(self, interval):
         """Finds all overlapping events within a given interval."""
         if not self._root:
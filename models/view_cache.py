@@ -0,0 +1,204 @@
+from typing import Dict, List, Tuple, Optional
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from dataclasses import dataclass
+import queue
+import threading
+from models.time_interval import TimeInterval
+from models.event import Event
+from models.calendar import Calendar
+
+VIEWS = ("day", "week", "month")
+
+ViewKey = Tuple[str, date]
+
+@dataclass
+class ViewCache:
+    """LRU cache of the TUI's day, week and month view models keyed by (view, anchor date).
+
+    Anchors are normalized to the day, the Monday of the week or the first of the month. Every
+    get() queues the views just before and after for a background thread to build, so paging
+    through them is a lookup. Views are built holding the calendar's lock, so never during an
+    edit. A calendar change drops the cached views whose span it touches, and a view built
+    while a change happened is not kept. An error building a view in the background is raised
+    by the next get() or wait().
+    """
+    calendar: Calendar
+    capacity: int
+    hits: int
+    misses: int
+    evictions: int
+    prefetched: int
+
+    def __init__(self, calendar: Calendar, capacity: int = 64, prefetch: bool = True):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.calendar = calendar
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.prefetched = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by every change, a view is only stored if none happened while it was built
+        self._generation = 0
+        self._queue = queue.Queue()
+        self._error = None
+        calendar.add_listener(self._on_change)
+
+        self._thread = None
+        if prefetch:
+            self._thread = threading.Thread(target=self._run, name="view-prefetch", daemon=True)
+            self._thread.start()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, view: str, anchor: date) -> Dict:
+        """Returns the view model of the view containing anchor, building it on a miss."""
+        key = self._key(view, anchor)
+        self._raise_error()
+        with self._lock:
+            model = self._entries.get(key)
+            if model is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+            generation = self._generation
+
+        if model is None:
+            model = self._render(key)
+            self._store(key, model, generation)
+
+        if self._thread is not None:
+            neighbors = (self._shift(key, -1), self._shift(key, 1))
+            with self._lock:
+                missing = [neighbor for neighbor in neighbors if neighbor not in self._entries]
+            for neighbor in missing:
+                self._queue.put(neighbor)
+        return model
+
+    def wait(self):
+        """Blocks until every queued prefetch has been built."""
+        self._queue.join()
+        self._raise_error()
+
+    def close(self):
+        """Stops the prefetch thread and stops listening to the calendar."""
+        self.calendar.remove_listener(self._on_change)
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def _raise_error(self):
+        with self._lock:
+            error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def _key(self, view: str, anchor: date) -> ViewKey:
+        if view not in VIEWS:
+            raise ValueError(f"view must be one of {VIEWS}")
+        anchor = date(anchor.year, anchor.month, anchor.day)
+        if view == "week":
+            anchor -= timedelta(days=anchor.weekday())
+        elif view == "month":
+            anchor = anchor.replace(day=1)
+        return view, anchor
+
+    def _shift(self, key: ViewKey, step: int) -> ViewKey:
+        view, anchor = key
+        if view == "day":
+            return view, anchor + timedelta(days=step)
+        if view == "week":
+            return view, anchor + timedelta(weeks=step)
+        month = anchor.month - 1 + step
+        return view, date(anchor.year + month // 12, month % 12 + 1, 1)
+
+    def _days(self, key: ViewKey) -> List[date]:
+        view, anchor = key
+        if view == "day":
+            return [anchor]
+        if view == "week":
+            return [anchor + timedelta(days=offset) for offset in range(7)]
+        following = self._shift(key, 1)[1]
+        return [anchor + timedelta(days=offset) for offset in range((following - anchor).days)]
+
+    def _span(self, key: ViewKey) -> TimeInterval:
+        days = self._days(key)
+        return TimeInterval(datetime(days[0].year, days[0].month, days[0].day), datetime(days[-1].year, days[-1].month, days[-1].day, 23, 59, 59))
+
+    def _store(self, key: ViewKey, model: Dict, generation: int):
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[key] = model
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _on_change(self, kind: str, event: Optional[Event], intervals: List[TimeInterval]):
+        with self._lock:
+            self._generation += 1
+            for key in list(self._entries):
+                span = self._span(key)
+                if any(interval.is_overlapping(span) for interval in intervals):
+                    del self._entries[key]
+
+    def _run(self):
+        while True:
+            key = self._queue.get()
+            try:
+                if key is None:
+                    return
+                with self._lock:
+                    cached = key in self._entries
+                    generation = self._generation
+                if not cached:
+                    model = self._render(key)
+                    self._store(key, model, generation)
+                    with self._lock:
+                        self.prefetched += 1
+            except Exception as error:
+                # Kept for the owning thread to raise, the thread goes on with the next view
+                with self._lock:
+                    self._error = error
+            finally:
+                self._queue.task_done()
+
+    def _render(self, key: ViewKey) -> Dict:
+        view, anchor = key
+        with self.calendar.lock:
+            days = [self._render_day(day) for day in self._days(key)]
+        if view == "day":
+            return days[0]
+        title = f"Week of {anchor:%B} {anchor.day}, {anchor.year}" if view == "week" else f"{anchor:%B %Y}"
+        return {"date": title, "anchor": anchor, "days": days}
+
+    def _render_day(self, day: date) -> Dict:
+        # A solved day shows its schedule, any other day the time slots events were created with
+        day_start = datetime(day.year, day.month, day.day)
+        day_interval = TimeInterval(day_start, datetime(day.year, day.month, day.day, 23, 59, 59))
+        schedule = self.calendar.peek_schedule(day_start)
+        if schedule is not None:
+            timeline = schedule.timeline
+            unscheduled = schedule.unscheduled
+        else:
+            timeline = sorted(
+                ((event.get_time_slot(), event) for event in self.calendar.get_events(day_interval) if day_interval.start_date <= event.get_start_date() <= day_interval.end_date),
+                key=lambda entry: (entry[0].start_date, entry[0].end_date, entry[1].get_task().get_title())
+            )
+            unscheduled = []
+
+        return {
+            "date": f"{day:%A, %B} {day.day}, {day.year}",
+            "anchor": day,
+            "scheduled": schedule is not None,
+            "events": [{"time": interval, "title": event.get_task().get_title(), "event": event} for interval, event in timeline],
+            "unscheduled": [{"title": event.get_task().get_title(), "event": event} for event in unscheduled],
+        }
@@ -0,0 +1,53 @@
+from typing import Dict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+import atexit
+import multiprocessing
+import threading
+
+@dataclass
+class WorkerPools:
+    """Process pools kept between solves, one per worker count, created on first use.
+
+    Starting processes costs more than solving most components, so solves borrow a pool
+    here instead of starting their own. Pools outlive any one solve, so each solve stops
+    its workers through its own cancel event from new_cancel_event rather than one set up
+    with the processes.
+    """
+
+    def __init__(self):
+        self._pools: Dict[int, ProcessPoolExecutor] = {}
+        self._manager = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._pools)
+
+    def get(self, max_workers: int) -> ProcessPoolExecutor:
+        if max_workers <= 0:
+            raise ValueError("max_workers must be positive")
+        with self._lock:
+            if max_workers not in self._pools:
+                self._pools[max_workers] = ProcessPoolExecutor(max_workers=max_workers)
+            return self._pools[max_workers]
+
+    def new_cancel_event(self):
+        # Manager events can be passed with each task, unlike ones shared when a pool starts
+        with self._lock:
+            if self._manager is None:
+                self._manager = multiprocessing.Manager()
+            return self._manager.Event()
+
+    def shutdown(self):
+        """Stops every pool's processes, later solves start new ones."""
+        with self._lock:
+            pools, self._pools = list(self._pools.values()), {}
+            manager, self._manager = self._manager, None
+        for pool in pools:
+            pool.shutdown(cancel_futures=True)
+        if manager is not None:
+            manager.shutdown()
+
+# Every process pool solve in this process borrows its processes from here
+pools = WorkerPools()
+atexit.register(pools.shutdown)
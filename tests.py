@@ -1,6 +1,10 @@
 import unittest
+import os
+import tempfile
+import threading
+import time
 from models import *
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from models.time_interval import TimeInterval
 from models.task import Task
 from models.temporal_task import TemporalTask
@@ -9,7 +13,27 @@ from models.routine import Routine
 from models.event import Event
 from models.time_tree_node import TimeTreeNode
 from models.time_tree import TimeTree
-from models.calendar import Calendar
+from models.calendar import Calendar, INSERTED, REMOVED, SCHEDULED, COMPLETED
+from models.csp import CSP
+from models.solver_options import SolverOptions, default_portfolio
+from models.nogood_store import NogoodStore
+from models.start_time_bitsets import StartTimeBitsets
+from models.compatibility_tables import CompatibilityTables
+from models.solve_result import SolveResult, SOLVED
+from models.cancellation_token import CancellationToken
+from models.solution_cache import SolutionCache
+from models.no_overlap import NoOverlap
+from models.solver_stats import SolverStats
+from models.stats_registry import StatsRegistry, registry
+from models.solver_trace import SolverTrace, summarize_trace
+from models.schedule import Schedule
+from models.view_cache import ViewCache
+from models.async_calendar import AsyncCalendar
+from models.change_feed import ChangeFeed
+from models.calendar_host import CalendarHost, snapshot_path
+from models.free_busy import merge_busy, free_slots
+from models.worker_pools import WorkerPools, pools
+import asyncio
 
 print("\n\n")
 
@@ -296,7 +320,20 @@ class GoalTests(unittest.TestCase):
         goal = self.get_dummy_goal()
         goal.remove_subgoal(0)
         
-        self.assertEqual(7, goal.get_num_subgoals())
+        self.assertEqual(6, goal.get_num_subgoals())
+        self.assertEqual(["Subgoal A", "Subgoal B"], [subgoal.get_title() for subgoal in goal.get_subgoals()])
+
+    def test_remove_subgoal_by_index_progress(self):
+        goal = self.get_dummy_goal()
+        goal.complete_subgoal("Subgoal A")
+        self.assertEqual(2, goal.get_completion_status())
+
+        goal.remove_subgoal(1)
+
+        self.assertEqual(0, goal.get_completion_status())
+        self.assertEqual("0/5", goal.get_progress_fraction())
+        with self.assertRaises(ValueError):
+            goal.get_subgoal("Subgoal A")
         
     def test_remove_subgoal_invalid(self):
         goal = Goal("Root Goal", "Example text", datetime(2025, 10, 1, 2), datetime(2026, 10, 1, 3), datetime(2025, 10, 1, 2), datetime(2026, 10, 1, 3))        
@@ -365,6 +402,62 @@ class GoalTests(unittest.TestCase):
         goal.complete_subgoal("Subgoal A")
         self.assertAlmostEqual(28.57142857142857, goal.get_progress_percent())
 
+    def test_get_subgoal_at(self):
+        goal = self.get_dummy_goal()
+        self.assertEqual(goal.get_subgoal("Subgoal A"), goal.get_subgoal_at(1))
+        self.assertEqual(goal.get_subgoal("Subgoal B"), goal.get_subgoal_at(2))
+
+        with self.assertRaises(IndexError):
+            goal.get_subgoal_at(3)
+
+    def test_progress_updates_parent_chain(self):
+        goal = self.get_dummy_goal()
+
+        sub_goal_B = goal.get_subgoal("Subgoal B")
+        sub_goal_B.get_subgoal("Task").set_completed()
+        self.assertEqual("1/7", goal.get_progress_fraction())
+        self.assertEqual("1/3", sub_goal_B.get_progress_fraction())
+
+        sub_goal_BC = Goal("Subgoal BC", "Example text", datetime(2026, 5, 1), datetime(2026, 10, 1), datetime(2026, 5, 1), datetime(2026, 10, 1))
+        sub_goal_BC.add_subgoal(Task("Task BC", "Example text", datetime(2026, 6, 1)))
+        sub_goal_B.add_subgoal(sub_goal_BC)
+        self.assertEqual("1/9", goal.get_progress_fraction())
+
+        sub_goal_BC.set_completed()
+        self.assertEqual("3/9", goal.get_progress_fraction())
+
+        goal.remove_subgoal("Subgoal B")
+        self.assertEqual("0/3", goal.get_progress_fraction())
+
+    def test_iter_tree_lines(self):
+        goal = self.get_dummy_goal()
+        lines = list(goal.iter_tree_lines())
+
+        self.assertEqual(str(goal), "\n".join(lines))
+        self.assertEqual("└── Root Goal", lines[0])
+        self.assertEqual("    ├── Dummy Temporal Task", lines[1])
+        self.assertEqual("        └── Task", lines[-1])
+
+        self.assertEqual(["└── Root Goal", "    └── ... (7 more)"], list(goal.iter_tree_lines(max_depth=0)))
+        self.assertTrue(all(len(line) <= 10 for line in goal.iter_tree_lines(max_width=10)))
+
+    def test_deep_goal_chain(self):
+        goal = Goal("Goal 0", "Example text", datetime(2025, 10, 1), datetime(2026, 10, 1))
+        current = goal
+        for i in range(1, 2001):
+            subgoal = Goal(f"Goal {i}", "Example text", datetime(2025, 10, 1), datetime(2026, 10, 1))
+            current.add_subgoal(subgoal)
+            current = subgoal
+
+        self.assertEqual(2000, goal.get_num_subgoals())
+        self.assertEqual(2001, len(str(goal).splitlines()))
+
+        current.set_completed()
+        self.assertEqual("1/2000", goal.get_progress_fraction())
+
+        goal.set_completed()
+        self.assertEqual("2001/2000", goal.get_progress_fraction())
+
 class RoutineTests(unittest.TestCase):    
     def test_add_task(self):
         routine = Routine("Routine", "Example text", datetime(2025, 1, 1), datetime(2025, 1, 2))
@@ -1043,6 +1136,34 @@ class TimeTreeTests(unittest.TestCase):
         with self.assertRaises(ValueError):
             tree.search(TimeInterval(datetime(2025, 10, 1), datetime(2025, 10, 2)))
 
+    def test_overlap_search_matches_scan(self):
+        tree = TimeTree()
+        intervals = []
+        for i in range(40):
+            start = datetime(2025, 10, 2) + timedelta(minutes=(i * 37) % 600)
+            interval = TimeInterval(start, start + timedelta(minutes=10 + i % 7))
+            tree.insert(Event(TemporalTask(str(i), "", interval.start_date, interval.end_date), 20, 15, 10, 25))
+            intervals.append(interval)
+
+        query = TimeInterval(datetime(2025, 10, 2, 3), datetime(2025, 10, 2, 4))
+        found = sorted(int(match["event"].get_task().get_title()) for match in tree.overlap_search(query))
+        self.assertEqual([i for i, interval in enumerate(intervals) if interval.is_overlapping(query)], found)
+
+    def test_delete_node_with_two_children(self):
+        tree = TimeTree()
+        events = []
+        for day in (2, 1, 3):
+            event = Event(TemporalTask(str(day), "", datetime(2025, 10, day), datetime(2025, 10, day, 1)), 20, 15, 10, 25)
+            tree.insert(event)
+            events.append(event)
+
+        tree.delete(events[0])
+
+        self.assertEqual(2, tree.get_size())
+        self.assertEqual(events[2], tree.search(TimeInterval(datetime(2025, 10, 3), datetime(2025, 10, 3, 1))).get_event("3"))
+        with self.assertRaises(ValueError):
+            tree.search(TimeInterval(datetime(2025, 10, 2), datetime(2025, 10, 2, 1)))
+
     def test_overlap_search(self):
         tree = TimeTree()
         
@@ -1088,6 +1209,1138 @@ class TimeTreeTests(unittest.TestCase):
         # TODO: Test this overlap search function
         pass
 
+    def test_join(self):
+        home = FreeBusyTests().get_calendar([(9, 10), (12, 13), (17, 18)])._time_tree
+        work = FreeBusyTests().get_calendar([(8, 9.5), (9.25, 12.5), (14, 15), (17, 17.5)])._time_tree
+        window = TimeInterval(datetime(2025, 10, 2, 8), datetime(2025, 10, 2, 16))
+
+        pairs = sorted((a.get_task().get_title(), b.get_task().get_title()) for a, b in home.join(work, window))
+        self.assertEqual([("12", "9.25"), ("9", "8"), ("9", "9.25")], pairs)
+        self.assertEqual(sorted((b, a) for a, b in pairs), sorted((a.get_task().get_title(), b.get_task().get_title()) for a, b in work.join(home, window)))
+        self.assertEqual([], list(home.join(TimeTree(), window)))
+
+class CSPTests(unittest.TestCase):
+    def get_dummy_calendar(self):
+        cal = Calendar()
+
+        temp_task = TemporalTask("A", "A", datetime(2025, 10, 2, 1), datetime(2025, 10, 2, 2), None, None, [TimeInterval(datetime(2025, 10, 2, 4), datetime(2025, 10, 2, 5))])
+        cal.schedule_event(temp_task, 20, 15, 10, 25)
+
+        temp_task2 = TemporalTask("B", "B", datetime(2025, 10, 2, 3), datetime(2025, 10, 2, 5), None, None, [TimeInterval(datetime(2025, 10, 2, 5), datetime(2025, 10, 2, 6))])
+        cal.schedule_event(temp_task2, 20, 15, 10, 25)
+
+        temp_task3 = TemporalTask("C", "C", datetime(2025, 10, 2, 5), datetime(2025, 10, 2, 8), None, None, [TimeInterval(datetime(2025, 10, 2, 3), datetime(2025, 10, 2, 5))])
+        cal.schedule_event(temp_task3, 20, 15, 10, 25)
+
+        temp_task4 = TemporalTask("D", "D", datetime(2025, 10, 2, 7), datetime(2025, 10, 2, 7, 30), None, None, [TimeInterval(datetime(2025, 10, 2, 6), datetime(2025, 10, 2, 9))])
+        cal.schedule_event(temp_task4, 20, 15, 10, 25)
+
+        return cal
+
+    def get_dummy_csp(self, options=None):
+        cal = self.get_dummy_calendar()
+        arcs = cal._time_tree.sweepline_overlap_search(TimeInterval(datetime(2025, 10, 2), datetime(2025, 10, 2, 23, 59, 59)))
+
+        domains = {}
+        for event, neighbor in arcs.keys():
+            domains.setdefault(event, event.schedule_intervals)
+            domains.setdefault(neighbor, neighbor.schedule_intervals)
+
+        return CSP(domains, arcs, options)
+
+    def test_AC2001_matches_AC3(self):
+        ac3_csp = self.get_dummy_csp()
+        ac2001_csp = self.get_dummy_csp()
+
+        ac3_constraints = ac3_csp._AC3()
+        ac2001_constraints = ac2001_csp._AC2001()
+
+        self.assertEqual(ac3_csp.domains, ac2001_csp.domains)
+        for node in ac3_constraints:
+            for neighbor in ac3_constraints[node]:
+                expected = {value: supports for value, supports in ac3_constraints[node][neighbor].items() if supports}
+                self.assertEqual(expected, ac2001_constraints[node][neighbor])
+
+    def test_AC2001_removes_unsupported_values(self):
+        first = Event(TemporalTask("A", "A", datetime(2025, 10, 2, 1), datetime(2025, 10, 2, 2)), 20, 15, 10, 25)
+        second = Event(TemporalTask("B", "B", datetime(2025, 10, 2, 1), datetime(2025, 10, 2, 2), None, None, [TimeInterval(datetime(2025, 10, 2, 3), datetime(2025, 10, 2, 4))]), 20, 15, 10, 25)
+
+        csp = CSP({first: first.schedule_intervals, second: second.schedule_intervals})
+        csp.add_arc(first, second, first.get_time_slot(), second.get_time_slot())
+        csp.add_arc(second, first, second.get_time_slot(), first.get_time_slot())
+        csp._AC2001()
+
+        self.assertEqual([TimeInterval(datetime(2025, 10, 2, 1), datetime(2025, 10, 2, 2))], csp.domains[first])
+        self.assertEqual([TimeInterval(datetime(2025, 10, 2, 3), datetime(2025, 10, 2, 4))], csp.domains[second])
+
+    def test_compatibility_tables_match_constraint(self):
+        csp = self.get_dummy_csp()
+        tables = CompatibilityTables(csp.domains, csp.arcs)
+
+        for node, neighbor in csp.arcs:
+            for value in csp.domains[node]:
+                for neighbor_value in csp.domains[neighbor]:
+                    expected = bool(csp._time_interval_constraint(value, neighbor_value, node.get_duration(), neighbor.get_duration()))
+                    self.assertEqual(expected, tables.compatible(node, neighbor, value, neighbor_value))
+                    self.assertEqual(expected, tables.compatible(neighbor, node, neighbor_value, value))
+
+    def test_solve_with_each_ordering(self):
+        for variable_ordering in ("static", "mrv", "degree"):
+            for value_ordering in ("static", "lcv"):
+                for forward_checking in (False, True):
+                    csp = self.get_dummy_csp()
+                    csp.options = SolverOptions(variable_ordering, value_ordering, forward_checking)
+
+                    self.assertTrue(csp.solve())
+                    self.assertEqual(set(csp.domains.keys()), set(csp.assignments.keys()))
+
+    def test_solver_options_invalid(self):
+        with self.assertRaises(ValueError):
+            SolverOptions(variable_ordering="random")
+        with self.assertRaises(ValueError):
+            SolverOptions(value_ordering="most_constraining")
+
+    def test_forward_check(self):
+        first = Event(TemporalTask("X", "X", datetime(2025, 10, 2, 1), datetime(2025, 10, 2, 2), None, None, [TimeInterval(datetime(2025, 10, 2, 5), datetime(2025, 10, 2, 6))]), 20, 15, 10, 25)
+        second = Event(TemporalTask("Y", "Y", datetime(2025, 10, 2, 1), datetime(2025, 10, 2, 2), None, None, [TimeInterval(datetime(2025, 10, 2, 5), datetime(2025, 10, 2, 6))]), 20, 15, 10, 25)
+
+        csp = CSP({first: first.schedule_intervals, second: second.schedule_intervals})
+        csp.add_arc(first, second, first.get_time_slot(), second.get_time_slot())
+        csp.add_arc(second, first, second.get_time_slot(), first.get_time_slot())
+        csp._AC2001()
+        self.assertEqual(2, len(csp.domains[second]))
+
+        interval = TimeInterval(datetime(2025, 10, 2, 1), datetime(2025, 10, 2, 2))
+        checkpoint = len(csp.undo_stack)
+        self.assertTrue(csp._assign(first, interval))
+        self.assertTrue(csp._forward_check(first, interval))
+        self.assertEqual([TimeInterval(datetime(2025, 10, 2, 5), datetime(2025, 10, 2, 6))], csp.domains[second])
+
+        csp._undo(checkpoint)
+        self.assertEqual(2, len(csp.domains[second]))
+        self.assertNotIn(first, csp.assignments)
+
+    def test_backjump_matches_backtrack(self):
+        for backjumping in (False, True):
+            csp = self.get_dummy_csp()
+            csp.options = SolverOptions(backjumping=backjumping)
+            self.assertTrue(csp.solve())
+            self.assertEqual(set(csp.domains.keys()), set(csp.assignments.keys()))
+
+    def test_backjump_infeasible(self):
+        events = [
+            Event(TemporalTask(title, title, datetime(2025, 10, 2, 1), datetime(2025, 10, 2, 2), None, None, [TimeInterval(datetime(2025, 10, 2, 5), datetime(2025, 10, 2, 6))]), 20, 15, 10, 25)
+            for title in ("X", "Y", "Z")
+        ]
+
+        for backjumping, forward_checking in ((False, True), (True, True), (True, False)):
+            csp = CSP({event: event.schedule_intervals for event in events}, options=SolverOptions(backjumping=backjumping, forward_checking=forward_checking))
+            for event in events:
+                for neighbor in events:
+                    if event != neighbor:
+                        csp.add_arc(event, neighbor, event.get_time_slot(), neighbor.get_time_slot())
+
+            self.assertFalse(csp.solve())
+            self.assertEqual({}, csp.assignments)
+
+    def get_two_cluster_csp(self, options=None):
+        cal = self.get_dummy_calendar()
+
+        evening_task = TemporalTask("E", "E", datetime(2025, 10, 2, 18), datetime(2025, 10, 2, 19), None, None, [TimeInterval(datetime(2025, 10, 2, 20), datetime(2025, 10, 2, 21))])
+        cal.schedule_event(evening_task, 20, 15, 10, 25)
+        evening_task2 = TemporalTask("F", "F", datetime(2025, 10, 2, 18, 30), datetime(2025, 10, 2, 19, 30))
+        cal.schedule_event(evening_task2, 20, 15, 10, 25)
+
+        arcs = cal._time_tree.sweepline_overlap_search(TimeInterval(datetime(2025, 10, 2), datetime(2025, 10, 2, 23, 59, 59)))
+        domains = {}
+        for event, neighbor in arcs.keys():
+            domains.setdefault(event, event.schedule_intervals)
+            domains.setdefault(neighbor, neighbor.schedule_intervals)
+
+        return CSP(domains, arcs, options)
+
+    def test_get_components(self):
+        csp = self.get_two_cluster_csp()
+        csp._AC2001()
+        components = csp._get_components()
+
+        self.assertEqual(2, len(components))
+        self.assertEqual([["A", "B", "C", "D"], ["E", "F"]], sorted(sorted(event.get_task().get_title() for event in component) for component in components))
+
+    def test_solve_components(self):
+        whole_csp = self.get_two_cluster_csp(SolverOptions(decompose=False))
+        inline_csp = self.get_two_cluster_csp()
+        pool_csp = self.get_two_cluster_csp(SolverOptions(max_workers=2))
+
+        self.assertTrue(whole_csp.solve())
+        self.assertTrue(inline_csp.solve())
+        self.assertTrue(pool_csp.solve())
+
+        self.assertEqual(6, len(inline_csp.assignments))
+        self.assertEqual(inline_csp.assignments, pool_csp.assignments)
+
+    def test_solve_components_reuses_pool(self):
+        first_csp = self.get_two_cluster_csp(SolverOptions(max_workers=2))
+        second_csp = self.get_two_cluster_csp(SolverOptions(max_workers=2))
+
+        self.assertTrue(first_csp.solve())
+        executor = pools.get(2)
+        self.assertTrue(second_csp.solve())
+        self.assertIs(executor, pools.get(2))
+        self.assertEqual(first_csp.assignments, second_csp.assignments)
+
+    def test_worker_pools(self):
+        worker_pools = WorkerPools()
+        with self.assertRaises(ValueError):
+            worker_pools.get(0)
+
+        executor = worker_pools.get(2)
+        self.assertIs(executor, worker_pools.get(2))
+        self.assertEqual(1, len(worker_pools))
+        self.assertFalse(worker_pools.new_cancel_event().is_set())
+
+        worker_pools.shutdown()
+        self.assertEqual(0, len(worker_pools))
+        self.assertIsNot(executor, worker_pools.get(2))
+        worker_pools.shutdown()
+
+    def test_solve_randomized_restarts(self):
+        for seed in range(3):
+            csp = self.get_dummy_csp(SolverOptions(random_seed=seed, restart_nodes=1))
+            self.assertTrue(csp.solve())
+            self.assertEqual(set(csp.domains.keys()), set(csp.assignments.keys()))
+
+    def test_optimize_after_restarting_solve(self):
+        window = TimeInterval(datetime(2025, 10, 2, 9), datetime(2025, 10, 2, 12))
+        events = []
+        for k in range(6):
+            start = datetime(2025, 10, 2, 9) + timedelta(minutes=30 * k)
+            events.append(Event(TemporalTask(str(k), "", start, start + timedelta(minutes=30), None, None, [window]), 20, 15, 10, 25))
+        csp = CSP({event: event.schedule_intervals for event in events}, options=SolverOptions(restart_nodes=2, decompose=False))
+        for event in events:
+            for neighbor in events:
+                if event != neighbor:
+                    csp.add_arc(event, neighbor, window, window)
+
+        self.assertTrue(csp.solve())
+        csp.optimize()
+        self.assertTrue(csp.proved_optimal)
+        self.assertEqual([], csp.dropped)
+
+    def test_solve_portfolio(self):
+        csp = self.get_two_cluster_csp()
+        portfolio = default_portfolio(4)
+
+        self.assertTrue(csp.solve_portfolio(portfolio))
+        self.assertIn(csp.winning_options, portfolio)
+        self.assertEqual(set(csp.domains.keys()), set(csp.assignments.keys()))
+
+    def test_solve_portfolio_reuses_pool(self):
+        portfolio = default_portfolio(3)
+        first_csp = self.get_two_cluster_csp()
+        second_csp = self.get_two_cluster_csp()
+
+        self.assertTrue(first_csp.solve_portfolio(portfolio))
+        executor = pools.get(len(portfolio))
+        self.assertTrue(second_csp.solve_portfolio(portfolio))
+        self.assertIs(executor, pools.get(len(portfolio)))
+        self.assertEqual(set(second_csp.domains.keys()), set(second_csp.assignments.keys()))
+
+    def assert_valid_schedule(self, csp):
+        self.assertEqual(set(csp.domains.keys()), set(csp.assignments.keys()))
+        for event, interval in csp.assignments.items():
+            self.assertEqual(event.get_duration(), interval.get_duration())
+            self.assertTrue(any(window.start_date <= interval.start_date and interval.end_date <= window.end_date for window in event.schedule_intervals))
+            for other, other_interval in csp.assignments.items():
+                if other != event:
+                    self.assertFalse(interval.start_date < other_interval.end_date and other_interval.start_date < interval.end_date)
+
+    def test_local_search(self):
+        for temperature in (0.0, 1.0):
+            csp = self.get_two_cluster_csp(SolverOptions(search="local", random_seed=3, temperature=temperature))
+
+            self.assertTrue(csp.solve())
+            self.assert_valid_schedule(csp)
+
+    def test_local_search_reproducible(self):
+        schedules = []
+        for _ in range(2):
+            cal = self.get_dummy_calendar()
+            csp = cal.generate_schedule(datetime(2025, 10, 2), SolverOptions(search="local", random_seed=7, max_iterations=1000, time_limit=5))
+            schedules.append({event.get_task().get_title(): interval for event, interval in csp.assignments.items()})
+
+        self.assertEqual(4, len(schedules[0]))
+        self.assertEqual(schedules[0], schedules[1])
+
+    def test_local_search_budget(self):
+        # Any two of the three hour long events fit between 5 and 7, so only search finds there is no schedule
+        events = [
+            Event(TemporalTask(title, title, datetime(2025, 10, 2, 5), datetime(2025, 10, 2, 6), None, None, [TimeInterval(datetime(2025, 10, 2, 6), datetime(2025, 10, 2, 7))]), 20, 15, 10, 25)
+            for title in ("X", "Y", "Z")
+        ]
+        csp = CSP({event: [TimeInterval(datetime(2025, 10, 2, 5), datetime(2025, 10, 2, 7))] for event in events}, options=SolverOptions(search="local", random_seed=0, max_iterations=50))
+        for event in events:
+            for neighbor in events:
+                if event != neighbor:
+                    csp.add_arc(event, neighbor, event.get_time_slot(), neighbor.get_time_slot())
+
+        result = csp.solve()
+        self.assertFalse(result)
+        self.assertEqual("timeout", result.status)
+        self.assertEqual(50, csp.nodes_expanded)
+        self.assertEqual({}, csp.assignments)
+        # The partial schedule is the largest overlap free part of the best placement
+        self.assertEqual(2, len(result.assignments))
+
+    def test_local_search_options_invalid(self):
+        with self.assertRaises(ValueError):
+            SolverOptions(search="genetic")
+        with self.assertRaises(ValueError):
+            SolverOptions(walk_probability=1.5)
+        with self.assertRaises(ValueError):
+            SolverOptions(cooling=0)
+
+    def test_backjump_without_forward_checking(self):
+        for forward_checking in (False, True):
+            csp = self.get_dummy_csp()
+            csp.options = SolverOptions(forward_checking=forward_checking, backjumping=True)
+            checks = []
+            forward_check = csp._forward_check
+            csp._forward_check = lambda event, interval: checks.append(event) or forward_check(event, interval)
+
+            self.assertTrue(csp.solve())
+            self.assertEqual(set(csp.domains.keys()), set(csp.assignments.keys()))
+            self.assertEqual(forward_checking, len(checks) > 0)
+
+    def get_pigeonhole_csp(self, options=None, count=8, day=2, hours=None):
+        # count one hour events in a count - 1 hour window by default, which bounds propagation can not refute
+        hours = count - 1 if hours is None else hours
+        events = [
+            Event(TemporalTask(f"{day} {k}", "", datetime(2025, 10, day, 5), datetime(2025, 10, day, 6)), 20, 15, 10, 25)
+            for k in range(count)
+        ]
+        csp = CSP({event: [TimeInterval(datetime(2025, 10, day, 5), datetime(2025, 10, day, 5 + hours))] for event in events}, options=options)
+        for event in events:
+            for neighbor in events:
+                if event != neighbor:
+                    csp.add_arc(event, neighbor, event.get_time_slot(), neighbor.get_time_slot())
+        return csp
+
+    def test_solve_timeout(self):
+        csp = self.get_pigeonhole_csp(SolverOptions(domain_model="bitset", time_limit=0.1))
+
+        result = csp.solve()
+        self.assertFalse(result)
+        self.assertEqual("timeout", result.status)
+        self.assertGreater(len(result.assignments), 0)
+        self.assertLess(len(result.assignments), 8)
+        self.assertEqual({}, csp.assignments)
+
+        intervals = sorted(result.assignments.values(), key=lambda interval: interval.start_date)
+        for first, second in zip(intervals, intervals[1:]):
+            self.assertLessEqual(first.end_date, second.start_date)
+
+    def test_solve_cancelled(self):
+        token = CancellationToken()
+        token.cancel()
+        for options in (SolverOptions(domain_model="bitset"), SolverOptions(search="local", max_iterations=10 ** 9)):
+            result = self.get_pigeonhole_csp(options).solve(token)
+            self.assertEqual("cancelled", result.status)
+
+    def test_solve_result(self):
+        csp = self.get_dummy_csp()
+        result = csp.solve()
+        self.assertTrue(result)
+        self.assertEqual("solved", result.status)
+        self.assertEqual(csp.assignments, result.assignments)
+
+        with self.assertRaises(ValueError):
+            SolveResult("unknown", {})
+
+    def test_solve_components_timeout(self):
+        hard = self.get_pigeonhole_csp(day=2)
+        easy = self.get_pigeonhole_csp(count=2, day=3, hours=2)
+        for max_workers in (0, 2):
+            csp = CSP({**easy.domains, **hard.domains}, {**easy.arcs, **hard.arcs}, SolverOptions(domain_model="bitset", time_limit=0.2, max_workers=max_workers))
+
+            result = csp.solve()
+            self.assertEqual("timeout", result.status)
+            for event in easy.domains:
+                self.assertIn(event, result.assignments)
+
+    def test_resolve_after_insert(self):
+        cal = self.get_dummy_calendar()
+        day = datetime(2025, 10, 2)
+        options = SolverOptions(domain_model="bitset")
+        self.assertTrue(cal.generate_schedule(day, options))
+        csp = cal._day_csps[day]
+
+        task = TemporalTask("E", "E", datetime(2025, 10, 2, 8), datetime(2025, 10, 2, 8, 30), None, None, [TimeInterval(datetime(2025, 10, 2, 6, 15), datetime(2025, 10, 2, 9))])
+        cal.schedule_event(task, 20, 15, 10, 25)
+
+        result = cal.generate_schedule(day, options)
+        self.assertTrue(result)
+        self.assertIs(csp, cal._day_csps[day])
+        self.assertEqual(5, len(result.assignments))
+        self.assert_valid_schedule(csp)
+
+    def test_resolve_after_remove(self):
+        cal = self.get_dummy_calendar()
+        day = datetime(2025, 10, 2)
+        before = cal.generate_schedule(day)
+        nodes_expanded = before.nodes_expanded
+        removed = next(event for event in before.assignments if event.get_task().get_title() == "D")
+
+        cal.remove_event(removed)
+        result = cal.generate_schedule(day)
+
+        self.assertTrue(result)
+        self.assertNotIn(removed, result.assignments)
+        # Removing an event only loosens the day, so the rest of the schedule is kept without search
+        self.assertEqual(nodes_expanded, result.nodes_expanded)
+        for event, interval in result.assignments.items():
+            self.assertEqual(before.assignments[event], interval)
+
+    def test_resolve_keeps_tables(self):
+        cal = self.get_dummy_calendar()
+        day = datetime(2025, 10, 2)
+        self.assertTrue(cal.generate_schedule(day))
+        csp = cal._day_csps[day]
+
+        task = TemporalTask("E", "E", datetime(2025, 10, 2, 8), datetime(2025, 10, 2, 8, 30), None, None, [TimeInterval(datetime(2025, 10, 2, 6, 15), datetime(2025, 10, 2, 9))])
+        cal.schedule_event(task, 20, 15, 10, 25)
+        inserted = next(event for event in csp.domains if event.get_task() is task)
+
+        # Supports of the new arcs come from the tables and agree with the datetime predicate
+        self.assertIsNotNone(csp.tables)
+        for neighbor, supports in csp.constraints[inserted].items():
+            for value in csp.domains[inserted]:
+                expected = {other for other in csp.domains[neighbor] if csp._time_interval_constraint(value, other, inserted.get_duration(), neighbor.get_duration())}
+                self.assertEqual(expected, supports.get(value, set()))
+        self.assertIn(inserted, cal.generate_schedule(day).assignments)
+
+        cal.remove_event(inserted)
+        self.assertNotIn(inserted, csp.tables.index)
+        result = cal.generate_schedule(day)
+        self.assertTrue(result)
+        self.assertEqual(set(csp.domains), set(result.assignments))
+
+    def test_resolve_infeasible_insert(self):
+        csp = self.get_pigeonhole_csp(SolverOptions(domain_model="bitset"), count=2, hours=2)
+        self.assertTrue(csp.solve())
+        previous = dict(csp.assignments)
+
+        extra = Event(TemporalTask("extra", "", datetime(2025, 10, 2, 5), datetime(2025, 10, 2, 6)), 20, 15, 10, 25)
+        csp.insert_event(extra, [TimeInterval(datetime(2025, 10, 2, 5), datetime(2025, 10, 2, 7))], list(csp.domains))
+        self.assertEqual("infeasible", csp.resolve().status)
+
+        csp.remove_event(extra)
+        self.assertTrue(csp.resolve())
+        self.assertEqual(previous, csp.assignments)
+
+    def get_overconstrained_csp(self, options=None):
+        # Three one hour events that all have to fit between 5 and 6, with different priorities
+        events = [
+            Event(TemporalTask(title, title, datetime(2025, 10, 2, 5), datetime(2025, 10, 2, 6)), goal_value, 15, 10, 25)
+            for title, goal_value in (("Low", 5), ("High", 25), ("Mid", 15))
+        ]
+        csp = CSP({event: event.schedule_intervals for event in events}, options=options)
+        for event in events:
+            for neighbor in events:
+                if event != neighbor:
+                    csp.add_arc(event, neighbor, event.get_time_slot(), neighbor.get_time_slot())
+        return csp, events
+
+    def test_optimize_drops_lowest_priority(self):
+        csp, events = self.get_overconstrained_csp()
+        low, high, mid = events
+
+        self.assertFalse(csp.solve())
+        csp, events = self.get_overconstrained_csp()
+        score = csp.optimize()
+
+        self.assertTrue(csp.proved_optimal)
+        self.assertEqual([high], list(csp.assignments.keys()))
+        self.assertEqual({low, mid}, set(csp.dropped))
+        self.assertAlmostEqual(high.get_priority_score(), score)
+
+    def test_optimize_everything_fits(self):
+        csp = self.get_two_cluster_csp()
+        score = csp.optimize()
+
+        self.assertTrue(csp.proved_optimal)
+        self.assertEqual([], csp.dropped)
+        self.assertEqual(set(csp.domains.keys()), set(csp.assignments.keys()))
+        self.assertAlmostEqual(sum(event.get_priority_score() for event in csp.domains), score)
+
+    def test_optimize_anytime(self):
+        improvements = []
+        csp = self.get_two_cluster_csp()
+        score = csp.optimize(time_limit=0, on_improvement=lambda score, assignments: improvements.append((score, assignments)))
+
+        self.assertEqual(improvements, sorted(improvements, key=lambda improvement: improvement[0]))
+        self.assertEqual(score, improvements[-1][0])
+        self.assertEqual(csp.assignments, improvements[-1][1])
+
+    def test_bitset_domains(self):
+        csp = self.get_dummy_csp()
+        model = StartTimeBitsets(csp.domains, {}, timedelta(minutes=15))
+        event_d = next(event for event in model.events if event.get_duration() == timedelta(minutes=30))
+        i = model.events.index(event_d)
+
+        # D is 30 minutes long with windows 6-9 and 7-7:30, so it can start every 15 minutes from 6 to 8:30
+        self.assertEqual(datetime(2025, 10, 2, 1), model.origin)
+        self.assertEqual(2, model.lengths[i])
+        self.assertEqual(list(range(20, 31)), [slot for slot in range(64) if model.bits[i] >> slot & 1])
+
+    def test_bitset_solve(self):
+        for variable_ordering in ("static", "mrv", "degree"):
+            for value_ordering in ("static", "lcv"):
+                csp = self.get_two_cluster_csp(SolverOptions(variable_ordering, value_ordering, domain_model="bitset"))
+
+                self.assertTrue(csp.solve())
+                self.assertEqual(set(csp.domains.keys()), set(csp.assignments.keys()))
+                for event, interval in csp.assignments.items():
+                    self.assertEqual(event.get_duration(), interval.get_duration())
+                    self.assertTrue(any(window.start_date <= interval.start_date and interval.end_date <= window.end_date for window in event.schedule_intervals))
+                    for other, other_interval in csp.assignments.items():
+                        if other != event:
+                            self.assertFalse(interval.start_date < other_interval.end_date and other_interval.start_date < interval.end_date)
+
+    def test_bitset_infeasible(self):
+        first = Event(TemporalTask("X", "X", datetime(2025, 10, 2, 1), datetime(2025, 10, 2, 1, 30)), 20, 15, 10, 25)
+        second = Event(TemporalTask("Y", "Y", datetime(2025, 10, 2, 1, 15), datetime(2025, 10, 2, 1, 45)), 20, 15, 10, 25)
+
+        # Y can only sit at 1:15-1:45, which leaves no half hour for X between 1 and 2, so propagation fails before any search
+        csp = CSP({first: [TimeInterval(datetime(2025, 10, 2, 1), datetime(2025, 10, 2, 2))], second: second.schedule_intervals[:1]}, options=SolverOptions(domain_model="bitset"))
+        csp.add_arc(first, second, first.get_time_slot(), second.get_time_slot())
+        csp.add_arc(second, first, second.get_time_slot(), first.get_time_slot())
+
+        self.assertFalse(csp.solve())
+        self.assertEqual(0, csp.nodes_expanded)
+        self.assertEqual({}, csp.assignments)
+
+    def test_bitset_options_invalid(self):
+        with self.assertRaises(ValueError):
+            SolverOptions(domain_model="grid")
+        with self.assertRaises(ValueError):
+            SolverOptions(granularity=timedelta(0))
+
+    def test_no_overlap_tighten(self):
+        # A is fixed at 0-4, so C has to start at 4 or 5 and B, which no longer fits before C, goes after it
+        self.assertEqual(([0, 6, 4], [0, 7, 5]), NoOverlap([4, 3, 2]).tighten([0, 0, 1], [0, 7, 5]))
+        self.assertIsNone(NoOverlap([4, 3, 2]).tighten([0, 0, 1], [0, 2, 5]))
+        self.assertIsNone(NoOverlap([2, 2, 2]).tighten([0, 0, 0], [3, 3, 3]))
+
+    def test_no_overlap_refutes_before_search(self):
+        # Pairwise supports can not tell that eight one hour events do not fit in seven hours
+        for options in (SolverOptions(domain_model="bitset", no_overlap="global"), SolverOptions(no_overlap="global")):
+            csp = self.get_pigeonhole_csp(options)
+            result = csp.solve()
+            self.assertEqual("infeasible", result.status)
+            self.assertEqual(0, csp.nodes_expanded)
+
+    def test_no_overlap_solve(self):
+        csp = self.get_two_cluster_csp(SolverOptions(domain_model="bitset", no_overlap="global"))
+
+        self.assertTrue(csp.solve())
+        self.assertEqual(set(csp.domains.keys()), set(csp.assignments.keys()))
+        for event, interval in csp.assignments.items():
+            self.assertEqual(event.get_duration(), interval.get_duration())
+            for other, other_interval in csp.assignments.items():
+                if other != event:
+                    self.assertFalse(interval.start_date < other_interval.end_date and other_interval.start_date < interval.end_date)
+
+    def test_no_overlap_options_invalid(self):
+        with self.assertRaises(ValueError):
+            SolverOptions(no_overlap="bogus")
+
+    def test_instrument_stats(self):
+        for options in (SolverOptions(instrument=True), SolverOptions(domain_model="bitset", instrument=True), SolverOptions(decompose=False, backjumping=False, instrument=True)):
+            csp = self.get_two_cluster_csp(options)
+            result = csp.solve()
+
+            self.assertTrue(result)
+            self.assertIs(csp.stats, result.stats)
+            self.assertEqual(csp.nodes_expanded, result.stats.nodes)
+            self.assertGreater(result.stats.arcs, 0)
+            self.assertIn("propagation", result.stats.phases)
+            self.assertIn("search", result.stats.phases)
+            self.assertIs(result.stats, registry.recent()[-1])
+
+    def test_instrument_counts_backtracks(self):
+        csp = self.get_pigeonhole_csp(SolverOptions(domain_model="bitset", instrument=True), count=4)
+        result = csp.solve()
+
+        self.assertEqual("infeasible", result.status)
+        self.assertGreater(result.stats.backtracks, 0)
+        self.assertGreater(result.stats.values_removed, 0)
+        self.assertGreater(result.stats.max_undo_depth, 0)
+
+    def test_instrument_disabled(self):
+        csp = self.get_two_cluster_csp()
+        recorded = len(registry)
+        result = csp.solve()
+
+        self.assertIsNone(result.stats)
+        self.assertIsNone(csp.stats)
+        self.assertEqual(min(recorded, registry.capacity), len(registry))
+
+class NogoodStoreTests(unittest.TestCase):
+    def get_dummy_pairs(self):
+        event = Event(TemporalTask("A", "A", datetime(2025, 10, 2, 1), datetime(2025, 10, 2, 2)), 20, 15, 10, 25)
+        neighbor = Event(TemporalTask("B", "B", datetime(2025, 10, 2, 1), datetime(2025, 10, 2, 2)), 20, 15, 10, 25)
+        intervals = [TimeInterval(datetime(2025, 10, 2, hour), datetime(2025, 10, 2, hour + 1)) for hour in range(3)]
+        return event, neighbor, intervals
+
+    def test_find_violated(self):
+        event, neighbor, intervals = self.get_dummy_pairs()
+        store = NogoodStore(10)
+        nogood = frozenset({(event, intervals[0]), (neighbor, intervals[1])})
+        store.add(nogood)
+
+        self.assertEqual(nogood, store.find_violated(event, intervals[0], {neighbor: intervals[1]}))
+        self.assertIsNone(store.find_violated(event, intervals[0], {neighbor: intervals[2]}))
+        self.assertIsNone(store.find_violated(event, intervals[1], {neighbor: intervals[1]}))
+
+    def test_lru_eviction(self):
+        event, neighbor, intervals = self.get_dummy_pairs()
+        store = NogoodStore(2)
+        nogoods = [frozenset({(event, interval), (neighbor, interval)}) for interval in intervals]
+
+        store.add(nogoods[0])
+        store.add(nogoods[1])
+        store.find_violated(event, intervals[0], {neighbor: intervals[0]})
+        store.add(nogoods[2])
+
+        self.assertEqual(2, len(store))
+        self.assertIn(nogoods[0], store)
+        self.assertNotIn(nogoods[1], store)
+        self.assertIsNone(store.find_violated(event, intervals[1], {neighbor: intervals[1]}))
+
+    def test_disabled(self):
+        event, neighbor, intervals = self.get_dummy_pairs()
+        store = NogoodStore(0)
+        store.add(frozenset({(event, intervals[0])}))
+        self.assertEqual(0, len(store))
+
+class StatsRegistryTests(unittest.TestCase):
+    def test_rolling_window(self):
+        stats_registry = StatsRegistry(2)
+        for nodes in (1, 2, 3):
+            stats_registry.record(SolverStats(nodes=nodes, phases={"search": 0.5}))
+
+        self.assertEqual([2, 3], [stats.nodes for stats in stats_registry.recent()])
+        totals = stats_registry.totals()
+        self.assertEqual(5, totals.nodes)
+        self.assertEqual(1.0, totals.phases["search"])
+
+        stats_registry.clear()
+        self.assertEqual(0, len(stats_registry))
+
+    def test_merge(self):
+        stats = SolverStats(arcs=1, max_undo_depth=4, phases={"search": 1.0})
+        stats.merge(SolverStats(arcs=2, max_undo_depth=3, phases={"search": 0.5, "sweepline": 0.25}))
+
+        self.assertEqual(3, stats.arcs)
+        self.assertEqual(4, stats.max_undo_depth)
+        self.assertEqual({"search": 1.5, "sweepline": 0.25}, stats.phases)
+
+    def test_invalid_capacity(self):
+        with self.assertRaises(ValueError):
+            StatsRegistry(0)
+
+class SolverTraceTests(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".jsonl")
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def get_event(self, title):
+        return Event(TemporalTask(title, "", datetime(2025, 10, 2, 1), datetime(2025, 10, 2, 2)), 20, 15, 10, 25)
+
+    def test_search_trace(self):
+        csp = CSPTests().get_pigeonhole_csp(SolverOptions(domain_model="bitset"), count=4)
+        with SolverTrace(self.path) as trace:
+            csp.trace = trace
+            self.assertEqual("infeasible", csp.solve().status)
+
+        summary = summarize_trace(self.path)
+        self.assertGreater(summary["estimated"]["assign"], 0)
+        self.assertGreater(summary["estimated"]["undo"], 0)
+        self.assertGreater(summary["values_removed"], 0)
+        self.assertEqual(trace.recorded, summary["records"])
+
+    def test_sampling(self):
+        event = self.get_event("A")
+        with SolverTrace(self.path, sample_every=3) as trace:
+            for _ in range(9):
+                trace.undo(event)
+
+        summary = summarize_trace(self.path)
+        self.assertEqual(3, summary["records"])
+        self.assertEqual({"undo": 9}, summary["estimated"])
+        self.assertEqual([("A", 3)], summary["most_undone"])
+
+    def test_ring_buffer_drops_oldest(self):
+        event = self.get_event("A")
+        with SolverTrace(self.path, capacity=2, flush_interval=60) as trace:
+            for removed in range(1, 6):
+                trace.prune(event, removed)
+
+        self.assertEqual(3, trace.dropped)
+        self.assertEqual(4 + 5, summarize_trace(self.path)["values_removed"])
+
+    def test_calendar_trace(self):
+        cal = CalendarTests().get_two_day_calendar()
+        with SolverTrace(self.path) as trace:
+            cal.trace = trace
+            self.assertTrue(cal.generate_schedule(datetime(2025, 10, 2)))
+
+        assigned = {event for event, _ in summarize_trace(self.path)["most_assigned"]}
+        self.assertTrue({"P", "Q"} <= assigned)
+
+    def test_invalid_arguments(self):
+        for arguments in ({"sample_every": 0}, {"capacity": 0}, {"flush_interval": 0}):
+            with self.assertRaises(ValueError):
+                SolverTrace(self.path, **arguments)
+
+class ScheduleTests(unittest.TestCase):
+    def test_timeline(self):
+        events = [Event(TemporalTask(title, "", datetime(2025, 10, 2, hour), datetime(2025, 10, 2, hour + 1)), 20, 15, 10, 25) for title, hour in (("B", 9), ("A", 7), ("C", 12))]
+        day = TimeInterval(datetime(2025, 10, 2), datetime(2025, 10, 2, 23, 59, 59))
+        schedule = Schedule(day, "solved", {event: event.get_time_slot() for event in events[:2]}, events[2:])
+
+        self.assertEqual(["A", "B"], [event.get_task().get_title() for _, event in schedule.timeline])
+        self.assertEqual(events[2:], schedule.unscheduled)
+        self.assertIsNone(schedule.get_interval(events[2]))
+        self.assertEqual(events[0].get_time_slot(), schedule.get_interval(events[0]))
+        self.assertEqual([events[0]], [event for _, event in schedule.between(TimeInterval(datetime(2025, 10, 2, 8), datetime(2025, 10, 2, 12)))])
+        self.assertEqual([], schedule.between(TimeInterval(datetime(2025, 10, 2, 10), datetime(2025, 10, 2, 12))))
+
+class ViewCacheTests(unittest.TestCase):
+    def test_day_view(self):
+        cal = CalendarTests().get_two_day_calendar()
+        cache = ViewCache(cal, prefetch=False)
+        view = cache.get("day", datetime(2025, 10, 3, 12))
+
+        self.assertEqual("Friday, October 3, 2025", view["date"])
+        self.assertFalse(view["scheduled"])
+        self.assertEqual(["R", "S", "T"], [entry["title"] for entry in view["events"]])
+
+        cal.get_schedule(datetime(2025, 10, 3), SolverOptions(domain_model="bitset"))
+        view = cache.get("day", date(2025, 10, 3))
+        self.assertTrue(view["scheduled"])
+        starts = [entry["time"].start_date for entry in view["events"]]
+        self.assertEqual(sorted(starts), starts)
+
+    def test_lru(self):
+        cache = ViewCache(Calendar(), capacity=2, prefetch=False)
+        for day in (1, 2, 1, 3):
+            cache.get("day", date(2025, 10, day))
+
+        self.assertEqual((1, 3, 1), (cache.hits, cache.misses, cache.evictions))
+        cache.get("day", date(2025, 10, 2))
+        self.assertEqual(4, cache.misses)
+
+    def test_anchor_normalized(self):
+        cache = ViewCache(Calendar(), prefetch=False)
+        week = cache.get("week", date(2025, 10, 2))
+        month = cache.get("month", date(2025, 10, 2))
+
+        self.assertIs(week, cache.get("week", date(2025, 9, 29)))
+        self.assertIs(month, cache.get("month", date(2025, 10, 31)))
+        self.assertEqual(7, len(week["days"]))
+        self.assertEqual(31, len(month["days"]))
+        self.assertEqual(date(2025, 9, 29), week["anchor"])
+
+    def test_invalidated_by_changes(self):
+        cal = CalendarTests().get_two_day_calendar()
+        cache = ViewCache(cal, prefetch=False)
+        first_day = cache.get("day", date(2025, 10, 2))
+        second_day = cache.get("day", date(2025, 10, 3))
+        week = cache.get("week", date(2025, 10, 3))
+
+        cal.schedule_event(TemporalTask("V", "V", datetime(2025, 10, 3, 9), datetime(2025, 10, 3, 10)), 20, 15, 10, 25)
+        self.assertIs(first_day, cache.get("day", date(2025, 10, 2)))
+        self.assertIn("V", [entry["title"] for entry in cache.get("day", date(2025, 10, 3))["events"]])
+        self.assertIsNot(second_day, cache.get("day", date(2025, 10, 3)))
+        self.assertIsNot(week, cache.get("week", date(2025, 10, 3)))
+
+    def test_prefetch(self):
+        cache = ViewCache(CalendarTests().get_two_day_calendar())
+        try:
+            cache.get("day", date(2025, 10, 3))
+            cache.wait()
+            self.assertEqual(2, cache.prefetched)
+
+            cache.get("day", date(2025, 10, 2))
+            cache.get("day", date(2025, 10, 4))
+            self.assertEqual((2, 1), (cache.hits, cache.misses))
+        finally:
+            cache.close()
+
+    def test_prefetch_during_edits(self):
+        cal = Calendar()
+        cache = ViewCache(cal)
+        for minute in range(60):
+            start = datetime(2025, 10, 1) + timedelta(days=minute % 20, minutes=minute)
+            cal.schedule_event(TemporalTask(str(minute), "", start, start + timedelta(minutes=30), None, None, [TimeInterval(start, start + timedelta(hours=1))]), 20, 15, 10, 25)
+            cache.get("day", start)
+        cache.wait()
+        cache.close()
+
+        self.assertEqual(3, len(cache.get("day", date(2025, 10, 1))["events"]))
+
+    def test_prefetch_error_raised(self):
+        cache = ViewCache(Calendar())
+        cache.get("day", date(2025, 10, 2))
+        cache.wait()
+
+        def fail(day):
+            raise RuntimeError("render failed")
+        cache._render_day = fail
+        cache._queue.put(("day", date(2025, 11, 2)))
+        with self.assertRaises(RuntimeError):
+            cache.wait()
+        cache.close()
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            ViewCache(Calendar(), capacity=0)
+        with self.assertRaises(ValueError):
+            ViewCache(Calendar(), prefetch=False).get("year", date(2025, 10, 2))
+
+class AsyncCalendarTests(unittest.IsolatedAsyncioTestCase):
+    def get_hard_calendar(self):
+        # Nine overlapping hours in an eight hour window, which search cannot refute quickly
+        cal = Calendar()
+        for k in range(9):
+            start = datetime(2025, 10, 2, 5) + timedelta(minutes=40 * k)
+            task = TemporalTask(str(k), "", start, start + timedelta(hours=1), None, None, [TimeInterval(datetime(2025, 10, 2, 5), datetime(2025, 10, 2, 13, 0, k))])
+            cal.schedule_event(task, 20, 15, 10, 25)
+        return cal
+
+    async def test_insert_query_solve(self):
+        async with AsyncCalendar() as cal:
+            start = datetime(2025, 10, 2, 9)
+            task = TemporalTask("A", "A", start, start + timedelta(hours=1), None, None, [TimeInterval(datetime(2025, 10, 2, 8), datetime(2025, 10, 2, 12))])
+            await cal.schedule_event(task, 20, 15, 10, 25)
+
+            events = await cal.get_events(TimeInterval(datetime(2025, 10, 2), datetime(2025, 10, 2, 23, 59, 59)))
+            self.assertEqual(["A"], [event.get_task().get_title() for event in events])
+            self.assertIsNone(await cal.peek_schedule(datetime(2025, 10, 2)))
+
+            schedule = await cal.get_schedule(datetime(2025, 10, 2), SolverOptions(domain_model="bitset"))
+            self.assertEqual(1, len(schedule))
+            self.assertIs(schedule, await cal.get_schedule(datetime(2025, 10, 2)))
+
+            await cal.remove_event(events[0])
+            self.assertEqual([], await cal.get_events(TimeInterval(datetime(2025, 10, 2), datetime(2025, 10, 2, 23, 59, 59))))
+
+    async def test_bulk_insert(self):
+        async with AsyncCalendar() as cal:
+            items = []
+            for hour in range(8, 12):
+                start = datetime(2025, 10, 2, hour)
+                task = TemporalTask(str(hour), "", start, start + timedelta(minutes=30), None, None, [TimeInterval(datetime(2025, 10, 2, 8), datetime(2025, 10, 2, 12, 0, hour))])
+                items.append((task, 20, 15, 10, 25))
+            self.assertEqual(4, await cal.schedule_events(items))
+
+            results = [result async for _, result in cal.generate_schedule_range(datetime(2025, 10, 2), datetime(2025, 10, 3), SolverOptions(domain_model="bitset"))]
+            self.assertEqual(4, sum(len(result.assignments) for result in results))
+
+            token = CancellationToken()
+            token.cancel()
+            self.assertEqual(0, await cal.schedule_events(items, token))
+
+    async def test_query_during_solve(self):
+        async with AsyncCalendar(self.get_hard_calendar()) as cal:
+            solve = asyncio.create_task(cal.generate_schedule(datetime(2025, 10, 2), SolverOptions(domain_model="bitset")))
+            await asyncio.sleep(0.05)
+
+            events = await asyncio.wait_for(cal.get_events(TimeInterval(datetime(2025, 10, 2), datetime(2025, 10, 2, 23, 59, 59))), 1)
+            self.assertEqual(9, len(events))
+            self.assertFalse(solve.done())
+
+            solve.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await solve
+
+    async def test_cancel(self):
+        async with AsyncCalendar(self.get_hard_calendar()) as cal:
+            token = CancellationToken()
+            solve = asyncio.create_task(cal.generate_schedule(datetime(2025, 10, 2), SolverOptions(domain_model="bitset"), cancel_token=token))
+            await asyncio.sleep(0.05)
+            solve.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await solve
+            self.assertTrue(token.is_set())
+
+            # The solver has stopped, so edits go through right away
+            events = await cal.get_events(TimeInterval(datetime(2025, 10, 2), datetime(2025, 10, 2, 23, 59, 59)))
+            await asyncio.wait_for(cal.remove_event(events[0]), 1)
+            result = await cal.generate_schedule(datetime(2025, 10, 2), SolverOptions(domain_model="bitset"))
+            self.assertEqual(8, len(result.assignments))
+
+    async def test_cancel_twice(self):
+        async with AsyncCalendar(self.get_hard_calendar()) as cal:
+            finished = threading.Event()
+            generate_schedule = cal.calendar.generate_schedule
+
+            def slow_generate_schedule(*args):
+                try:
+                    return generate_schedule(*args)
+                finally:
+                    time.sleep(0.2)
+                    finished.set()
+
+            cal.calendar.generate_schedule = slow_generate_schedule
+            solve = asyncio.create_task(cal.generate_schedule(datetime(2025, 10, 2), SolverOptions(domain_model="bitset")))
+            await asyncio.sleep(0.05)
+            solve.cancel()
+            await asyncio.sleep(0.05)
+            solve.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await solve
+            # The second cancel must not release the locks while the executor still works on the calendar
+            self.assertTrue(finished.is_set())
+            self.assertFalse(cal._solve_lock.locked())
+
+class ChangeFeedTests(unittest.TestCase):
+    def test_kinds_and_sequence(self):
+        cal = CalendarTests().get_two_day_calendar()
+        feed = ChangeFeed(cal)
+        subscription = feed.subscribe()
+
+        event = cal.get_events(TimeInterval(datetime(2025, 10, 3, 14), datetime(2025, 10, 3, 14, 30)))[0]
+        cal.complete_event(event)
+        cal.complete_event(event)
+        cal.get_schedule(datetime(2025, 10, 3), SolverOptions(domain_model="bitset"))
+        cal.remove_event(event)
+
+        changes = subscription.poll()
+        self.assertEqual([COMPLETED, SCHEDULED, REMOVED], [change.kind for change in changes])
+        self.assertEqual([1, 2, 3], [change.sequence for change in changes])
+        self.assertIs(event, changes[0].event)
+        self.assertIsNone(changes[1].event)
+        self.assertEqual([], subscription.poll())
+        self.assertEqual(3, subscription.position)
+
+    def test_filters(self):
+        cal = Calendar()
+        feed = ChangeFeed(cal)
+        morning = feed.subscribe(window=TimeInterval(datetime(2025, 10, 2, 6), datetime(2025, 10, 2, 12)))
+        removals = feed.subscribe(kinds=[REMOVED])
+
+        events = {}
+        for hour in (8, 15):
+            start = datetime(2025, 10, 2, hour)
+            task = TemporalTask(str(hour), "", start, start + timedelta(hours=1), None, None, [TimeInterval(start, start + timedelta(hours=2))])
+            cal.schedule_event(task, 20, 15, 10, 25)
+            events[hour] = cal.get_events(TimeInterval(start, start))[0]
+        cal.remove_event(events[15])
+
+        self.assertEqual([(INSERTED, "8")], [(change.kind, change.event.get_task().get_title()) for change in morning.poll()])
+        self.assertEqual([3], [change.sequence for change in removals.poll()])
+
+    def test_batches_and_resume(self):
+        cal = Calendar()
+        feed = ChangeFeed(cal, capacity=8)
+        subscription = feed.subscribe(batch_size=4)
+        for minute in range(10):
+            start = datetime(2025, 10, 2, 9, minute)
+            cal.schedule_event(TemporalTask(str(minute), "", start, start + timedelta(minutes=30), None, None, [TimeInterval(start, start + timedelta(hours=1))]), 20, 15, 10, 25)
+
+        # The first two changes were dropped before the subscription read them
+        with self.assertRaises(ValueError):
+            subscription.poll()
+
+        resumed = feed.subscribe(since=4, batch_size=4)
+        self.assertEqual([5, 6, 7, 8], [change.sequence for change in resumed.poll()])
+        self.assertEqual([9, 10], [change.sequence for change in resumed])
+        self.assertEqual([], feed.subscribe(since=10).poll(timeout=0.01))
+
+        with self.assertRaises(ValueError):
+            feed.subscribe(since=1)
+        with self.assertRaises(ValueError):
+            feed.subscribe(since=11)
+        with self.assertRaises(ValueError):
+            feed.subscribe(kinds=["move"])
+
+    def test_poll_waits(self):
+        cal = Calendar()
+        feed = ChangeFeed(cal)
+        subscription = feed.subscribe()
+        start = datetime(2025, 10, 2, 9)
+        task = TemporalTask("A", "", start, start + timedelta(minutes=30), None, None, [TimeInterval(start, start + timedelta(hours=1))])
+        timer = threading.Timer(0.05, cal.schedule_event, (task, 20, 15, 10, 25))
+        timer.start()
+
+        self.assertEqual([1], [change.sequence for change in subscription.poll(timeout=5)])
+        timer.join()
+        feed.close()
+        cal.remove_event(cal.get_events(task.get_time_slot())[0])
+        self.assertEqual(1, feed.sequence)
+
+class CalendarHostTests(unittest.TestCase):
+    def get_task(self, title, hour):
+        start = datetime(2025, 10, 2, hour)
+        return TemporalTask(title, "", start, start + timedelta(hours=1), None, None, [TimeInterval(datetime(2025, 10, 2, 8), datetime(2025, 10, 2, 12, 0, hour))])
+
+    def test_routing(self):
+        day = TimeInterval(datetime(2025, 10, 2), datetime(2025, 10, 2, 23, 59, 59))
+        with tempfile.TemporaryDirectory() as directory, CalendarHost(directory, shards=2) as host:
+            users = [f"user-{i}" for i in range(4)]
+            for i, user in enumerate(users):
+                for hour in range(8, 8 + i + 1):
+                    host.call(user, "schedule_event", self.get_task(f"{user} {hour}", hour), 20, 15, 10, 25)
+
+            self.assertEqual([1, 2, 3, 4], [len(host.call(user, "get_events", day)) for user in users])
+            self.assertEqual(4, sum(stats["loaded"] for stats in host.stats()))
+
+            schedule = host.submit("user-2", "get_schedule", datetime(2025, 10, 2), SolverOptions(domain_model="bitset")).result()
+            self.assertEqual(3, len(schedule))
+            event = host.call("user-2", "get_events", day)[0]
+            host.call("user-2", "remove_event", event)
+            self.assertEqual(2, len(host.call("user-2", "get_events", day)))
+
+            with self.assertRaises(ValueError):
+                host.call("user-0", "_get_events", day)
+            # Errors raised in the shard are raised again here
+            with self.assertRaises(ValueError):
+                host.call("user-0", "remove_event", Event(Task("Todo", ""), 20, 15, 10, 25))
+
+    def test_complete_event(self):
+        day = TimeInterval(datetime(2025, 10, 2), datetime(2025, 10, 2, 23, 59, 59))
+        with tempfile.TemporaryDirectory() as directory, CalendarHost(directory, shards=2) as host:
+            host.call("a", "schedule_event", self.get_task("A", 9), 20, 15, 10, 25)
+            event = host.call("a", "get_events", day)[0]
+            host.call("a", "complete_event", event)
+
+            self.assertTrue(host.call("a", "get_events", day)[0].get_task().get_completion_status())
+            with self.assertRaises(ValueError):
+                host.call("b", "complete_event", event)
+
+    def test_eviction(self):
+        day = TimeInterval(datetime(2025, 10, 2), datetime(2025, 10, 2, 23, 59, 59))
+        with tempfile.TemporaryDirectory() as directory:
+            with CalendarHost(directory, shards=1, idle_timeout=0.05) as host:
+                host.call("a/b", "schedule_event", self.get_task("A", 9), 20, 15, 10, 25)
+                time.sleep(0.3)
+                self.assertEqual(0, host.stats()[0]["loaded"])
+                self.assertTrue(os.path.exists(snapshot_path(directory, "a/b")))
+
+                self.assertEqual(1, len(host.call("a/b", "get_events", day)))
+                self.assertEqual(1, host.stats()[0]["loads"])
+                self.assertTrue(host.evict("a/b"))
+                self.assertFalse(host.evict("a/b"))
+
+            with CalendarHost(directory, shards=1) as host:
+                host.call("c", "schedule_event", self.get_task("C", 9), 20, 15, 10, 25)
+            # Closing the host snapshots what it still had loaded
+            with CalendarHost(directory, shards=3) as host:
+                self.assertEqual(["C"], [event.get_task().get_title() for event in host.call("c", "get_events", day)])
+
+    def test_invalid_arguments(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with self.assertRaises(ValueError):
+                CalendarHost(directory, shards=0)
+            with self.assertRaises(ValueError):
+                CalendarHost(directory, idle_timeout=0)
+
+class FreeBusyTests(unittest.TestCase):
+    def get_calendar(self, slots):
+        cal = Calendar()
+        for start_hour, end_hour in slots:
+            start = datetime(2025, 10, 2) + timedelta(hours=start_hour)
+            end = datetime(2025, 10, 2) + timedelta(hours=end_hour)
+            # Busy in its time slot only, not in the window around it or the one on the next day
+            task = TemporalTask(f"{start_hour}", "", start, end, None, None, [TimeInterval(start - timedelta(minutes=30), end + timedelta(minutes=15)), TimeInterval(start + timedelta(days=1), end + timedelta(days=1))])
+            cal.schedule_event(task, 20, 15, 10, 25)
+        return cal
+
+    def test_iter_busy(self):
+        cal = self.get_calendar([(13, 14), (9, 10), (11, 12.5), (20, 21)])
+        busy = list(cal.iter_busy(TimeInterval(datetime(2025, 10, 2, 9, 30), datetime(2025, 10, 2, 13))))
+        self.assertEqual(["9", "11", "13"], [event.get_task().get_title() for _, event in busy])
+        self.assertEqual([], list(Calendar().iter_busy(TimeInterval(datetime(2025, 10, 2), datetime(2025, 10, 3)))))
+
+    def test_merge_busy(self):
+        first = self.get_calendar([(9, 10), (12, 13), (16, 17)])
+        second = self.get_calendar([(9.5, 11), (13, 14)])
+        window = TimeInterval(datetime(2025, 10, 2, 9, 45), datetime(2025, 10, 2, 16, 30))
+
+        merged = list(merge_busy([first, second._time_tree, Calendar()], window))
+        hours = [((busy.start_date - datetime(2025, 10, 2)) / timedelta(hours=1), (busy.end_date - datetime(2025, 10, 2)) / timedelta(hours=1)) for busy in merged]
+        self.assertEqual([(9.75, 11), (12, 14), (16, 16.5)], hours)
+
+    def test_free_slots(self):
+        first = self.get_calendar([(9, 10), (12, 13)])
+        second = self.get_calendar([(10.5, 11), (13, 14)])
+        window = TimeInterval(datetime(2025, 10, 2, 8), datetime(2025, 10, 2, 18))
+
+        free = free_slots([first, second], window, timedelta(hours=1))
+        self.assertEqual([(datetime(2025, 10, 2, 8), datetime(2025, 10, 2, 9)), (datetime(2025, 10, 2, 11), datetime(2025, 10, 2, 12)), (datetime(2025, 10, 2, 14), datetime(2025, 10, 2, 18))], [(slot.start_date, slot.end_date) for slot in free])
+        self.assertEqual(4, len(free_slots([first, second], window)))
+        self.assertEqual([window], free_slots([Calendar()], window))
+        with self.assertRaises(ValueError):
+            free_slots([first], window, timedelta(minutes=-1))
+
+class SolutionCacheTests(unittest.TestCase):
+    def get_routine_calendar(self, days):
+        # The same three overlapping events on every day
+        cal = Calendar()
+        for day in days:
+            for title, hour in (("Gym", 6), ("Breakfast", 7), ("Commute", 8)):
+                task = TemporalTask(title, title, datetime(2025, 10, day, hour), datetime(2025, 10, day, hour, 45), None, None, [TimeInterval(datetime(2025, 10, day, hour - 1, 30), datetime(2025, 10, day, hour + 1, 30))])
+                cal.schedule_event(task, 20, 15, 10, 25)
+        return cal
+
+    def test_hit_shifted_to_day(self):
+        cal = self.get_routine_calendar((2, 3))
+        options = SolverOptions(domain_model="bitset")
+
+        first = cal.generate_schedule(datetime(2025, 10, 2), options)
+        second = cal.generate_schedule(datetime(2025, 10, 3), options)
+
+        self.assertEqual((1, 1), (cal.solution_cache.hits, cal.solution_cache.misses))
+        self.assertTrue(second)
+        self.assertEqual(0, second.nodes_expanded)
+        first_by_title = {event.get_task().get_title(): interval for event, interval in first.assignments.items()}
+        for event, interval in second.assignments.items():
+            self.assertEqual(datetime(2025, 10, 3), datetime(interval.start_date.year, interval.start_date.month, interval.start_date.day))
+            self.assertEqual(first_by_title[event.get_task().get_title()].start_date + timedelta(days=1), interval.start_date)
+
+    def test_different_shape_misses(self):
+        cal = self.get_routine_calendar((2,))
+        cal.generate_schedule(datetime(2025, 10, 2))
+        cal.generate_schedule(datetime(2025, 10, 2), SolverOptions(domain_model="bitset"))
+
+        self.assertEqual((0, 2), (cal.solution_cache.hits, cal.solution_cache.misses))
+
+    def test_lru_eviction(self):
+        cal = self.get_routine_calendar((2,))
+        day = datetime(2025, 10, 2)
+        domains = {found["event"]: found["event"].schedule_intervals for found in cal._get_day_events(day)}
+        cache = SolutionCache(1)
+        first, events = cache.fingerprint(day, domains, {}, SolverOptions())
+        second, _ = cache.fingerprint(day, domains, {}, SolverOptions(domain_model="bitset"))
+
+        cache.put(first, events, day, "infeasible", {})
+        cache.put(second, events, day, "infeasible", {})
+
+        self.assertEqual(1, len(cache))
+        self.assertEqual(1, cache.evictions)
+        self.assertIsNone(cache.get(first, events, day))
+        self.assertEqual(("infeasible", {}), cache.get(second, events, day))
+
+    def test_invalid_capacity(self):
+        with self.assertRaises(ValueError):
+            SolutionCache(-1)
+
 class CalendarTests(unittest.TestCase):
     def test(self):
         cal = Calendar()
@@ -1103,6 +2356,140 @@ class CalendarTests(unittest.TestCase):
 
         cal.generate_schedule(datetime(2025, 10, 2))
 
+    def get_two_day_calendar(self):
+        cal = Calendar()
+        windows = {
+            "P": (datetime(2025, 10, 2, 22), timedelta(minutes=45), datetime(2025, 10, 2, 21, 30), datetime(2025, 10, 2, 23, 30)),
+            "Q": (datetime(2025, 10, 2, 23), timedelta(minutes=30), datetime(2025, 10, 2, 22, 30), datetime(2025, 10, 2, 23, 59)),
+            # Crosses midnight, tying the late events of one day to the early events of the next
+            "M": (datetime(2025, 10, 2, 23, 30), timedelta(hours=1), datetime(2025, 10, 2, 23, 15), datetime(2025, 10, 3, 1, 30)),
+            "R": (datetime(2025, 10, 3, 0, 45), timedelta(minutes=30), datetime(2025, 10, 3, 0, 15), datetime(2025, 10, 3, 2)),
+            "S": (datetime(2025, 10, 3, 14), timedelta(hours=1), datetime(2025, 10, 3, 13, 30), datetime(2025, 10, 3, 16)),
+            "T": (datetime(2025, 10, 3, 14, 30), timedelta(hours=1), datetime(2025, 10, 3, 14, 15), datetime(2025, 10, 3, 16, 30)),
+        }
+        for title, (start, duration, window_start, window_end) in windows.items():
+            task = TemporalTask(title, title, start, start + duration, None, None, [TimeInterval(window_start, window_end)])
+            cal.schedule_event(task, 20, 15, 10, 25)
+        return cal
+
+    def test_generate_schedule_range(self):
+        for max_workers in (0, 2):
+            cal = self.get_two_day_calendar()
+            results = list(cal.generate_schedule_range(datetime(2025, 10, 2), datetime(2025, 10, 4), SolverOptions(domain_model="bitset", max_workers=max_workers)))
+
+            titles = sorted(sorted(event.get_task().get_title() for event in result.assignments) for _, result in results)
+            self.assertEqual([["M", "P", "Q", "R"], ["S", "T"]], titles)
+            for window, result in results:
+                self.assertTrue(result)
+                intervals = sorted(result.assignments.values(), key=lambda interval: interval.start_date)
+                for first, second in zip(intervals, intervals[1:]):
+                    self.assertLessEqual(first.end_date, second.start_date)
+                for interval in intervals:
+                    self.assertTrue(window.start_date <= interval.start_date and interval.end_date <= window.end_date)
+
+    def test_generate_schedule_range_pool_closed_early(self):
+        options = SolverOptions(domain_model="bitset", max_workers=2)
+        results = self.get_two_day_calendar().generate_schedule_range(datetime(2025, 10, 2), datetime(2025, 10, 4), options)
+        next(results)
+        results.close()
+
+        # The pool stays up for the next range once the first one stops early
+        executor = pools.get(2)
+        results = list(self.get_two_day_calendar().generate_schedule_range(datetime(2025, 10, 2), datetime(2025, 10, 4), options))
+        self.assertEqual(2, len(results))
+        self.assertTrue(all(result for _, result in results))
+        self.assertIs(executor, pools.get(2))
+
+    def test_generate_schedule_range_isolated(self):
+        cal = Calendar()
+        lone = TemporalTask("Lone", "", datetime(2025, 10, 2, 9), datetime(2025, 10, 2, 10), None, None, [TimeInterval(datetime(2025, 10, 2, 8), datetime(2025, 10, 2, 12))])
+        cal.schedule_event(lone, 20, 15, 10, 25)
+        for title, hour in (("A", 9), ("B", 9.5)):
+            start = datetime(2025, 10, 3) + timedelta(hours=hour)
+            cal.schedule_event(TemporalTask(title, "", start, start + timedelta(hours=1), None, None, [TimeInterval(start - timedelta(hours=1), start + timedelta(hours=2))]), 20, 15, 10, 25)
+
+        results = list(cal.generate_schedule_range(datetime(2025, 10, 2), datetime(2025, 10, 4), SolverOptions(domain_model="bitset")))
+        self.assertEqual([["Lone"], ["A", "B"]], [sorted(event.get_task().get_title() for event in result.assignments) for _, result in results])
+        window, result = results[0]
+        self.assertEqual(SOLVED, result.status)
+        self.assertEqual(lone.get_time_slot(), list(result.assignments.values())[0])
+        self.assertEqual(TimeInterval(datetime(2025, 10, 2, 8), datetime(2025, 10, 2, 12)), window)
+
+    def test_generate_schedule_stats(self):
+        cal = self.get_two_day_calendar()
+        result = cal.generate_schedule(datetime(2025, 10, 2), SolverOptions(instrument=True))
+
+        self.assertTrue(result)
+        self.assertGreater(result.stats.overlaps, 0)
+        for phase in ("sweepline", "cache", "propagation", "search"):
+            self.assertIn(phase, result.stats.phases)
+        self.assertIsNone(cal.generate_schedule(datetime(2025, 10, 3)).stats)
+
+    def test_get_schedule(self):
+        cal = self.get_two_day_calendar()
+        # Overlaps nothing, so it keeps its own time slot
+        cal.schedule_event(TemporalTask("U", "U", datetime(2025, 10, 3, 9), datetime(2025, 10, 3, 10)), 20, 15, 10, 25)
+        schedule = cal.get_schedule(datetime(2025, 10, 3), SolverOptions(domain_model="bitset"))
+
+        self.assertEqual("solved", schedule.status)
+        self.assertEqual([], schedule.unscheduled)
+        self.assertIs(schedule, cal.get_schedule(datetime(2025, 10, 3)))
+        starts = [interval.start_date for interval, _ in schedule.timeline]
+        self.assertEqual(sorted(starts), starts)
+        self.assertTrue(all(datetime(2025, 10, 3) <= start < datetime(2025, 10, 4) for start in starts))
+        self.assertTrue({"R", "S", "T", "U"} <= {event.get_task().get_title() for event in schedule.assignments})
+        self.assertEqual(TimeInterval(datetime(2025, 10, 3, 9), datetime(2025, 10, 3, 10)), next(interval for interval, event in schedule.timeline if event.get_task().get_title() == "U"))
+
+    def test_get_schedule_unscheduled(self):
+        cal = Calendar()
+        for title in ("X", "Y"):
+            cal.schedule_event(TemporalTask(title, title, datetime(2025, 10, 2, 5), datetime(2025, 10, 2, 6)), 20, 15, 10, 25)
+        schedule = cal.get_schedule(datetime(2025, 10, 2))
+
+        self.assertEqual("infeasible", schedule.status)
+        self.assertEqual(2, len(schedule) + len(schedule.unscheduled))
+        self.assertGreater(len(schedule.unscheduled), 0)
+
+    def test_schedule_invalidation(self):
+        cal = self.get_two_day_calendar()
+        first_day = cal.get_schedule(datetime(2025, 10, 2))
+        second_day = cal.get_schedule(datetime(2025, 10, 3))
+
+        # Only the day the new event overlaps is solved again
+        cal.schedule_event(TemporalTask("V", "V", datetime(2025, 10, 3, 14), datetime(2025, 10, 3, 14, 30)), 20, 15, 10, 25)
+        self.assertIs(first_day, cal.get_schedule(datetime(2025, 10, 2)))
+        self.assertIsNot(second_day, cal.get_schedule(datetime(2025, 10, 3)))
+
+        event_p = next(event for event in first_day.assignments if event.get_task().get_title() == "P")
+        cal.remove_event(event_p)
+        self.assertNotIn(event_p, cal.get_schedule(datetime(2025, 10, 2)).assignments)
+
+    def test_generate_schedule_materializes(self):
+        cal = self.get_two_day_calendar()
+        result = cal.generate_schedule(datetime(2025, 10, 2), SolverOptions(domain_model="bitset"))
+        schedule = cal.get_schedule(datetime(2025, 10, 2))
+
+        self.assertEqual(result.status, schedule.status)
+        for event, interval in schedule.assignments.items():
+            self.assertEqual(result.assignments[event], interval)
+
+    def test_listeners(self):
+        cal = self.get_two_day_calendar()
+        changes = []
+        cal.add_listener(lambda kind, event, intervals: changes.append((kind, event.get_task().get_title() if event else None, intervals)))
+
+        cal.schedule_event(TemporalTask("V", "V", datetime(2025, 10, 3, 9), datetime(2025, 10, 3, 10)), 20, 15, 10, 25)
+        cal.get_schedule(datetime(2025, 10, 3))
+        event_v = next(event for event in cal.get_events(TimeInterval(datetime(2025, 10, 3, 9), datetime(2025, 10, 3, 10))) if event.get_task().get_title() == "V")
+        cal.remove_event(event_v)
+
+        self.assertEqual([("insert", "V"), ("schedule", None), ("delete", "V")], [(kind, title) for kind, title, _ in changes])
+        self.assertEqual([TimeInterval(datetime(2025, 10, 3), datetime(2025, 10, 3, 23, 59, 59))], changes[1][2])
+
+    def test_generate_schedule_range_invalid(self):
+        with self.assertRaises(ValueError):
+            list(Calendar().generate_schedule_range(datetime(2025, 10, 3), datetime(2025, 10, 2)))
+
     # def test_add_event(self):
     #     calendar = Calendar()
         
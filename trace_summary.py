@@ -0,0 +1,17 @@
+import sys
+from models.solver_trace import summarize_trace
+
+def print_summary(path: str, top: int = 10):
+    summary = summarize_trace(path, top)
+    print(f"{path}: {summary['records']} records over {summary['span']:.3f}s, 1 in {summary['sample_every']} sampled")
+    for kind, count in sorted(summary["estimated"].items()):
+        print(f"  ~{count} {kind}")
+    print(f"  ~{summary['values_removed']} values removed")
+    print("  Most assigned: " + ", ".join(f"{event} ({count})" for event, count in summary["most_assigned"]))
+    print("  Most undone: " + ", ".join(f"{event} ({count})" for event, count in summary["most_undone"]))
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("usage: python trace_summary.py TRACE_FILE [TOP]")
+        sys.exit(1)
+    print_summary(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 10)